@@ -1,14 +1,11 @@
-import openai
-import config
+import chat_service
 
-# Set up the API key from config
-openai.api_key = config.OpenAI_key
 
 def chat_with_gpt():
     print("Welcome to the ChatGPT CLI. Type 'exit' to end the chat.")
 
-    # Define the conversation
-    messages = [{"role": "system", "content": "You are a helpful assistant."}]
+    # The conversation: recent turns plus a rolling summary of older ones
+    session_id = "cli"
 
     while True:
         # Get user input
@@ -19,26 +16,13 @@ def chat_with_gpt():
             print("Goodbye!")
             break
 
-        # Append user input to messages
-        messages.append({"role": "user", "content": user_input})
-
-        try:
-            # Get response from ChatGPT using the updated API
-            response = openai.ChatCompletion.create(
-                model="gpt-4",  # Use 'gpt-3.5-turbo' for a cheaper alternative
-                messages=messages
-            )
-
-            # Extract and display the assistant's reply
-            assistant_reply = response.choices[0].message["content"]
-            print(f"ChatGPT: {assistant_reply}")
-
-            # Append assistant's reply to the messages
-            messages.append({"role": "assistant", "content": assistant_reply})
-
-        except Exception as e:
-            print(f"An error occurred: {e}")
+        # Same routing, session and compaction logic as the web UI
+        reply = chat_service.handle_chat(user_input, session_id=session_id)
+        if "error" in reply:
+            print(f"An error occurred: {reply['error']}")
+        else:
+            # Display the assistant's reply
+            print(f"ChatGPT: {reply['response']}")
 
 if __name__ == "__main__":
     chat_with_gpt()
-
@@ -1,29 +1,32 @@
 # Chat Server (chat_server.py)
-import openai
+# Optional remote mode: the web UI answers chats in-process unless
+# config.LLM_MODE is "remote", in which case it posts them here.
 from flask import Flask, request, jsonify
 
-app = Flask(__name__)
-
-import config
+import llm_providers
+import llm_scheduler
+import chat_service
 
-# Set up the API key from config
-openai.api_key = config.OpenAI_key
+app = Flask(__name__)
 
 
 @app.route('/chat', methods=['POST'])
 def chat():
-    user_input = request.json.get('message', '')
-    messages = [{"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": user_input}]
-    try:
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=messages
-        )
-        assistant_reply = response.choices[0].message["content"]
-        return jsonify({"response": assistant_reply})
-    except Exception as e:
-        return jsonify({"error": str(e)})
+    return jsonify(chat_service.handle_chat(
+        request.json.get('message', ''),
+        # Task tag picks the model, e.g. "generate", "interpret", "explain_crash" or "status"
+        task=request.json.get('task'),
+        session_id=request.json.get('session_id'),
+        # Optional "interactive" or "batch" override of the queue priority implied by the task
+        priority=request.json.get('priority'),
+        # Playbook/repo context for this message only; it is not stored in the session
+        context=request.json.get('context')))
+
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    return jsonify({"providers": llm_providers.get_all_stats(),
+                    "schedulers": llm_scheduler.get_all_stats()})
 
 if __name__ == '__main__':
     app.run(port=5001, debug=True)
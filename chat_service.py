@@ -0,0 +1,46 @@
+# Chat Service (chat_service.py)
+import chat_sessions
+import llm_router
+
+
+def summarize(text):
+    """Summarize old conversation turns with the cheap summarization route."""
+    summary, _ = llm_router.routed_chat([{"role": "user", "content": text}], "summarize")
+    return summary
+
+
+def handle_chat(user_input, task=None, session_id=None, priority=None, context=None):
+    """Answer one chat message and return the JSON-ready reply.
+
+    task picks the model route ("generate", "interpret", "explain_crash", ...)
+    and priority optionally overrides the queue priority implied by it. With a
+    session ID the conversation continues; without one the request is stateless.
+    context is extra system text (playbook, repo details) sent with this
+    message but not kept in the session. Errors are returned under "error"
+    rather than raised.
+    """
+    if not session_id:
+        messages = [{"role": "system", "content": chat_sessions.SYSTEM_PROMPT}]
+        if context:
+            messages.append({"role": "system", "content": context})
+        messages.append({"role": "user", "content": user_input})
+        try:
+            assistant_reply, model = llm_router.routed_chat(messages, task, priority)
+            return {"response": assistant_reply, "model": model}
+        except Exception as e:
+            return {"error": str(e)}
+
+    session = chat_sessions.get_session(session_id)
+    with session.lock:
+        messages = session.build_messages(user_input, context)
+        try:
+            assistant_reply, model = llm_router.routed_chat(messages, task, priority)
+        except Exception as e:
+            return {"error": str(e), "session_id": session.session_id}
+        session.record(user_input, assistant_reply)
+        try:
+            session.compact(summarize)
+        except Exception as e:
+            # Keep the full history and try compacting again on the next turn
+            print(f"Failed to compact session {session.session_id}: {e}")
+    return {"response": assistant_reply, "model": model, "session_id": session.session_id}
@@ -0,0 +1,125 @@
+# Chat Sessions (chat_sessions.py)
+import threading
+import time
+import uuid
+
+SYSTEM_PROMPT = "You are a helpful assistant."
+
+# Once the history is estimated above this many tokens, older turns are folded into a summary
+SESSION_TOKEN_BUDGET = 6000
+
+# Most recent messages kept as turns rather than folded into the summary. They still
+# count against the budget: oversized ones are cut down to their start and end.
+KEEP_RECENT_MESSAGES = 6
+
+# Share of the budget the rolling summary may take
+SUMMARY_TOKEN_SHARE = 0.3
+
+# Sessions idle longer than this (seconds) are dropped
+SESSION_TTL = 6 * 60 * 60
+
+SUMMARY_PROMPT = (
+    "Summarize the conversation below for your own future reference. Keep every concrete fact "
+    "needed to continue: repository URLs, target names, paths, build commands, fuzzing setup, "
+    "errors seen and decisions made. Be concise.\n"
+)
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Shorten text to about max_tokens, keeping its start and end (where errors usually are)."""
+    max_chars = max(0, max_tokens - 1) * 4
+    if len(text) <= max_chars:
+        return text
+    marker = f"\n[... {len(text) - max_chars} characters omitted ...]\n"
+    head = max(0, (max_chars - len(marker)) // 2)
+    tail = max(0, max_chars - len(marker) - head)
+    return text[:head] + marker + (text[-tail:] if tail else "")
+
+
+class ChatSession:
+    """A conversation kept server-side: a rolling summary plus the recent turns."""
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.summary = ""
+        self.turns = []
+        self.last_used = time.time()
+        self.lock = threading.Lock()
+
+    def build_messages(self, user_input, context=None):
+        """Return the history to send for a new user message.
+
+        context (playbook, repo details, reply format) is sent with this
+        message only; it is never recorded in the history.
+        """
+        messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+        if self.summary:
+            messages.append({"role": "system", "content": f"Summary of the conversation so far:\n{self.summary}"})
+        messages.extend(self.turns)
+        if context:
+            messages.append({"role": "system", "content": context})
+        messages.append({"role": "user", "content": user_input})
+        return messages
+
+    def record(self, user_input, assistant_reply):
+        """Append a completed exchange to the history."""
+        self.turns.append({"role": "user", "content": user_input})
+        self.turns.append({"role": "assistant", "content": assistant_reply})
+        self.last_used = time.time()
+
+    def history_tokens(self):
+        return estimate_tokens(self.summary) + sum(estimate_tokens(m["content"]) for m in self.turns)
+
+    def compact(self, summarize, token_budget=None):
+        """Keep the history within the token budget.
+
+        The oldest turns are folded into the rolling summary. If the summary
+        and the recent turns are still over budget, the summary and then the
+        longest recent messages are truncated. summarize(text) must return a
+        summary string, typically from a cheap model.
+        """
+        budget = token_budget or SESSION_TOKEN_BUDGET
+        if self.history_tokens() <= budget:
+            return False
+        if len(self.turns) > KEEP_RECENT_MESSAGES:
+            old_turns = self.turns[:-KEEP_RECENT_MESSAGES]
+            transcript = ""
+            if self.summary:
+                transcript += f"Earlier summary:\n{self.summary}\n\n"
+            for message in old_turns:
+                transcript += f"{message['role']}: {message['content']}\n\n"
+            self.summary = summarize(SUMMARY_PROMPT + transcript)
+            self.turns = self.turns[-KEEP_RECENT_MESSAGES:]
+
+        self.summary = truncate_to_tokens(self.summary, int(budget * SUMMARY_TOKEN_SHARE))
+        remaining = budget - estimate_tokens(self.summary)
+        # Give every recent message an equal share, and let short ones pass their unused share on
+        turns = sorted(range(len(self.turns)), key=lambda i: estimate_tokens(self.turns[i]["content"]))
+        for position, index in enumerate(turns):
+            share = max(1, remaining // (len(turns) - position))
+            content = truncate_to_tokens(self.turns[index]["content"], share)
+            self.turns[index] = dict(self.turns[index], content=content)
+            remaining -= estimate_tokens(content)
+        return True
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(session_id=None):
+    """Return the session for an ID, creating it (with a fresh ID if none given)."""
+    now = time.time()
+    with _sessions_lock:
+        # Drop idle sessions so the store does not grow without bound
+        for expired in [sid for sid, s in _sessions.items() if now - s.last_used > SESSION_TTL]:
+            del _sessions[expired]
+        session_id = session_id or uuid.uuid4().hex
+        if session_id not in _sessions:
+            _sessions[session_id] = ChatSession(session_id)
+        return _sessions[session_id]
@@ -1 +1,47 @@
 OpenAI_key = ""
+
+# LLM backend: "openai", or "local" for an OpenAI-compatible server (llama.cpp server, vLLM, ...)
+LLM_PROVIDER = "openai"
+LOCAL_LLM_URL = "http://localhost:8080"
+LOCAL_LLM_MODEL = "local-model"
+
+# Maximum in-flight requests per provider
+LLM_MAX_CONCURRENCY = {"openai": 8, "local": 2}
+
+# Client-side rate limits per provider; set these to the account's quota
+LLM_RATE_LIMITS = {
+    "openai": {"requests_per_minute": 500, "tokens_per_minute": 30000},
+    "local": {"requests_per_minute": 10000, "tokens_per_minute": 10000000},
+}
+
+# Model routing per task. Each route lists candidates tried in order; later ones are
+# fallbacks used when an earlier one errors or times out (timeout in seconds).
+# For offline use, point the routes at provider "local" and the local model names.
+LLM_ROUTES = {
+    "generate": [
+        {"provider": "openai", "model": "gpt-4", "max_tokens": 2048, "temperature": 0.2, "timeout": 180},
+        {"provider": "openai", "model": "gpt-4o-mini", "max_tokens": 2048, "temperature": 0.2, "timeout": 120},
+    ],
+    "interpret": [
+        {"provider": "openai", "model": "gpt-4o-mini", "max_tokens": 512, "temperature": 0.3, "timeout": 60},
+        {"provider": "openai", "model": "gpt-4", "max_tokens": 512, "temperature": 0.3, "timeout": 120},
+    ],
+    "explain_crash": [
+        {"provider": "openai", "model": "gpt-4o-mini", "max_tokens": 1500, "temperature": 0.0, "timeout": 90},
+        {"provider": "openai", "model": "gpt-4", "max_tokens": 1500, "temperature": 0.0, "timeout": 180},
+    ],
+    "status": [
+        {"provider": "openai", "model": "gpt-4o-mini", "max_tokens": 512, "temperature": 0.3, "timeout": 60},
+        {"provider": "openai", "model": "gpt-4", "max_tokens": 512, "temperature": 0.3, "timeout": 120},
+    ],
+    "summarize": [
+        {"provider": "openai", "model": "gpt-4o-mini", "max_tokens": 800, "temperature": 0.0, "timeout": 60},
+        {"provider": "openai", "model": "gpt-4", "max_tokens": 800, "temperature": 0.0, "timeout": 120},
+    ],
+}
+DEFAULT_LLM_TASK = "generate"
+
+# How the web UI reaches the LLM: "inprocess" calls the router directly; "remote"
+# posts to a separately started chat_server.py at CHAT_SERVER_URL.
+LLM_MODE = "inprocess"
+CHAT_SERVER_URL = "http://localhost:5001/chat"
@@ -0,0 +1,138 @@
+# FLARE Command Line (flare.py)
+"""Run FLARE without a browser.
+
+    python flare.py run https://github.com/fuzzstati0n/fuzzgoat.git
+    python flare.py batch targets.txt --concurrency 4 --timeout 3600 --output summary.json
+    python flare.py chat
+
+A batch file holds one repository URL per line (blank lines and # comments
+are skipped), or JSON lines with a "url" and an optional "prompt". Lines
+without a "url" (e.g. {"request_id", "title", "body"} records) use the first
+.git URL found in their text. Each target runs the whole pipeline: clone,
+context, generate, build and launch. The summary is JSON with one entry per
+target, in input order.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+WWW_DIR = os.path.join(ROOT_DIR, 'www')
+sys.path.insert(0, WWW_DIR)
+
+import pipeline  # noqa: E402
+
+DEFAULT_CONCURRENCY = 4
+
+# Per-target wall-clock budget in seconds, shared by the clone, LLM and build steps
+DEFAULT_TIMEOUT = 60 * 60
+
+
+def load_targets(path):
+    """Read batch targets as dicts with "url" and optional "prompt"."""
+    targets = []
+    with open(path, 'r') as file:
+        for number, line in enumerate(file, start=1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if not line.startswith('{'):
+                targets.append({"url": line})
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"{path}:{number}: invalid JSON: {e}")
+            url = entry.get("url") or pipeline.extract_git_url(" ".join(
+                str(value) for value in entry.values() if isinstance(value, str)))
+            if not url:
+                raise ValueError(f"{path}:{number}: no repository URL found")
+            targets.append({"url": url, "prompt": entry.get("prompt")})
+    return targets
+
+
+def run_batch(targets, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT):
+    """Run the pipeline for every target, at most `concurrency` at a time."""
+    start = time.time()
+
+    def run_one(target):
+        try:
+            summary = pipeline.run_target(target["url"], target.get("prompt"), timeout)
+        except Exception as e:
+            summary = {"url": target["url"], "status": "error", "model": None, "blocks": [],
+                       "error": str(e), "elapsed": None}
+        print(f"[{summary['status']}] {target['url']}", file=sys.stderr, flush=True)
+        return summary
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        results = list(pool.map(run_one, targets))
+
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    return {
+        "started_at": start,
+        "elapsed": round(time.time() - start, 1),
+        "concurrency": concurrency,
+        "timeout": timeout,
+        "counts": counts,
+        "targets": results,
+    }
+
+
+def write_summary(summary, output):
+    text = json.dumps(summary, indent=2)
+    if output in (None, '-'):
+        print(text)
+    else:
+        with open(output, 'w') as file:
+            file.write(text + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='flare', description="Run FLARE from the command line.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="fuzz one repository")
+    run_parser.add_argument('url')
+    run_parser.add_argument('--prompt', help="request sent to the LLM instead of the default")
+    run_parser.add_argument('--timeout', type=int, default=DEFAULT_TIMEOUT)
+    run_parser.add_argument('--output', help="summary file (default: stdout)")
+
+    batch_parser = commands.add_parser('batch', help="fuzz every repository listed in a file")
+    batch_parser.add_argument('file', help="repo URLs, one per line, or JSON lines")
+    batch_parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY)
+    batch_parser.add_argument('--timeout', type=int, default=DEFAULT_TIMEOUT,
+                              help="seconds allowed per target")
+    batch_parser.add_argument('--output', help="summary file (default: stdout)")
+
+    commands.add_parser('chat', help="interactive chat in the terminal")
+    args = parser.parse_args()
+
+    if args.command == 'chat':
+        import chat
+        chat.chat_with_gpt()
+        return 0
+
+    if args.command == 'run':
+        targets = [{"url": args.url, "prompt": args.prompt}]
+        concurrency = 1
+    else:
+        try:
+            targets = load_targets(args.file)
+        except (OSError, ValueError) as e:
+            print(f"flare: {e}", file=sys.stderr)
+            return 2
+        concurrency = args.concurrency
+
+    summary = run_batch(targets, concurrency, args.timeout)
+    write_summary(summary, args.output)
+    # Non-zero when any target did not reach a running fuzzer
+    return 0 if summary["counts"].get("fuzzing", 0) == len(targets) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
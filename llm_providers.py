@@ -0,0 +1,133 @@
+# LLM Providers (llm_providers.py)
+import threading
+import time
+from collections import deque
+
+import config
+
+# Number of recent call latencies kept per provider for percentile stats
+LATENCY_WINDOW = 500
+
+
+class LLMProvider:
+    """Base class for chat completion backends.
+
+    Subclasses implement _complete(); chat() adds the per-provider
+    concurrency limit and latency bookkeeping around it.
+    """
+
+    def __init__(self, name, default_model, max_concurrency=4):
+        self.name = name
+        self.default_model = default_model
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._stats_lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self.max_concurrency = max_concurrency
+        self.calls = 0
+        self.errors = 0
+
+    def _complete(self, messages, model, timeout, **options):
+        raise NotImplementedError
+
+    def chat(self, messages, model=None, timeout=None, **options):
+        """Send a chat history and return the assistant's reply text."""
+        with self._slots:
+            start = time.time()
+            try:
+                return self._complete(messages, model or self.default_model, timeout, **options)
+            except Exception:
+                with self._stats_lock:
+                    self.errors += 1
+                raise
+            finally:
+                with self._stats_lock:
+                    self.calls += 1
+                    self._latencies.append(time.time() - start)
+
+    def stats(self):
+        """Return call counts and latency percentiles (seconds) for this provider."""
+        with self._stats_lock:
+            latencies = sorted(self._latencies)
+            calls, errors = self.calls, self.errors
+        summary = {"provider": self.name, "calls": calls, "errors": errors,
+                   "max_concurrency": self.max_concurrency}
+        if latencies:
+            summary.update(
+                mean=sum(latencies) / len(latencies),
+                p50=latencies[len(latencies) // 2],
+                p95=latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+                max=latencies[-1])
+        return summary
+
+
+class OpenAIProvider(LLMProvider):
+    """OpenAI's hosted models through the openai SDK."""
+
+    def __init__(self, api_key, default_model="gpt-4", max_concurrency=8):
+        super().__init__("openai", default_model, max_concurrency)
+        import openai
+        openai.api_key = api_key
+        self._openai = openai
+
+    def _complete(self, messages, model, timeout, **options):
+        if timeout:
+            options["request_timeout"] = timeout
+        response = self._openai.ChatCompletion.create(model=model, messages=messages, **options)
+        return response.choices[0].message["content"]
+
+
+class LocalProvider(LLMProvider):
+    """Any OpenAI-compatible HTTP server, e.g. llama.cpp server or vLLM, for offline use."""
+
+    def __init__(self, base_url, default_model="local-model", max_concurrency=2, timeout=300):
+        super().__init__("local", default_model, max_concurrency)
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        import requests
+        self._session = requests.Session()
+
+    def _complete(self, messages, model, timeout, **options):
+        response = self._session.post(
+            f"{self.base_url}/v1/chat/completions",
+            json={"model": model, "messages": messages, **options},
+            timeout=timeout or self.timeout)
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"]
+
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def _build_provider(name):
+    """Create a provider from the settings in config.py."""
+    limits = getattr(config, 'LLM_MAX_CONCURRENCY', {})
+    if name == "openai":
+        return OpenAIProvider(config.OpenAI_key, max_concurrency=limits.get("openai", 8))
+    if name == "local":
+        return LocalProvider(getattr(config, 'LOCAL_LLM_URL', 'http://localhost:8080'),
+                             default_model=getattr(config, 'LOCAL_LLM_MODEL', 'local-model'),
+                             max_concurrency=limits.get("local", 2))
+    raise ValueError(f"Unknown LLM provider: {name}")
+
+
+def register_provider(name, provider):
+    """Install a provider under a name, replacing any existing one (used for local stand-ins)."""
+    with _providers_lock:
+        _providers[name] = provider
+
+
+def get_provider(name=None):
+    """Return the named provider, or the one selected by config.LLM_PROVIDER."""
+    name = name or getattr(config, 'LLM_PROVIDER', 'openai')
+    with _providers_lock:
+        if name not in _providers:
+            _providers[name] = _build_provider(name)
+        return _providers[name]
+
+
+def get_all_stats():
+    """Return stats for every provider created so far."""
+    with _providers_lock:
+        providers = list(_providers.values())
+    return [provider.stats() for provider in providers]
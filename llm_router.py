@@ -0,0 +1,51 @@
+# LLM Router (llm_router.py)
+import config
+import llm_providers
+import llm_scheduler
+
+TASKS = ("generate", "interpret", "explain_crash", "status", "summarize")
+
+
+def get_route(task):
+    """Return the list of candidate settings for a task, falling back to the default task."""
+    routes = getattr(config, 'LLM_ROUTES', {})
+    default_task = getattr(config, 'DEFAULT_LLM_TASK', 'generate')
+    route = routes.get(task) or routes.get(default_task)
+    if not route:
+        # No routing configured: use the configured provider with its default model
+        return [{"provider": None}]
+    return route
+
+
+def estimate_request_tokens(messages, max_tokens=None):
+    """Estimate the tokens a request will consume against the tokens/minute budget."""
+    prompt_tokens = sum(len(message["content"]) // 4 + 4 for message in messages)
+    return prompt_tokens + (max_tokens or 512)
+
+
+def routed_chat(messages, task=None, priority=None):
+    """Send messages to the model configured for the task, trying fallbacks on error or timeout.
+
+    Calls are queued on the provider's rate-limit scheduler; interactive tasks
+    go ahead of batch work. Returns (reply, model) where model names the
+    candidate that answered.
+    """
+    queue_priority = llm_scheduler.priority_for_task(task, priority)
+    last_error = None
+    for candidate in get_route(task):
+        options = dict(candidate)
+        provider_name = options.pop("provider", None)
+        model = options.pop("model", None)
+        timeout = options.pop("timeout", None)
+        try:
+            provider = llm_providers.get_provider(provider_name)
+            scheduler = llm_scheduler.get_scheduler(provider.name)
+            reply = scheduler.run(
+                lambda: provider.chat(messages, model=model, timeout=timeout, **options),
+                estimate_request_tokens(messages, options.get("max_tokens")),
+                queue_priority)
+            return reply, model or provider.default_model
+        except Exception as e:
+            print(f"LLM call for task {task} failed on {provider_name}/{model}: {e}")
+            last_error = e
+    raise last_error
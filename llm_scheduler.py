@@ -0,0 +1,171 @@
+# LLM Request Scheduler (llm_scheduler.py)
+import heapq
+import itertools
+import random
+import re
+import threading
+import time
+
+import config
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+# Tasks that come from a person waiting in the chat UI; everything else is batch work
+INTERACTIVE_TASKS = ("generate", "interpret")
+
+# Retries for rate-limited (HTTP 429) calls before the error is raised
+MAX_RETRIES = 6
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+DEFAULT_LIMITS = {"requests_per_minute": 500, "tokens_per_minute": 30000}
+
+
+def parse_duration(value):
+    """Parse OpenAI-style reset durations such as '1s', '6m0s', '20ms' or '0.5' into seconds."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    total = 0.0
+    matched = False
+    for amount, unit in re.findall(r'([\d.]+)(ms|h|m|s)', value):
+        matched = True
+        total += float(amount) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+    return total if matched else None
+
+
+def rate_limit_info(error):
+    """Return (is_rate_limited, suggested_delay_seconds) for an exception from a provider."""
+    status = getattr(error, 'http_status', None)
+    headers = getattr(error, 'headers', None)
+    response = getattr(error, 'response', None)
+    if response is not None and status is None:
+        # requests.HTTPError from the local provider
+        status = getattr(response, 'status_code', None)
+        headers = getattr(response, 'headers', None)
+    if status is None and type(error).__name__ == 'RateLimitError':
+        status = 429
+    if status != 429:
+        return False, None
+
+    headers = headers or {}
+    hints = [parse_duration(headers.get(name)) for name in
+             ('retry-after', 'x-ratelimit-reset-requests', 'x-ratelimit-reset-tokens')]
+    hints = [hint for hint in hints if hint is not None]
+    return True, max(hints) if hints else None
+
+
+class RateLimitScheduler:
+    """Client-side requests/minute and tokens/minute budget for one provider.
+
+    Callers wait in a priority queue; the head is released as soon as both
+    token buckets can pay for it, so throughput sits at the quota ceiling.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self.retries = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._requests = min(self.requests_per_minute,
+                             self._requests + elapsed * self.requests_per_minute / 60)
+        self._tokens = min(self.tokens_per_minute,
+                           self._tokens + elapsed * self.tokens_per_minute / 60)
+        return now
+
+    def _acquire(self, ticket, tokens):
+        """Block until the ticket is at the head of the queue and the budget covers it."""
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            while True:
+                now = self._refill()
+                wait = None
+                if self._waiting[0] == ticket:
+                    if now < self._blocked_until:
+                        wait = self._blocked_until - now
+                    elif self._requests < 1:
+                        wait = (1 - self._requests) * 60 / self.requests_per_minute
+                    elif self._tokens < tokens:
+                        wait = (tokens - self._tokens) * 60 / self.tokens_per_minute
+                    else:
+                        heapq.heappop(self._waiting)
+                        self._requests -= 1
+                        self._tokens -= tokens
+                        self._cond.notify_all()
+                        return
+                self._cond.wait(wait)
+
+    def _pause(self, delay):
+        """Hold every queued request after a 429 until the provider's window resets."""
+        with self._cond:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+            self.retries += 1
+            self._cond.notify_all()
+
+    def run(self, call, tokens, priority=PRIORITY_BATCH):
+        """Run call() within the budget, retrying rate-limited attempts with jittered backoff."""
+        tokens = min(tokens, self.tokens_per_minute)
+        ticket = (priority, next(self._sequence))
+        for attempt in range(MAX_RETRIES + 1):
+            self._acquire(ticket, tokens)
+            try:
+                return call()
+            except Exception as e:
+                limited, hint = rate_limit_info(e)
+                if not limited or attempt == MAX_RETRIES:
+                    raise
+                backoff = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+                self._pause((hint or 0) + random.uniform(0, backoff))
+
+    def stats(self):
+        with self._cond:
+            self._refill()
+            return {"queued": len(self._waiting), "retries": self.retries,
+                    "requests_available": round(self._requests, 1),
+                    "tokens_available": int(self._tokens)}
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(provider_name):
+    """Return the scheduler for a provider, using the budgets in config.LLM_RATE_LIMITS."""
+    with _schedulers_lock:
+        if provider_name not in _schedulers:
+            limits = dict(DEFAULT_LIMITS)
+            limits.update(getattr(config, 'LLM_RATE_LIMITS', {}).get(provider_name, {}))
+            _schedulers[provider_name] = RateLimitScheduler(
+                limits["requests_per_minute"], limits["tokens_per_minute"])
+        return _schedulers[provider_name]
+
+
+def priority_for_task(task, priority=None):
+    """Map an explicit 'interactive'/'batch' hint, or else the task, to a queue priority."""
+    if priority == "interactive":
+        return PRIORITY_INTERACTIVE
+    if priority == "batch":
+        return PRIORITY_BATCH
+    return PRIORITY_INTERACTIVE if task in INTERACTIVE_TASKS else PRIORITY_BATCH
+
+
+def get_all_stats():
+    with _schedulers_lock:
+        schedulers = dict(_schedulers)
+    return {name: scheduler.stats() for name, scheduler in schedulers.items()}
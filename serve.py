@@ -0,0 +1,175 @@
+# Production Server (serve.py)
+"""Serve the FLARE web UI or the chat server with multiple workers.
+
+    python serve.py web  --port 5000 --threads 16
+    python serve.py chat --port 5001 --workers 1 --threads 16
+
+Uses gunicorn (gthread workers) when it is installed, otherwise a threaded
+Werkzeug server. On SIGTERM/SIGINT new connections are refused and the
+server waits up to --grace seconds for in-flight requests and report jobs,
+so running executions are not cut off.
+"""
+import argparse
+import os
+import signal
+import sys
+import threading
+import time
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+WWW_DIR = os.path.join(ROOT_DIR, 'www')
+
+# Chat sessions live in the memory of the process answering chats (the web UI
+# in-process, or the chat server in remote mode), so both default to one process
+DEFAULTS = {
+    "web": {"port": 5000, "workers": 1, "threads": 16},
+    "chat": {"port": 5001, "workers": 1, "threads": 16},
+}
+
+# Matches the sandbox wall-clock limit so a running block can finish
+DEFAULT_GRACE = 60 * 60
+
+
+class InFlightTracker:
+    """WSGI middleware counting requests that have not finished sending their response."""
+
+    def __init__(self, app):
+        self.app = app
+        self.active = 0
+        self._lock = threading.Lock()
+
+    def _done(self):
+        with self._lock:
+            self.active -= 1
+
+    def __call__(self, environ, start_response):
+        with self._lock:
+            self.active += 1
+        try:
+            response = self.app(environ, start_response)
+        except Exception:
+            self._done()
+            raise
+        return _ClosingIterator(response, self._done)
+
+
+class _ClosingIterator:
+    def __init__(self, response, on_close):
+        self._response = response
+        self._on_close = on_close
+
+    def __iter__(self):
+        return iter(self._response)
+
+    def close(self):
+        try:
+            if hasattr(self._response, 'close'):
+                self._response.close()
+        finally:
+            self._on_close()
+
+
+def load_app(name):
+    """Import the Flask app to serve, plus a hook to run once per worker process."""
+    if name == "web":
+        # The web server resolves its templates and playbook relative to www/
+        os.chdir(WWW_DIR)
+        sys.path.insert(0, WWW_DIR)
+        import web_server
+        import jobs
+        return web_server.app, lambda: jobs.start_workers(web_server.JOBS_DB_PATH), jobs.active_job_count
+    sys.path.insert(0, ROOT_DIR)
+    import chat_server
+    return chat_server.app, lambda: None, lambda: 0
+
+
+def wait_for_jobs(active_jobs, grace):
+    """Block until background report jobs in this process finish or the grace period ends."""
+    deadline = time.time() + grace
+    while active_jobs() and time.time() < deadline:
+        time.sleep(0.5)
+
+
+def serve_gunicorn(app, on_start, active_jobs, args):
+    from gunicorn.app.base import BaseApplication
+
+    class FlareApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f'{args.host}:{args.port}')
+            self.cfg.set('workers', args.workers)
+            self.cfg.set('threads', args.threads)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('graceful_timeout', args.grace)
+            # gthread workers heartbeat from their main thread, so long requests are fine
+            self.cfg.set('timeout', 120)
+            self.cfg.set('post_worker_init', lambda worker: on_start())
+            self.cfg.set('worker_exit', lambda server, worker: wait_for_jobs(active_jobs, args.grace))
+
+        def load(self):
+            return app
+
+    FlareApplication().run()
+
+
+def serve_werkzeug(app, on_start, active_jobs, args):
+    from werkzeug.serving import make_server
+
+    if args.workers > 1:
+        print("gunicorn is not installed; serving from one process with a thread "
+              f"per request instead of {args.workers} workers.")
+    tracker = InFlightTracker(app)
+    server = make_server(args.host, args.port, tracker, threaded=True)
+    on_start()
+
+    stopping = threading.Event()
+
+    def shutdown(signum, frame):
+        if not stopping.is_set():
+            stopping.set()
+            print("Shutting down: refusing new connections, waiting for in-flight work...")
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    print(f"Serving {args.app} on http://{args.host}:{args.port}")
+    server.serve_forever()
+
+    deadline = time.time() + args.grace
+    while tracker.active and time.time() < deadline:
+        time.sleep(0.5)
+    wait_for_jobs(active_jobs, max(0, deadline - time.time()))
+    if tracker.active or active_jobs():
+        print(f"Grace period over with {tracker.active} requests and {active_jobs()} jobs still running.")
+    server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run FLARE with a production server.")
+    parser.add_argument('app', choices=sorted(DEFAULTS), help="web UI or chat server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int)
+    parser.add_argument('--workers', type=int, help="worker processes (gunicorn only; the web UI needs 1)")
+    parser.add_argument('--threads', type=int, help="threads per worker")
+    parser.add_argument('--grace', type=int, default=DEFAULT_GRACE,
+                        help="seconds to wait for in-flight work on shutdown")
+    args = parser.parse_args()
+    for key, value in DEFAULTS[args.app].items():
+        if getattr(args, key) is None:
+            setattr(args, key, int(os.environ.get(f'FLARE_{args.app.upper()}_{key.upper()}', value)))
+    if args.app == "web" and args.workers > 1:
+        # Chat sessions, the repo prefetch cache and the minimization queue live in
+        # the process memory, so a second web worker would see none of them
+        parser.error("the web UI must run as a single process; use --threads to serve more requests")
+
+    app, on_start, active_jobs = load_app(args.app)
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        serve_werkzeug(app, on_start, active_jobs, args)
+    else:
+        serve_gunicorn(app, on_start, active_jobs, args)
+
+
+if __name__ == '__main__':
+    main()
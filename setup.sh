@@ -108,18 +108,36 @@ git clone ${REPO_URL} ${CLONE_DIR}
 # Change to the repository directory
 cd ${CLONE_DIR}
 
-# Build Crashwalk
+# Build Crashwalk; FLARE runs its cwtriage tool (www/triage.py looks for bin/cwtriage)
 echo "Building Crashwalk..."
 make
+mkdir -p bin
+go build -o bin/cwtriage ./cmd/cwtriage
 
 # Verify build
-if [ -f "bin/crashwalk" ]; then
-    echo "Crashwalk built successfully! The executable is located at ${CLONE_DIR}/bin/crashwalk"
+if [ -f "bin/cwtriage" ]; then
+    echo "Crashwalk built successfully! cwtriage is located at ${CLONE_DIR}/bin/cwtriage"
 else
     echo "Crashwalk build failed. Check the output above for errors."
     exit 1
 fi
 
+# Install gdb and the 'exploitable' plugin, the triage engine used without crashwalk
+EXPLOITABLE_URL="https://github.com/jfoote/exploitable.git"
+EXPLOITABLE_DIR="$HOME/exploitable"
+sudo apt install -y gdb
+if [ -d "${EXPLOITABLE_DIR}" ]; then
+    echo "Directory ${EXPLOITABLE_DIR} already exists. Skipping clone..."
+else
+    git clone ${EXPLOITABLE_URL} ${EXPLOITABLE_DIR}
+fi
+if [ -f "${EXPLOITABLE_DIR}/exploitable/exploitable.py" ]; then
+    echo "exploitable installed at ${EXPLOITABLE_DIR}/exploitable/exploitable.py"
+else
+    echo "exploitable install failed. Check the output above for errors."
+    exit 1
+fi
+
 
 
 \
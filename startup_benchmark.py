@@ -0,0 +1,120 @@
+# Startup Benchmark (startup_benchmark.py)
+"""Measure how long the FLARE servers take to import, and fail over budget.
+
+    python startup_benchmark.py web --runs 5 --budget 1.0
+    python startup_benchmark.py chat --profile
+
+Each run imports the app in a fresh interpreter. The median import time must
+stay within --budget seconds, and the heavy subsystems in LAZY_MODULES must not
+be imported at startup (they load on first use). --profile prints the slowest
+imports from `python -X importtime`.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+WWW_DIR = os.path.join(ROOT_DIR, 'www')
+
+# Module imported and directory imported from, per app
+APPS = {
+    "web": ("web_server", WWW_DIR),
+    "chat": ("chat_server", ROOT_DIR),
+}
+
+# Only loaded by accessor functions when first needed
+LAZY_MODULES = ("git", "openai", "yaml", "requests")
+
+DEFAULT_BUDGET = 1.0
+
+PROBE = (
+    "import json, sys, time\n"
+    "start = time.perf_counter()\n"
+    "import {module}\n"
+    "elapsed = time.perf_counter() - start\n"
+    "print(json.dumps([elapsed, [m for m in {lazy!r} if m in sys.modules]]))\n"
+)
+
+
+def _env(directory):
+    env = dict(os.environ)
+    # The probe runs from the app's directory, so keep inherited entries absolute
+    inherited = [os.path.abspath(p) for p in env.get("PYTHONPATH", "").split(os.pathsep) if p]
+    env["PYTHONPATH"] = os.pathsep.join([directory] + inherited)
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return env
+
+
+def measure(app):
+    """Import the app once in a fresh interpreter; return (seconds, eagerly loaded lazy modules)."""
+    module, directory = APPS[app]
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, lazy=LAZY_MODULES)],
+        cwd=directory, env=_env(directory), capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{result.stderr}")
+    elapsed, loaded = json.loads(result.stdout.strip().splitlines()[-1])
+    return elapsed, loaded
+
+
+def profile(app, top):
+    """Return the slowest imports by cumulative time (microseconds) from -X importtime."""
+    module, directory = APPS[app]
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=directory, env=_env(directory), capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_part, cumulative_us, name = line.split("|", 2)
+        self_us = self_part.split(":", 1)[1]
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FLARE server startup.")
+    parser.add_argument('app', choices=sorted(APPS), nargs='?', default='web')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget', type=float,
+                        default=float(os.environ.get('FLARE_STARTUP_BUDGET', DEFAULT_BUDGET)),
+                        help="maximum median import time in seconds")
+    parser.add_argument('--profile', action='store_true', help="print the slowest imports")
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    timings = []
+    eager = set()
+    for _ in range(args.runs):
+        try:
+            elapsed, loaded = measure(args.app)
+        except RuntimeError as e:
+            print(f"FAIL: {e}")
+            return 1
+        timings.append(elapsed)
+        eager.update(loaded)
+    median = statistics.median(timings)
+    print(f"{args.app}: median import {median:.3f}s, min {min(timings):.3f}s, "
+          f"max {max(timings):.3f}s over {args.runs} runs (budget {args.budget:.3f}s)")
+
+    if args.profile:
+        print(f"{'cumulative':>12} {'self':>10}  module")
+        for cumulative_us, self_us, name in profile(args.app, args.top):
+            print(f"{cumulative_us / 1000:10.1f}ms {self_us / 1000:8.1f}ms {name}")
+
+    failures = []
+    if median > args.budget:
+        failures.append(f"median startup {median:.3f}s exceeds the {args.budget:.3f}s budget")
+    if eager:
+        failures.append(f"imported at startup instead of on first use: {', '.join(sorted(eager))}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The web UI modules import each other as top-level modules from www/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'www'))
@@ -0,0 +1,40 @@
+import json
+
+import action_plan
+
+
+def plan_errors(step_type, command):
+    reply = json.dumps({"message": "m", "steps": [{"type": step_type, "description": "d", "command": command}]})
+    return action_plan.parse_plan(reply)[1]
+
+
+def test_backgrounded_fuzzer_is_accepted():
+    assert plan_errors("fuzz", "afl-fuzz -i in -o out -- ./t @@ > /dev/null 2>&1 &") == []
+
+
+def test_continued_fuzz_command_is_accepted():
+    command = "cd proj && \\\n  afl-fuzz -i in -o out \\\n    -- ./t @@ &"
+    assert plan_errors("fuzz", command) == []
+
+
+def test_foreground_fuzzer_is_rejected():
+    errors = plan_errors("fuzz", "afl-fuzz -i in -o out -- ./t @@")
+    assert errors == ["step 1 must start afl-fuzz in the background (end the line with &)"]
+
+
+def test_fuzzer_chained_with_and_is_rejected():
+    assert plan_errors("fuzz", "afl-fuzz -i in -o out -- ./t @@ && echo done")
+
+
+def test_every_launch_must_be_backgrounded():
+    command = "afl-fuzz -M main -i in -o out -- ./t @@ &\nafl-fuzz -S s1 -i in -o out -- ./t @@"
+    assert plan_errors("fuzz", command)
+
+
+def test_fuzz_step_without_afl_fuzz_is_rejected():
+    assert plan_errors("fuzz", "echo 'afl-fuzz later' &") == ["step 1 is a fuzz step but does not run afl-fuzz"]
+
+
+def test_build_step_may_not_start_the_fuzzer():
+    errors = plan_errors("build", "make && afl-fuzz -i in -o out -- ./t @@ &")
+    assert errors == ["step 1 starts afl-fuzz but is a build step; only fuzz steps may"]
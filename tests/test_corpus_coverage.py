@@ -0,0 +1,36 @@
+import pytest
+
+import corpus_coverage
+
+
+def rewrite(build_command):
+    command = corpus_coverage._coverage_build_command(build_command, '/ws', '/cov/build', '/cov/bin')
+    return command.split('\n', 1)[1]
+
+
+def test_chained_clone_keeps_the_rest_of_the_line():
+    assert rewrite('cd /ws && git clone https://example.com/repo.git && cd repo && make') == \
+        'cd /cov/build && true && cd repo && make'
+
+
+def test_clone_on_its_own_line_is_dropped():
+    assert rewrite('git clone --depth 1 https://example.com/repo.git /ws/repo\nmake -C /ws/repo') == \
+        'true\nmake -C /cov/build/repo'
+
+
+def test_quoted_git_clone_text_is_not_a_clone():
+    assert rewrite('echo "git clone; later" && make') == 'echo "git clone; later" && make'
+
+
+def test_redirections_are_not_split():
+    assert rewrite('git clone u r 2>&1 | tee /ws/log && make') == 'true | tee /cov/build/log && make'
+
+
+def test_workspace_prefix_only_matches_whole_paths():
+    assert rewrite('cp /ws/a /wsx/b') == 'cp /cov/build/a /wsx/b'
+
+
+def test_libfuzzer_harness_is_refused(tmp_path):
+    campaign = {"binary_path": "/ws/h/fuzz", "build_command": "afl-clang-fast -fsanitize=fuzzer,address h.c -o fuzz"}
+    with pytest.raises(RuntimeError, match="libFuzzer"):
+        corpus_coverage.build_coverage_binary(campaign, '/ws', str(tmp_path))
@@ -0,0 +1,32 @@
+import subprocess
+
+import pipeline
+
+
+def run_steps(monkeypatch, steps, running):
+    monkeypatch.setattr(pipeline.sandbox, 'run_sandboxed',
+                        lambda command, cwd, limits=None: subprocess.CompletedProcess(command, 0, "", ""))
+    monkeypatch.setattr(pipeline.build_repair, 'record_run', lambda db_path, target, outcome: None)
+    monkeypatch.setattr(pipeline, 'record_launch', lambda command, repo_url=None, build_commands=(): ['t'])
+    monkeypatch.setattr(pipeline.targets, 'get_campaign', lambda db_path, name: {"name": name, "running": running})
+    return pipeline.execute_blocks(steps, 't', max_attempts=1)
+
+
+def test_fuzz_step_whose_fuzzer_exited_fails(monkeypatch):
+    outcomes = run_steps(monkeypatch, [{"type": "fuzz", "command": "afl-fuzz -i in -o out -- ./t @@ &"}], False)
+    assert not outcomes[0]["success"]
+    assert "afl-fuzz is not running" in outcomes[0]["result"].stderr
+
+
+def test_fuzz_step_with_running_fuzzer_succeeds(monkeypatch):
+    outcomes = run_steps(monkeypatch, [{"type": "fuzz", "command": "afl-fuzz -i in -o out -- ./t @@ &"}], True)
+    assert outcomes[0]["success"]
+    assert outcomes[0]["campaigns"] == ['t']
+
+
+def test_skipped_steps_keep_outcomes_aligned(monkeypatch):
+    steps = [{"type": "clone", "command": "git clone u r", "skip": "r is already at abc"},
+             {"type": "build", "command": "make"}]
+    outcomes = run_steps(monkeypatch, steps, True)
+    assert [outcome["command"] for outcome in outcomes] == ["git clone u r", "make"]
+    assert outcomes[0]["skipped"] and all(outcome["success"] for outcome in outcomes)
@@ -0,0 +1,40 @@
+import targets
+
+
+def test_flags_do_not_swallow_the_next_argument():
+    launch = targets.parse_afl_command(
+        ['afl-fuzz', '-A', '-i', 'in', '-o', 'out', '-Z', '-t', '1000', '--', './target', '@@'], '/ws')
+    assert launch["binary_path"] == '/ws/target'
+    assert launch["target_args"] == ['@@']
+    assert launch["input_dir"] == '/ws/in'
+    assert launch["output_dir"] == '/ws/out'
+    assert launch["input_mode"] == 'file'
+
+
+def test_target_without_double_dash_after_a_flag():
+    launch = targets.parse_afl_command(['afl-fuzz', '-i', 'in', '-o', 'out', '-Z', './target'], '/ws')
+    assert launch["binary_path"] == '/ws/target'
+    assert launch["input_mode"] == 'stdin'
+
+
+def test_value_options_accept_attached_values():
+    launch = targets.parse_afl_command(['afl-fuzz', '-iin', '-oout', '-m', 'none', '--', '/bin/t', '-f', 'x'], '/ws')
+    assert launch["output_dir"] == '/ws/out'
+    assert launch["target_args"] == ['-f', 'x']
+
+
+def test_find_launches_follows_cd_and_continuations():
+    launches = targets.find_launches(
+        'cd proj && \\\n  AFL_SKIP_CPUFREQ=1 afl-fuzz -A -i in -o out -- ./fuzz @@ > /dev/null 2>&1 &', '/ws')
+    assert [launch["output_dir"] for launch in launches] == ['/ws/proj/out']
+
+
+def test_wait_for_fuzzers_stops_at_the_timeout(monkeypatch):
+    monkeypatch.setattr(targets, 'running_fuzzers', lambda: {})
+    assert targets.wait_for_fuzzers(['/ws/out'], timeout=0) == {}
+
+
+def test_wait_for_fuzzers_returns_once_every_campaign_runs(monkeypatch):
+    views = iter([{}, {'/ws/out': {"pids": [42]}}])
+    monkeypatch.setattr(targets, 'running_fuzzers', lambda: next(views))
+    assert targets.wait_for_fuzzers(['/ws/out'], timeout=5) == {'/ws/out': {"pids": [42]}}
@@ -0,0 +1,86 @@
+import subprocess
+
+import triage
+
+CRASHWALK_OUTPUT = """\
+---CRASH SUMMARY---
+Filename: /ws/t/out/default/crashes/id:000000,sig:11
+SHA1: 0123456789abcdef0123456789abcdef01234567
+Classification: EXPLOITABLE
+Hash: 4d3a4f0a8bd2a24e6a7b1c51e1e9b9b1.98a5e1bcb7a6e6c1f0f5d2f0c0d4a1b2
+Command: /ws/t/target /ws/t/out/default/crashes/id:000000,sig:11
+Faulting Frame:
+   parse_header @ 0x0000555555555189: in /ws/t/target
+Extra Data:
+   Description: Access violation on destination operand
+   Short description: DestAv (8/22)
+---END SUMMARY---
+---CRASH SUMMARY---
+Filename: /ws/t/out/default/crashes/id:000001,sig:06
+Classification: UNKNOWN
+Hash: 11111111111111111111111111111111.22222222222222222222222222222222
+---END SUMMARY---
+"""
+
+EXPLOITABLE_OUTPUT = """\
+Program received signal SIGSEGV, Segmentation fault.
+Description: Access violation near NULL on source operand
+Short description: SourceAvNearNull (16/22)
+Hash: 8dcbdee3a5b7ee0ec1d56e0e3b26b2e4.a2e0e13d1de4f7fdf6a6f7f0cc0e6e4f
+Exploitability Classification: PROBABLY_NOT_EXPLOITABLE
+"""
+
+CAMPAIGN = {"binary_path": "/ws/t/target", "target_args": ["@@"], "input_mode": "file", "output_dir": "/ws/t/out"}
+
+
+def test_parse_crashwalk_output_keys_summaries_by_file():
+    summaries = triage.parse_crashwalk_output(CRASHWALK_OUTPUT)
+    assert sorted(summaries) == ['/ws/t/out/default/crashes/id:000000,sig:11',
+                                 '/ws/t/out/default/crashes/id:000001,sig:06']
+    record = triage.parse_exploitable_output(summaries['/ws/t/out/default/crashes/id:000000,sig:11'])
+    assert record == {"major_hash": "4d3a4f0a8bd2a24e6a7b1c51e1e9b9b1",
+                      "minor_hash": "98a5e1bcb7a6e6c1f0f5d2f0c0d4a1b2",
+                      "classification": "EXPLOITABLE",
+                      "short_description": "DestAv (8/22)"}
+
+
+def test_parse_exploitable_output_from_gdb():
+    record = triage.parse_exploitable_output(EXPLOITABLE_OUTPUT)
+    assert record["major_hash"] == "8dcbdee3a5b7ee0ec1d56e0e3b26b2e4"
+    assert record["classification"] == "PROBABLY_NOT_EXPLOITABLE"
+    assert record["short_description"] == "SourceAvNearNull (16/22)"
+
+
+def test_parse_exploitable_output_without_a_result():
+    assert triage.parse_exploitable_output("") == {
+        "major_hash": None, "minor_hash": None, "classification": None, "short_description": None}
+
+
+def test_run_crashwalk_points_cwtriage_at_exploitable(monkeypatch):
+    calls = []
+
+    def fake_run(command, **kwargs):
+        calls.append((command, kwargs))
+        return subprocess.CompletedProcess(command, 0, CRASHWALK_OUTPUT, "")
+    monkeypatch.setattr(subprocess, 'run', fake_run)
+
+    summaries = triage.run_crashwalk(CAMPAIGN, '/ws/t/out/default/crashes', 2)
+    command, kwargs = calls[0]
+    assert kwargs["env"]["CW_EXPLOITABLE"] == triage.EXPLOITABLE_SCRIPT
+    assert command[command.index('--') + 1:] == ['/ws/t/target', '@@']
+    assert len(summaries) == 2
+
+
+def test_empty_crashwalk_run_falls_back_to_gdb(monkeypatch, tmp_path):
+    crash = tmp_path / 'crashes' / 'id:000000'
+    crash.parent.mkdir()
+    crash.write_bytes(b'boom')
+    monkeypatch.setattr(triage, 'run_crashwalk', lambda campaign, crashes_dir, workers: {})
+    monkeypatch.setattr(triage, 'run_gdb_exploitable', lambda campaign, path: EXPLOITABLE_OUTPUT)
+
+    db_path = str(tmp_path / 'triage.db')
+    triage.triage_crashes(db_path, 't', [str(crash)], CAMPAIGN, engine='crashwalk', workers=1)
+    results = triage.get_triage_results(db_path, 't')
+    assert len(results) == 1
+    assert results[0]["engine"] == 'gdb'
+    assert results[0]["classification"] == 'PROBABLY_NOT_EXPLOITABLE'
@@ -0,0 +1,112 @@
+import json
+import os
+
+import targets
+
+# Step types the execution engine understands, in the order a campaign usually needs them
+STEP_TYPES = ("clone", "build", "seed", "fuzz", "status")
+
+MAX_STEPS = 20
+MAX_COMMAND_CHARS = 20000
+
+PLAN_INSTRUCTIONS = (
+    "\n\nReply format: instead of markdown code blocks, reply with only a JSON object of the form "
+    "{\"message\": \"<what you are doing and why, for the user>\", \"steps\": [{\"type\": \"clone\", "
+    "\"description\": \"<one line>\", \"command\": \"<bash commands>\"}]}. "
+    "Each step type is one of clone, build, seed, fuzz or status. Every bash markdown the guidelines "
+    "ask for becomes one step, in execution order. A clone step uses git clone. A fuzz step starts "
+    "afl-fuzz in the background (ending with &) and is the only step that starts afl-fuzz. Use an "
+    "empty steps list when nothing needs to run."
+)
+
+PLAN_FIX_PROMPT = (
+    "Your previous reply could not be used as an action plan:\n{errors}\n\n"
+    "Previous reply:\n{reply}\n\n"
+    "Reply with only the corrected JSON object: {{\"message\": ..., \"steps\": [{{\"type\": ..., "
+    "\"description\": ..., \"command\": ...}}]}} with step types clone, build, seed, fuzz or status."
+)
+
+
+def extract_json_object(text):
+    """Return the outermost JSON object in a reply (fenced or not), or None."""
+    start = text.find('{')
+    end = text.rfind('}')
+    if start == -1 or end <= start:
+        return None
+    try:
+        value = json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def _launches_fuzzer(command):
+    return bool(targets.find_launches(command, '/'))
+
+
+def validate_plan(plan):
+    """Return a list of problems with a parsed plan; empty when it can be executed."""
+    errors = []
+    steps = plan.get("steps")
+    if not isinstance(plan.get("message", ""), str):
+        errors.append("\"message\" must be a string")
+    if not isinstance(steps, list):
+        return errors + ["\"steps\" must be a list"]
+    if len(steps) > MAX_STEPS:
+        errors.append(f"at most {MAX_STEPS} steps are allowed, got {len(steps)}")
+
+    for number, step in enumerate(steps, start=1):
+        where = f"step {number}"
+        if not isinstance(step, dict):
+            errors.append(f"{where} must be an object")
+            continue
+        step_type = step.get("type")
+        command = step.get("command")
+        if step_type not in STEP_TYPES:
+            errors.append(f"{where} has type {step_type!r}; expected one of {', '.join(STEP_TYPES)}")
+        if not isinstance(command, str) or not command.strip():
+            errors.append(f"{where} needs a non-empty \"command\" string")
+            continue
+        if len(command) > MAX_COMMAND_CHARS:
+            errors.append(f"{where} command is longer than {MAX_COMMAND_CHARS} characters")
+        if step_type == "clone" and 'git clone' not in command:
+            errors.append(f"{where} is a clone step but does not run git clone")
+        if step_type == "fuzz":
+            # Whole commands, so a backslash-continued launch is judged by its last line
+            launches = [separator for argv, separator in targets.commands_with_separators(command)
+                        if any(os.path.basename(arg) == 'afl-fuzz' for arg in argv)]
+            if not launches:
+                errors.append(f"{where} is a fuzz step but does not run afl-fuzz")
+            elif any(separator != '&' for separator in launches):
+                errors.append(f"{where} must start afl-fuzz in the background (end the line with &)")
+        elif step_type in STEP_TYPES and _launches_fuzzer(command):
+            errors.append(f"{where} starts afl-fuzz but is a {step_type} step; only fuzz steps may")
+    return errors
+
+
+def parse_plan(text, strict=True):
+    """Parse and validate an LLM reply as an action plan.
+
+    Returns (plan, errors). A plan is {"message": str, "steps": [{"type",
+    "description", "command"}]}. When strict is False a reply that is not JSON
+    at all is taken as a plain message with no steps, for ordinary chat turns.
+    """
+    plan = extract_json_object(text)
+    if plan is None:
+        if not strict:
+            return {"message": text.strip(), "steps": []}, []
+        return None, ["the reply is not a JSON object"]
+
+    errors = validate_plan(plan)
+    if errors:
+        return None, errors
+    steps = [{
+        "type": step["type"],
+        "description": str(step.get("description", "")),
+        "command": step["command"].strip(),
+    } for step in plan["steps"]]
+    return {"message": plan.get("message", ""), "steps": steps}, []
+
+
+def fix_prompt(reply, errors):
+    return PLAN_FIX_PROMPT.format(errors="\n".join(f"- {error}" for error in errors), reply=reply)
@@ -0,0 +1,161 @@
+import re
+import sqlite3
+import time
+
+import action_plan
+
+# Attempts per block, counting the original run
+MAX_REPAIR_ATTEMPTS = 3
+
+# Lines of context kept around each error line, and the cap on lines sent to the LLM
+ERROR_CONTEXT_LINES = 2
+MAX_ERROR_LINES = 40
+
+# Compiler, linker, make/cmake and shell failures worth showing the LLM
+ERROR_PATTERN = re.compile(
+    r'error[:\s]|fatal error|undefined reference|multiple definition|ld: |collect2|'
+    r'make(\[\d+\])?: \*\*\*|CMake Error|configure: error|No such file or directory|'
+    r'command not found|cannot find|not found|Permission denied|Traceback',
+    re.IGNORECASE)
+
+REPAIR_PROMPT = (
+    "This {step_type} step, run from the FLARE workspace, failed with exit code {returncode}.\n"
+    "Command:\n{command}\n\n"
+    "Relevant error lines:\n{errors}\n\n"
+    "Reply with only a JSON object of the form {{\"message\": \"<what you changed>\", \"steps\": "
+    "[{{\"type\": \"{step_type}\", \"description\": \"<one line>\", \"command\": \"<bash commands>\"}}]}} "
+    "holding exactly one {step_type} step whose command is the corrected, complete replacement."
+)
+
+
+def extract_error_lines(output, context=ERROR_CONTEXT_LINES, max_lines=MAX_ERROR_LINES):
+    """Keep only the compiler/linker error lines (with a little context) from a failed run."""
+    lines = output.splitlines()
+    keep = set()
+    for number, line in enumerate(lines):
+        if ERROR_PATTERN.search(line):
+            keep.update(range(max(0, number - context), min(len(lines), number + context + 1)))
+    if not keep:
+        # Nothing recognizable; the end of the output is the most useful part
+        return "\n".join(lines[-max_lines:])
+
+    selected = []
+    previous = None
+    for number in sorted(keep):
+        if previous is not None and number != previous + 1:
+            selected.append("...")
+        selected.append(lines[number])
+        previous = number
+    if len(selected) > max_lines:
+        selected = selected[:max_lines] + ["... [more errors omitted]"]
+    return "\n".join(selected)
+
+
+def parse_repair(text, step_type):
+    """Validate a repair reply as a one-step action plan of the failing step's type.
+
+    Returns (command, errors); command is None when the reply is unusable.
+    """
+    plan, errors = action_plan.parse_plan(text)
+    if errors:
+        return None, errors
+    if len(plan["steps"]) != 1:
+        return None, [f"expected exactly one step, got {len(plan['steps'])}"]
+    if plan["steps"][0]["type"] != step_type:
+        return None, [f"expected a {step_type} step, got {plan['steps'][0]['type']}"]
+    return plan["steps"][0]["command"], []
+
+
+def run_with_repair(command, run, ask_llm, max_attempts=MAX_REPAIR_ATTEMPTS, step_type="build"):
+    """Run a plan step's bash commands, asking the LLM for a fix and re-running until they succeed.
+
+    run(command) must return a CompletedProcess; ask_llm(prompt) returns the reply
+    text. Repairs are requested in the action plan JSON schema and must be one
+    valid step of the same step_type. Stops after max_attempts runs. Returns
+    the final command, result, number of attempts, elapsed seconds and the
+    per-attempt history.
+    """
+    start = time.time()
+    history = []
+    result = None
+    for attempt in range(1, max_attempts + 1):
+        result = run(command)
+        history.append({"attempt": attempt, "command": command, "returncode": result.returncode})
+        if result.returncode == 0 or attempt == max_attempts:
+            break
+
+        errors = extract_error_lines(result.stderr + "\n" + result.stdout)
+        history[-1]["errors"] = errors
+        try:
+            reply = ask_llm(REPAIR_PROMPT.format(
+                step_type=step_type, returncode=result.returncode, command=command, errors=errors))
+        except Exception as e:
+            print(f"Build repair request failed: {e}")
+            break
+        fixed, repair_errors = parse_repair(reply, step_type)
+        if repair_errors:
+            history[-1]["repair_errors"] = repair_errors
+        if not fixed or fixed == command:
+            break  # no usable correction; re-running the same block would fail again
+        command = fixed
+
+    return {
+        "command": command,
+        "result": result,
+        "success": result is not None and result.returncode == 0,
+        "attempts": len(history),
+        "elapsed": time.time() - start,
+        "history": history,
+    }
+
+
+def init_metrics_db(db_path):
+    """Create the build metrics table if it does not exist."""
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS build_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                target TEXT,
+                started_at REAL,
+                elapsed REAL,
+                attempts INTEGER,
+                success INTEGER,
+                reached_fuzzing INTEGER
+            )
+        """)
+
+
+def record_run(db_path, target, outcome):
+    """Store the attempts and time one block took, and whether it got a fuzzer running."""
+    init_metrics_db(db_path)
+    reached_fuzzing = outcome["success"] and 'afl-fuzz' in outcome["command"]
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "INSERT INTO build_runs (target, started_at, elapsed, attempts, success, reached_fuzzing) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (target, time.time() - outcome["elapsed"], outcome["elapsed"], outcome["attempts"],
+             int(outcome["success"]), int(reached_fuzzing)))
+
+
+def get_metrics_summary(db_path):
+    """Aggregate build attempts, success rate and time-to-fuzzing across all runs."""
+    init_metrics_db(db_path)
+    with sqlite3.connect(db_path) as conn:
+        total, successes, mean_attempts, mean_elapsed = conn.execute(
+            "SELECT COUNT(*), SUM(success), AVG(attempts), AVG(elapsed) FROM build_runs").fetchone()
+        repaired = conn.execute(
+            "SELECT COUNT(*) FROM build_runs WHERE success = 1 AND attempts > 1").fetchone()[0]
+        # Per target: time from its first block to the block that started afl-fuzz
+        to_fuzzing = conn.execute("""
+            SELECT target,
+                   MIN(CASE WHEN reached_fuzzing = 1 THEN started_at + elapsed END) - MIN(started_at)
+            FROM build_runs GROUP BY target HAVING MAX(reached_fuzzing) = 1
+        """).fetchall()
+    return {
+        "runs": total,
+        "successes": successes or 0,
+        "repaired_successes": repaired,
+        "mean_attempts": mean_attempts,
+        "mean_elapsed": mean_elapsed,
+        "time_to_fuzzing": {target: seconds for target, seconds in to_fuzzing},
+    }
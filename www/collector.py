@@ -0,0 +1,129 @@
+import os
+import threading
+
+from triage import file_sha1
+from minimize import is_minimized_file
+
+# (path, size, mtime) -> sha1, so repeated collections only hash new files
+_hash_cache = {}
+_hash_cache_lock = threading.Lock()
+
+# Partially written files (ours or a tool's) that are not inputs yet
+TEMP_SUFFIX = '.tmp'
+
+# AFL++ before 4.0 (and AFL) used these plot_data column names
+PLOT_COLUMN_ALIASES = {
+    'unix_time': 'relative_time',
+    'cur_path': 'cur_item',
+    'paths_total': 'corpus_count',
+    'unique_crashes': 'saved_crashes',
+    'unique_hangs': 'saved_hangs',
+}
+
+# Points per instance returned for charts; longer series are downsampled
+MAX_PLOT_POINTS = 500
+
+
+def discover_instances(out_dir):
+    """Return {instance_name: instance_dir} for every AFL instance under an output dir."""
+    instances = {}
+    if not os.path.isdir(out_dir):
+        return instances
+    for name in sorted(os.listdir(out_dir)):
+        instance_dir = os.path.join(out_dir, name)
+        # Covers "default" as well as any -M/-S names such as main, secondary1, ...
+        if os.path.isdir(instance_dir) and (
+                os.path.isfile(os.path.join(instance_dir, 'fuzzer_stats'))
+                or os.path.isdir(os.path.join(instance_dir, 'crashes'))
+                or os.path.isdir(os.path.join(instance_dir, 'queue'))):
+            instances[name] = instance_dir
+    return instances
+
+
+def _cached_sha1(path):
+    """Hash a file, reusing the previous digest if it has not changed."""
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime)
+    with _hash_cache_lock:
+        if key in _hash_cache:
+            return _hash_cache[key]
+    digest = file_sha1(path)
+    with _hash_cache_lock:
+        _hash_cache[key] = digest
+    return digest
+
+
+def collect_inputs(out_dir, kind='crashes'):
+    """Merge the crashes (or hangs/queue) of all instances, deduplicated by content hash.
+
+    Returns one dict per unique input: the path used for triage, the instance it
+    came from, its SHA1 and the paths of identical copies in other instances.
+    """
+    unique = {}
+    for instance, instance_dir in discover_instances(out_dir).items():
+        inputs_dir = os.path.join(instance_dir, kind)
+        if not os.path.isdir(inputs_dir):
+            continue
+        for name in sorted(os.listdir(inputs_dir)):
+            path = os.path.join(inputs_dir, name)
+            if (not name.startswith('id') or is_minimized_file(name) or name.endswith(TEMP_SUFFIX)
+                    or not os.path.isfile(path)):
+                continue
+            try:
+                sha1 = _cached_sha1(path)
+            except OSError:
+                continue
+            if sha1 in unique:
+                unique[sha1]["duplicates"].append(path)
+            else:
+                unique[sha1] = {"path": path, "name": name, "instance": instance,
+                                "sha1": sha1, "duplicates": []}
+    return list(unique.values())
+
+
+def read_plot_data(plot_path, max_points=MAX_PLOT_POINTS):
+    """Parse one instance's plot_data into {"columns": [...], "points": [[...], ...]}.
+
+    Column names are normalized to current AFL++ ones, relative_time is in
+    seconds since the first row even for old unix_time files, and series
+    longer than max_points are downsampled (always keeping the last row).
+    """
+    columns = None
+    points = []
+    with open(plot_path, 'r', errors='replace') as plot_file:
+        for line in plot_file:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('#'):
+                names = [name.strip() for name in line.lstrip('#').split(',')]
+                columns = [PLOT_COLUMN_ALIASES.get(name, name) for name in names]
+                continue
+            try:
+                points.append([float(value.strip().rstrip('%')) for value in line.split(',')])
+            except ValueError:
+                continue  # a row AFL was still writing
+    if not columns or not points:
+        return {"columns": columns or [], "points": []}
+    if columns[0] == 'relative_time' and points[0][0] > 1e9:
+        # Old files log unix timestamps in the first column
+        start = points[0][0]
+        for point in points:
+            point[0] -= start
+    if len(points) > max_points:
+        step = len(points) / max_points
+        points = [points[int(i * step)] for i in range(max_points - 1)] + [points[-1]]
+    return {"columns": columns, "points": points}
+
+
+def collect_plot_data(out_dir, max_points=MAX_PLOT_POINTS):
+    """Return {instance_name: plot series} for every instance with a plot_data file."""
+    series = {}
+    for instance, instance_dir in discover_instances(out_dir).items():
+        plot_path = os.path.join(instance_dir, 'plot_data')
+        if os.path.isfile(plot_path):
+            try:
+                series[instance] = read_plot_data(plot_path, max_points)
+            except OSError:
+                continue
+    return series
@@ -0,0 +1,320 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import sqlite3
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import collector
+import replay
+import sandbox
+import targets
+
+# Compilers the generated build commands call; the coverage build swaps them for gcc --coverage
+AFL_C_COMPILERS = ('afl-cc', 'afl-clang-fast', 'afl-clang-lto', 'afl-clang', 'afl-gcc', 'afl-gcc-fast')
+AFL_CXX_COMPILERS = ('afl-c++', 'afl-clang-fast++', 'afl-clang-lto++', 'afl-clang++', 'afl-g++', 'afl-g++-fast')
+
+COVERAGE_CC = os.environ.get('FLARE_COVERAGE_CC', 'gcc')
+COVERAGE_CXX = os.environ.get('FLARE_COVERAGE_CXX', 'g++')
+GCOV_BIN = os.environ.get('FLARE_GCOV', 'gcov')
+
+COVERAGE_WORKERS = os.cpu_count() or 1
+
+# libFuzzer harnesses (-fsanitize=fuzzer, as /harnesses/launch builds them) need clang's fuzzer runtime
+LIBFUZZER_PATTERN = re.compile(r'-fsanitize=\S*\bfuzzer\b')
+
+# Build artifacts left by the fuzzing build that must not leak into a copied source tree
+STALE_BUILD_PATTERNS = ('*.o', '*.lo', '*.a', '*.so', '*.gcda', '*.gcno')
+
+
+def init_coverage_db(db_path):
+    """Create the coverage tables if they do not exist."""
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS coverage_reports (
+                target TEXT PRIMARY KEY,
+                build_id TEXT NOT NULL,
+                binary_path TEXT,
+                report TEXT,
+                generated_at REAL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS coverage_inputs (
+                target TEXT NOT NULL,
+                sha1 TEXT NOT NULL,
+                status TEXT,
+                replayed_at REAL,
+                PRIMARY KEY (target, sha1)
+            )
+        """)
+
+
+def build_id(campaign):
+    """Identify a coverage build; a new commit or build recipe starts coverage from scratch."""
+    digest = hashlib.sha1(f"{campaign.get('commit_sha')}\n{campaign.get('build_command')}".encode())
+    return digest.hexdigest()[:12]
+
+
+def coverage_dir(workspace, target_name):
+    return os.path.join(workspace, 'coverage', target_name.replace(os.sep, '_'))
+
+
+def _source_root(binary_path):
+    """The checkout the fuzzing binary was built in: its git toplevel, or its directory."""
+    binary_dir = os.path.dirname(binary_path)
+    result = subprocess.run(['git', '-C', binary_dir, 'rev-parse', '--show-toplevel'],
+                            capture_output=True, text=True, check=False)
+    return result.stdout.strip() if result.returncode == 0 else binary_dir
+
+
+def _copy_sources(source_root, destination, commit, output_dir):
+    """Copy a clean tree of the sources so the fuzzing build is left untouched."""
+    if commit and os.path.isdir(os.path.join(source_root, '.git')):
+        subprocess.run(['git', 'clone', '--quiet', '--no-checkout', source_root, destination], check=True)
+        subprocess.run(['git', '-C', destination, 'checkout', '--quiet', commit], check=True)
+        return
+
+    def ignore(directory, names):
+        ignored = set(shutil.ignore_patterns(*STALE_BUILD_PATTERNS)(directory, names))
+        # The campaign's queue can be huge and is not part of the build
+        return ignored | {name for name in names if os.path.join(directory, name) == output_dir}
+    shutil.copytree(source_root, destination, symlinks=True, ignore=ignore)
+
+
+def _write_compiler_wrappers(bin_dir):
+    """Put afl-* compiler names on PATH that compile with gcov instrumentation instead."""
+    os.makedirs(bin_dir, exist_ok=True)
+    for names, compiler in ((AFL_C_COMPILERS, COVERAGE_CC), (AFL_CXX_COMPILERS, COVERAGE_CXX)):
+        for name in names:
+            path = os.path.join(bin_dir, name)
+            with open(path, 'w') as f:
+                f.write(f'#!/bin/sh\nexec {compiler} "$@" --coverage\n')
+            os.chmod(path, 0o755)
+
+
+def _coverage_build_command(build_command, workspace, build_root, bin_dir):
+    """Rewrite the recorded build to run against the copied tree with coverage compilers."""
+    # The sources are already copied; only the clone commands go, not the rest of their lines
+    command = targets.remove_clones(build_command)
+    # Workspace paths, including a bare `cd /workspace`, point into the copy instead
+    workspace_path = re.compile(re.escape(workspace.rstrip(os.sep)) + r'(?=/|[\s;&|)\'"]|$)', re.MULTILINE)
+    command = workspace_path.sub(lambda match: build_root, command)
+    prelude = (f'export PATH="{bin_dir}:$PATH" CC="{bin_dir}/afl-cc" CXX="{bin_dir}/afl-c++" '
+               f'CFLAGS="--coverage" CXXFLAGS="--coverage" LDFLAGS="--coverage"\n')
+    return prelude + command
+
+
+def build_coverage_binary(campaign, workspace, cov_dir):
+    """Rebuild a campaign's target with gcov instrumentation in cov_dir.
+
+    The recorded build commands are replayed against a clean copy of the
+    sources laid out at the same place relative to cov_dir as the original
+    was relative to the workspace, so relative cds keep working. Returns the
+    path of the coverage binary; raises RuntimeError when the build fails.
+    """
+    binary_path = campaign.get("binary_path")
+    if not campaign.get("build_command") or not binary_path or not os.path.isabs(binary_path):
+        raise RuntimeError("No build commands are recorded for this campaign; launch it through FLARE first")
+    if LIBFUZZER_PATTERN.search(campaign["build_command"]):
+        raise RuntimeError("This target is a libFuzzer harness (-fsanitize=fuzzer); the gcc --coverage "
+                           "rebuild cannot link it, so corpus coverage is not available for it")
+    source_root = _source_root(binary_path)
+    relative = os.path.relpath(source_root, workspace)
+    if relative.startswith('..'):
+        raise RuntimeError(f"{source_root} is outside the FLARE workspace; cannot rebuild it for coverage")
+
+    build_root = os.path.join(cov_dir, 'build')
+    shutil.rmtree(cov_dir, ignore_errors=True)
+    os.makedirs(build_root)
+    _copy_sources(source_root, os.path.join(build_root, relative), campaign.get("commit_sha"),
+                  campaign.get("output_dir"))
+    bin_dir = os.path.join(cov_dir, 'bin')
+    _write_compiler_wrappers(bin_dir)
+
+    command = _coverage_build_command(campaign["build_command"], workspace, build_root, bin_dir)
+    result = sandbox.run_sandboxed(command, build_root)
+    coverage_binary = os.path.join(build_root, os.path.relpath(binary_path, workspace))
+    if not os.path.isfile(coverage_binary):
+        raise RuntimeError(f"Coverage build did not produce {coverage_binary} "
+                           f"(exit code {result.returncode}):\n{result.stderr[-4000:]}")
+    return coverage_binary
+
+
+def _replay_shard(campaign, inputs):
+    """Run one shard of queue entries through the coverage binary, one process each."""
+    return [(entry["sha1"], replay.exec_replay(campaign, entry["path"])["status"]) for entry in inputs]
+
+
+def replay_corpus(campaign, inputs, workers=COVERAGE_WORKERS):
+    """Replay queue entries in parallel shards; gcov merges each process's counters on exit."""
+    if not inputs:
+        return []
+    workers = max(1, min(workers, len(inputs)))
+    shards = [inputs[i::workers] for i in range(workers)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return [row for rows in pool.map(lambda shard: _replay_shard(campaign, shard), shards) for row in rows]
+
+
+def _gcov_json(gcda_path):
+    result = subprocess.run([GCOV_BIN, '--json-format', '--stdout', gcda_path], capture_output=True,
+                            text=True, cwd=os.path.dirname(gcda_path), check=False)
+    decoder = json.JSONDecoder()
+    documents = []
+    text = result.stdout.strip()
+    while text:
+        document, end = decoder.raw_decode(text)
+        documents.append(document)
+        text = text[end:].strip()
+    return documents
+
+
+def collect_coverage(build_root, workers=COVERAGE_WORKERS):
+    """Merge gcov's JSON for every object in the build into per-file and per-function coverage.
+
+    Lines and functions compiled into several objects (headers, inlines) are
+    merged by location. Files outside the build tree, such as system headers,
+    are skipped.
+    """
+    gcda_paths = [os.path.join(directory, name) for directory, _, names in os.walk(build_root)
+                  for name in names if name.endswith('.gcda')]
+    lines = {}
+    functions = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for documents in pool.map(_gcov_json, gcda_paths):
+            for document in documents:
+                base = document.get("current_working_directory", build_root)
+                for source in document.get("files", []):
+                    path = os.path.normpath(os.path.join(base, source["file"]))
+                    if os.path.relpath(path, build_root).startswith('..'):
+                        continue
+                    path = os.path.relpath(path, build_root)
+                    for line in source["lines"]:
+                        key = (path, line["line_number"])
+                        lines[key] = lines.get(key, 0) + line["count"]
+                    for function in source["functions"]:
+                        key = (path, function["name"], function["start_line"])
+                        merged = functions.setdefault(key, {
+                            "name": function["demangled_name"], "file": path,
+                            "start_line": function["start_line"], "execution_count": 0,
+                            "blocks": function["blocks"], "blocks_executed": 0})
+                        merged["execution_count"] += function["execution_count"]
+                        merged["blocks_executed"] = max(merged["blocks_executed"], function["blocks_executed"])
+
+    files = {}
+    for (path, _), count in lines.items():
+        summary = files.setdefault(path, {"file": path, "lines_total": 0, "lines_covered": 0,
+                                          "functions_total": 0, "functions_covered": 0})
+        summary["lines_total"] += 1
+        summary["lines_covered"] += count > 0
+    for function in functions.values():
+        summary = files.setdefault(function["file"], {"file": function["file"], "lines_total": 0,
+                                                      "lines_covered": 0, "functions_total": 0,
+                                                      "functions_covered": 0})
+        summary["functions_total"] += 1
+        summary["functions_covered"] += function["execution_count"] > 0
+    return (sorted(files.values(), key=lambda f: f["file"]),
+            sorted(functions.values(), key=lambda f: (f["file"], f["start_line"])))
+
+
+def _percent(covered, total):
+    return round(100.0 * covered / total, 1) if total else 0.0
+
+
+def refresh_coverage(db_path, campaign, workspace, update=None):
+    """Bring a campaign's coverage report up to date and return it.
+
+    The coverage build and its gcov counters persist between refreshes, so
+    only queue entries not replayed before are run. A new commit or build
+    recipe discards them and starts over. update(progress, message) is
+    called between stages when given.
+    """
+    update = update or (lambda progress, message: None)
+    target_name = campaign["name"]
+    init_coverage_db(db_path)
+    current_build = build_id(campaign)
+    cov_dir = coverage_dir(workspace, target_name)
+
+    with sqlite3.connect(db_path) as conn:
+        row = conn.execute("SELECT build_id, binary_path FROM coverage_reports WHERE target = ?",
+                           (target_name,)).fetchone()
+    if row and row[0] == current_build and row[1] and os.path.isfile(row[1]):
+        coverage_binary = row[1]
+    else:
+        update(0.05, "Building the coverage variant of the target")
+        coverage_binary = build_coverage_binary(campaign, workspace, cov_dir)
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("DELETE FROM coverage_inputs WHERE target = ?", (target_name,))
+            conn.execute("INSERT OR REPLACE INTO coverage_reports (target, build_id, binary_path) "
+                         "VALUES (?, ?, ?)", (target_name, current_build, coverage_binary))
+
+    with sqlite3.connect(db_path) as conn:
+        replayed = {sha1 for (sha1,) in conn.execute(
+            "SELECT sha1 FROM coverage_inputs WHERE target = ?", (target_name,))}
+    queue = collector.collect_inputs(campaign["output_dir"], 'queue')
+    pending = [entry for entry in queue if entry["sha1"] not in replayed]
+
+    update(0.3, f"Replaying {len(pending)} new queue entries ({len(replayed)} already counted)")
+    statuses = replay_corpus(dict(campaign, binary_path=coverage_binary), pending)
+    now = time.time()
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany("INSERT OR REPLACE INTO coverage_inputs VALUES (?, ?, ?, ?)",
+                         [(target_name, sha1, status, now) for sha1, status in statuses])
+
+    update(0.8, "Collecting gcov coverage")
+    files, functions = collect_coverage(os.path.join(cov_dir, 'build'))
+    lines_total = sum(f["lines_total"] for f in files)
+    lines_covered = sum(f["lines_covered"] for f in files)
+    report = {
+        "target": target_name,
+        "build_id": current_build,
+        "commit_sha": campaign.get("commit_sha"),
+        "generated_at": now,
+        "inputs_replayed": len(replayed) + len(statuses),
+        "new_inputs": len(statuses),
+        "failed_inputs": sum(status != "ok" for _, status in statuses),
+        "totals": {
+            "lines_total": lines_total,
+            "lines_covered": lines_covered,
+            "lines_percent": _percent(lines_covered, lines_total),
+            "functions_total": len(functions),
+            "functions_covered": sum(f["execution_count"] > 0 for f in functions),
+            "functions_percent": _percent(sum(f["execution_count"] > 0 for f in functions), len(functions)),
+        },
+        "files": [dict(f, percent=_percent(f["lines_covered"], f["lines_total"])) for f in files],
+        "functions": functions,
+    }
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE coverage_reports SET report = ?, generated_at = ? WHERE target = ?",
+                     (json.dumps(report), now, target_name))
+    return report
+
+
+def get_coverage_report(db_path, target_name):
+    """Return the last coverage report for a target, or None."""
+    init_coverage_db(db_path)
+    with sqlite3.connect(db_path) as conn:
+        row = conn.execute("SELECT report FROM coverage_reports WHERE target = ?", (target_name,)).fetchone()
+    return json.loads(row[0]) if row and row[0] else None
+
+
+def format_coverage_report(report):
+    """Render a coverage report as text for the job result."""
+    totals = report["totals"]
+    text = (f"Line coverage: {totals['lines_covered']}/{totals['lines_total']} ({totals['lines_percent']}%)\n"
+            f"Function coverage: {totals['functions_covered']}/{totals['functions_total']} "
+            f"({totals['functions_percent']}%)\n"
+            f"Queue entries replayed: {report['inputs_replayed']} ({report['new_inputs']} new, "
+            f"{report['failed_inputs']} crashed or timed out)\n\n")
+    for summary in report["files"]:
+        text += (f"{summary['file']}: {summary['lines_covered']}/{summary['lines_total']} lines "
+                 f"({summary['percent']}%), {summary['functions_covered']}/{summary['functions_total']} functions\n")
+    never_run = [f for f in report["functions"] if f["execution_count"] == 0]
+    if never_run:
+        text += f"\nFunctions never reached ({len(never_run)}):\n"
+        for function in never_run:
+            text += f"  {function['name']} ({function['file']}:{function['start_line']})\n"
+    return text
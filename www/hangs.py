@@ -0,0 +1,202 @@
+import os
+import re
+import signal
+import sqlite3
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import targets
+from triage import file_sha1
+
+# The target is interrupted this many times, this many seconds apart, to sample
+# its stack. A hang still running after the last sample counts as timed out.
+HANG_SAMPLES = 5
+HANG_SAMPLE_INTERVAL = 2
+
+HANG_WORKERS = os.cpu_count() or 1
+
+SAMPLE_MARKER = 'FLARE-HANG-SAMPLE'
+
+
+def init_hang_db(db_path):
+    """Create the hang triage table if it does not exist."""
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS hangs (
+                target TEXT NOT NULL,
+                hang_path TEXT NOT NULL,
+                sha1 TEXT,
+                classification TEXT,
+                hot_location TEXT,
+                elapsed REAL,
+                triaged_at REAL,
+                PRIMARY KEY (target, hang_path)
+            )
+        """)
+
+
+def _child_pids(pid):
+    """Return the PIDs whose parent is the given PID."""
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'r') as stat_file:
+                # The command name may contain spaces, so split after its closing paren
+                fields = stat_file.read().rsplit(')', 1)[1].split()
+            if int(fields[1]) == pid:
+                children.append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+    return children
+
+
+def parse_frame(line):
+    """Reduce a gdb backtrace line to 'function (file)' so samples inside one loop compare equal."""
+    match = re.match(r'#\d+\s+(?:0x[0-9a-fA-F]+ in )?(\S+) \(.*?\)(?: at ([^:\s]+))?(?: from (\S+))?', line)
+    if not match:
+        return None
+    function, source, library = match.groups()
+    where = source or (os.path.basename(library) if library else None)
+    return f"{function} ({where})" if where else function
+
+
+def sample_hang(campaign, hang_path):
+    """Replay a hang under gdb, interrupting it periodically to sample the stack."""
+    # The inferior's own output goes to /dev/null, so a chatty hang cannot block in write()
+    program, run_line = targets.gdb_run(campaign, hang_path, redirect='> /dev/null 2>&1')
+    command = ['gdb', '-q', '-nx', '-batch', '-ex', run_line]
+    for _ in range(HANG_SAMPLES):
+        command += ['-ex', f'echo {SAMPLE_MARKER}\\n', '-ex', 'bt', '-ex', 'continue']
+    command += ['-ex', 'kill', program]
+
+    start = time.time()
+    elapsed = None
+    # gdb's output (the backtraces) goes to a file: nothing reads a pipe while we sample
+    with tempfile.TemporaryFile(mode='w+', errors='replace') as log:
+        try:
+            process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT,
+                                       stdin=subprocess.DEVNULL, cwd=targets.replay_cwd(campaign))
+        except Exception as e:
+            print(f"Error running gdb on {hang_path}: {e}")
+            return True, None, []
+        try:
+            for _ in range(HANG_SAMPLES):
+                time.sleep(HANG_SAMPLE_INTERVAL)
+                inferiors = _child_pids(process.pid)
+                if not inferiors:
+                    elapsed = time.time() - start
+                    break
+                for pid in inferiors:
+                    os.kill(pid, signal.SIGINT)
+            process.wait(timeout=HANG_SAMPLE_INTERVAL * 5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        except ProcessLookupError:
+            process.wait()
+        log.seek(0)
+        output = log.read()
+
+    samples = []
+    for chunk in output.split(SAMPLE_MARKER)[1:]:
+        frames = [parse_frame(line) for line in chunk.splitlines() if line.startswith('#')]
+        frames = [frame for frame in frames if frame]
+        if frames:
+            samples.append(frames)
+
+    timed_out = elapsed is None
+    if timed_out:
+        elapsed = time.time() - start
+    return timed_out, elapsed, samples
+
+
+def classify_hang(timed_out, samples):
+    """Classify a hang and find its hot-loop location from the stack samples."""
+    if not samples:
+        return ("slow path" if not timed_out else "unknown"), None
+
+    # Walk from the outermost frame inwards while every sample agrees; the
+    # innermost shared frame is the function that never returns.
+    reversed_samples = [list(reversed(frames)) for frames in samples]
+    common = []
+    for frames in zip(*reversed_samples):
+        if len(set(frames)) != 1:
+            break
+        common.append(frames[0])
+    hot_location = common[-1] if common else samples[-1][0]
+
+    if not timed_out:
+        return "slow path", hot_location
+    depths = [len(frames) for frames in samples]
+    if len(depths) > 1 and depths == sorted(depths) and depths[-1] > depths[0]:
+        return "unbounded recursion", hot_location
+    return "infinite loop", hot_location
+
+
+def triage_hangs(db_path, target_name, hang_paths, campaign, workers=HANG_WORKERS):
+    """Replay and classify any hang files not already in the database.
+
+    The hangs are replayed with the campaign's target arguments and input mode.
+    """
+    init_hang_db(db_path)
+
+    with sqlite3.connect(db_path) as conn:
+        known = {row[0] for row in conn.execute(
+            "SELECT hang_path FROM hangs WHERE target = ?", (target_name,))}
+    pending = [os.path.abspath(p) for p in hang_paths if os.path.abspath(p) not in known]
+    if not pending or not campaign["binary_path"]:
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda p: sample_hang(campaign, p), pending))
+
+    rows = []
+    for hang_path, (timed_out, elapsed, samples) in zip(pending, results):
+        classification, hot_location = classify_hang(timed_out, samples)
+        try:
+            sha1 = file_sha1(hang_path)
+        except OSError:
+            sha1 = None
+        rows.append((target_name, hang_path, sha1, classification, hot_location, elapsed, time.time()))
+
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany("INSERT OR REPLACE INTO hangs VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+
+def get_hang_results(db_path, target_name):
+    """Return the stored hang rows for a target as dictionaries."""
+    init_hang_db(db_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(
+            "SELECT * FROM hangs WHERE target = ? ORDER BY hot_location, hang_path",
+            (target_name,)).fetchall()
+    return [dict(row) for row in rows]
+
+
+def format_hang_report(db_path, target_name):
+    """Render the hang results for a target, deduplicated by hot-loop location."""
+    rows = get_hang_results(db_path, target_name)
+    if not rows:
+        return "No hangs found.\n"
+
+    buckets = {}
+    for row in rows:
+        buckets.setdefault(row["hot_location"] or "unknown", []).append(row)
+
+    report = f"{len(rows)} hangs at {len(buckets)} unique hot-loop locations\n\n"
+    for hot_location, hangs in buckets.items():
+        classes = sorted({h["classification"] for h in hangs})
+        longest = max(h["elapsed"] or 0 for h in hangs)
+        report += f"#### Hot location: {hot_location}\n"
+        report += f"Classification: {', '.join(classes)}\n"
+        report += f"Longest replay: {longest:.1f}s\n"
+        report += f"Hangs ({len(hangs)}):\n"
+        for hang in hangs:
+            report += f"  {hang['hang_path']}\n"
+        report += "\n"
+    return report
@@ -0,0 +1,153 @@
+import os
+import re
+import shlex
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+SOURCE_EXTENSIONS = ('.c', '.cc', '.cpp', '.cxx', '.c++')
+
+# Entry-point patterns grep'd for, with the kind of target and its base score
+ENTRY_PATTERNS = [
+    ("libfuzzer", r'LLVMFuzzerTestOneInput', 100),
+    ("afl_persistent", r'__AFL_LOOP|__AFL_FUZZ_TESTCASE_BUF', 90),
+    ("main", r'^[[:space:]]*(int|void)[[:space:]]+main[[:space:]]*\(', 30),
+]
+
+# Signs that a main() reads its input from a file or stdin
+FILE_INPUT_PATTERN = r'fopen|argv\[1\]|ifstream|fread|open\(|std::cin|stdin'
+
+CORPUS_DIR_NAMES = ('corpus', 'corpora', 'seeds', 'seed', 'testcases', 'in', 'inputs', 'samples')
+DICT_EXTENSIONS = ('.dict', '.dic')
+
+GREP_WORKERS = os.cpu_count() or 1
+GREP_CHUNK_SIZE = 200
+
+MAX_PROMPT_CANDIDATES = 10
+
+
+def _grep_chunk(repo_dir, pattern, paths):
+    """Run grep over a chunk of files and return {path: first_matching_line_number}."""
+    result = subprocess.run(
+        ['grep', '-n', '-E', '-I', '-m', '1', '-H', '--', pattern] + paths,
+        cwd=repo_dir, capture_output=True, text=True, errors='replace', check=False)
+    matches = {}
+    for line in result.stdout.splitlines():
+        path, _, rest = line.partition(':')
+        line_number = rest.split(':', 1)[0]
+        if line_number.isdigit():
+            matches.setdefault(path, int(line_number))
+    return matches
+
+
+def parallel_grep(repo_dir, pattern, paths):
+    """grep a pattern across many files using chunks spread over a thread pool."""
+    chunks = [paths[i:i + GREP_CHUNK_SIZE] for i in range(0, len(paths), GREP_CHUNK_SIZE)]
+    matches = {}
+    if not chunks:
+        return matches
+    with ThreadPoolExecutor(max_workers=GREP_WORKERS) as pool:
+        for chunk_matches in pool.map(lambda chunk: _grep_chunk(repo_dir, pattern, chunk), chunks):
+            matches.update(chunk_matches)
+    return matches
+
+
+def _nearest(path, candidates):
+    """Pick the candidate directories sharing the longest path prefix with path."""
+    def shared(other):
+        return len(os.path.commonprefix([os.path.dirname(path).split(os.sep), other.split(os.sep)]))
+    if not candidates:
+        return []
+    best = max(shared(c) for c in candidates)
+    return [c for c in candidates if shared(c) == best]
+
+
+def find_fuzz_targets(repo_dir, index):
+    """Rank likely fuzz targets in a repo from its path index.
+
+    Returns dicts with path, kind, line, score, corpus_dirs and dictionaries,
+    highest score first.
+    """
+    sources = [p for p in index if p.endswith(SOURCE_EXTENSIONS)]
+    corpus_dirs = [p for p in index if os.path.basename(p).lower() in CORPUS_DIR_NAMES
+                   and os.path.isdir(os.path.join(repo_dir, p))]
+    dictionaries = [p for p in index if p.endswith(DICT_EXTENSIONS)]
+
+    file_input = parallel_grep(repo_dir, FILE_INPUT_PATTERN, sources)
+
+    candidates = {}
+    for kind, pattern, base_score in ENTRY_PATTERNS:
+        for path, line in parallel_grep(repo_dir, pattern, sources).items():
+            if path in candidates:
+                continue  # a libFuzzer harness with its own main() stays a libFuzzer harness
+            if kind == "main" and path not in file_input:
+                continue
+            score = base_score
+            lowered = path.lower()
+            if 'fuzz' in lowered:
+                score += 20
+            if kind == "main" and re.search(r'(^|/)(tools?|apps?|bin|programs?|examples?)/', lowered):
+                score += 10
+            if re.search(r'(^|/)(tests?|third_party|vendor|deps)/', lowered):
+                score -= 15
+            candidates[path] = {
+                "path": path,
+                "kind": kind,
+                "line": line,
+                "score": score,
+                "corpus_dirs": _nearest(path, corpus_dirs),
+                "dictionaries": _nearest(path, dictionaries),
+            }
+    return sorted(candidates.values(), key=lambda c: (-c["score"], c["path"]))
+
+
+def format_candidates(candidates, limit=MAX_PROMPT_CANDIDATES):
+    """Render the ranked candidates as a prompt section."""
+    if not candidates:
+        return ""
+    section = "{Fuzz Target Candidates}:\n"
+    for rank, candidate in enumerate(candidates[:limit], start=1):
+        section += f"{rank}. {candidate['path']}:{candidate['line']} ({candidate['kind']}, score {candidate['score']})"
+        if candidate["corpus_dirs"]:
+            section += f" corpus: {', '.join(candidate['corpus_dirs'])}"
+        if candidate["dictionaries"]:
+            section += f" dict: {', '.join(candidate['dictionaries'])}"
+        section += "\n"
+    return section
+
+
+def suggest_commands(repo_dir, candidate, target_dir):
+    """Build bash commands that compile a self-contained candidate and start AFL on it.
+
+    Works for single-file harnesses and mains; anything needing the project's
+    own build still goes through the LLM.
+    """
+    source = os.path.join(repo_dir, candidate["path"])
+    name = os.path.splitext(os.path.basename(candidate["path"]))[0]
+    binary = shlex.quote(os.path.join(target_dir, name))
+    compiler = 'afl-clang-fast++' if not candidate["path"].endswith('.c') else 'afl-clang-fast'
+    # Repository paths come from untrusted checkouts, so every one is quoted
+    include = " ".join(shlex.quote(f"-I{path}") for path in
+                       (os.path.dirname(source), repo_dir, os.path.join(repo_dir, 'include')))
+    source = shlex.quote(source)
+
+    if candidate["kind"] == "libfuzzer":
+        build = f"{compiler} -g -fsanitize=fuzzer,address {include} {source} -o {binary}"
+        target_args = ""
+    else:
+        build = f"{compiler} -g -fsanitize=address {include} {source} -o {binary}"
+        target_args = " @@"
+
+    if candidate["corpus_dirs"]:
+        seeds_dir = shlex.quote(os.path.join(repo_dir, candidate["corpus_dirs"][0]))
+        seed_setup = ""
+    else:
+        seeds_dir = shlex.quote(os.path.join(target_dir, 'in'))
+        seed_file = shlex.quote(os.path.join(target_dir, 'in', 'flare_seed_1'))
+        seed_setup = f"mkdir -p {seeds_dir} && echo 'FLARE' > {seed_file}\n"
+    dictionary = ""
+    if candidate["dictionaries"]:
+        dictionary = f" -x {shlex.quote(os.path.join(repo_dir, candidate['dictionaries'][0]))}"
+
+    fuzz = (f"afl-fuzz -i {seeds_dir} -o {shlex.quote(os.path.join(target_dir, 'out'))}{dictionary} "
+            f"-- {binary}{target_args} > /dev/null 2>&1 &")
+    return f"mkdir -p {shlex.quote(target_dir)}\n{seed_setup}{build}\n{fuzz}"
@@ -0,0 +1,251 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+
+JOB_WORKERS = 2
+
+# Seconds an idle worker waits before checking the queue again
+JOB_POLL_INTERVAL = 1.0
+
+# A running job's owner refreshes its heartbeat this often; a job whose heartbeat is
+# older than the lease belongs to a process that died and is queued again
+JOB_HEARTBEAT_INTERVAL = 15
+JOB_LEASE_SECONDS = 90
+
+_handlers = {}
+_workers = []
+_running = set()
+_running_lock = threading.Lock()
+_heartbeat = None
+_wakeup = threading.Event()
+_active = 0
+_active_lock = threading.Lock()
+
+
+def _connect(db_path):
+    """Open the job database in autocommit mode so claims can use explicit transactions."""
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def init_job_db(db_path):
+    """Create the job table if it does not exist."""
+    conn = _connect(db_path)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                params TEXT NOT NULL,
+                status TEXT NOT NULL,
+                progress REAL NOT NULL DEFAULT 0,
+                message TEXT,
+                sections TEXT NOT NULL DEFAULT '[]',
+                result TEXT,
+                error TEXT,
+                created_at REAL,
+                updated_at REAL,
+                owner TEXT,
+                heartbeat_at REAL
+            )
+        """)
+        # Job databases created before leases existed
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for column, column_type in (("owner", "TEXT"), ("heartbeat_at", "REAL")):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+    finally:
+        conn.close()
+
+
+def worker_id():
+    """Identify this process as a job owner; forks (gunicorn workers, the reloader) get their own."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def register_handler(kind, handler):
+    """Register the function that runs jobs of a kind.
+
+    The handler is called as handler(params, update) and returns the final
+    result string. update(progress, message, title=None, content=None) records
+    progress between 0 and 1 and optionally appends a partial result section.
+    """
+    _handlers[kind] = handler
+
+
+def submit_job(db_path, kind, params):
+    """Queue a job and return its ID."""
+    init_job_db(db_path)
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    conn = _connect(db_path)
+    try:
+        conn.execute(
+            "INSERT INTO jobs (id, kind, params, status, message, created_at, updated_at) "
+            "VALUES (?, ?, ?, 'queued', 'Waiting for a worker', ?, ?)",
+            (job_id, kind, json.dumps(params), now, now))
+    finally:
+        conn.close()
+    _wakeup.set()
+    return job_id
+
+
+def get_job(db_path, job_id):
+    """Return a job's state, including any partial sections, or None if unknown."""
+    init_job_db(db_path)
+    conn = _connect(db_path)
+    try:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    job = dict(row)
+    job["params"] = json.loads(job["params"])
+    job["sections"] = json.loads(job["sections"])
+    return job
+
+
+def _claim_job(db_path):
+    """Atomically move the oldest queued job to running, owned by this process, and return it.
+
+    Running jobs whose lease expired (their process stopped heartbeating) are
+    queued again first; jobs other live processes are running are left alone.
+    """
+    conn = _connect(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        now = time.time()
+        conn.execute(
+            "UPDATE jobs SET status = 'queued', message = 'Requeued after its worker stopped', "
+            "sections = '[]', progress = 0, owner = NULL WHERE status = 'running' "
+            "AND (heartbeat_at IS NULL OR heartbeat_at < ?)", (now - JOB_LEASE_SECONDS,))
+        row = conn.execute(
+            "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1").fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+        conn.execute(
+            "UPDATE jobs SET status = 'running', message = 'Started', updated_at = ?, owner = ?, "
+            "heartbeat_at = ? WHERE id = ?", (now, worker_id(), now, row["id"]))
+        conn.execute("COMMIT")
+        return dict(row)
+    except sqlite3.OperationalError:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        return None
+    finally:
+        conn.close()
+
+
+def _make_updater(db_path, job_id):
+    """Build the progress callback handed to a job handler."""
+    def update(progress, message, title=None, content=None):
+        conn = _connect(db_path)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if title is not None:
+                row = conn.execute("SELECT sections FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                sections = json.loads(row["sections"])
+                sections.append({"title": title, "content": content or ""})
+                conn.execute("UPDATE jobs SET sections = ? WHERE id = ?", (json.dumps(sections), job_id))
+            conn.execute(
+                "UPDATE jobs SET progress = ?, message = ?, updated_at = ? WHERE id = ?",
+                (progress, message, time.time(), job_id))
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+    return update
+
+
+def _finish_job(db_path, job_id, status, result=None, error=None):
+    """Record the final state of a job, unless its lease was lost to another process."""
+    conn = _connect(db_path)
+    try:
+        conn.execute(
+            "UPDATE jobs SET status = ?, progress = 1, message = ?, result = ?, error = ?, "
+            "updated_at = ? WHERE id = ? AND (owner = ? OR owner IS NULL)",
+            (status, 'Finished' if status == 'done' else 'Failed', result, error, time.time(), job_id,
+             worker_id()))
+    finally:
+        conn.close()
+
+
+def _heartbeat_loop(db_path):
+    """Keep the leases of the jobs this process is running alive."""
+    while True:
+        time.sleep(JOB_HEARTBEAT_INTERVAL)
+        with _running_lock:
+            running = list(_running)
+        if not running:
+            continue
+        conn = _connect(db_path)
+        try:
+            conn.executemany("UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND owner = ?",
+                             [(time.time(), job_id, worker_id()) for job_id in running])
+        except sqlite3.OperationalError as e:
+            print(f"Job heartbeat failed: {e}")
+        finally:
+            conn.close()
+
+
+def _worker(db_path):
+    """Run queued jobs until the process exits."""
+    while True:
+        job = _claim_job(db_path)
+        if job is None:
+            _wakeup.wait(JOB_POLL_INTERVAL)
+            _wakeup.clear()
+            continue
+
+        handler = _handlers.get(job["kind"])
+        if handler is None:
+            _finish_job(db_path, job["id"], 'failed', error=f"No handler for job kind {job['kind']}")
+            continue
+        global _active
+        with _active_lock:
+            _active += 1
+        with _running_lock:
+            _running.add(job["id"])
+        try:
+            result = handler(json.loads(job["params"]), _make_updater(db_path, job["id"]))
+            _finish_job(db_path, job["id"], 'done', result=result)
+        except Exception as e:
+            print(f"Job {job['id']} failed: {e}")
+            _finish_job(db_path, job["id"], 'failed', error=f"{e}\n{traceback.format_exc()}")
+        finally:
+            with _running_lock:
+                _running.discard(job["id"])
+            with _active_lock:
+                _active -= 1
+
+
+def start_workers(db_path, count=JOB_WORKERS):
+    """Start this process's worker pool and lease heartbeat once.
+
+    Jobs cut off by a stopped process are picked up again once their lease
+    expires (see _claim_job), so several processes may run workers on the
+    same database.
+    """
+    global _heartbeat
+    init_job_db(db_path)
+    if _heartbeat is None:
+        _heartbeat = threading.Thread(target=_heartbeat_loop, args=(db_path,), daemon=True)
+        _heartbeat.start()
+    while len(_workers) < count:
+        thread = threading.Thread(target=_worker, args=(db_path,), daemon=True)
+        thread.start()
+        _workers.append(thread)
+
+
+def active_job_count():
+    """Return how many jobs this process is running right now."""
+    with _active_lock:
+        return _active
@@ -0,0 +1,97 @@
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import llm_client
+
+# Rough prompt budget per batched request, in tokens
+BATCH_TOKEN_BUDGET = 6000
+
+# Number of batches sent to the LLM at once
+BATCH_CONCURRENCY = 4
+
+# Replay output is truncated to this many characters per crash summary
+MAX_FIELD_CHARS = 1500
+
+BATCH_PROMPT = (
+    "You are triaging crashes found by a fuzzer. The JSON array below holds one object per crash, "
+    "each with an \"id\" and the replay output. For every crash, explain in one to three sentences "
+    "what the crash is and what kind of bug it probably is. Respond with only a JSON object mapping "
+    "each crash id to its explanation, with no other text.\n"
+)
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+def _truncate(value):
+    """Keep the tail of long outputs, where sanitizer reports and signals usually are."""
+    value = value if isinstance(value, str) else json.dumps(value)
+    if len(value) > MAX_FIELD_CHARS:
+        return "..." + value[-MAX_FIELD_CHARS:]
+    return value
+
+
+def pack_batches(summaries, token_budget=BATCH_TOKEN_BUDGET):
+    """Greedily pack crash summaries into batches that fit the token budget."""
+    batches = []
+    current = []
+    used = estimate_tokens(BATCH_PROMPT)
+    for summary in summaries:
+        compact = {key: _truncate(value) if key != "id" else value for key, value in summary.items()}
+        cost = estimate_tokens(json.dumps(compact))
+        if current and used + cost > token_budget:
+            batches.append(current)
+            current = []
+            used = estimate_tokens(BATCH_PROMPT)
+        current.append(compact)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def parse_batch_response(text):
+    """Pull the JSON object of explanations out of a model reply."""
+    match = re.search(r'```(?:json)?\n([\s\S]*?)```', text)
+    if match:
+        text = match.group(1)
+    start, end = text.find('{'), text.rfind('}')
+    if start == -1 or end == -1:
+        return {}
+    try:
+        answers = json.loads(text[start:end + 1])
+    except ValueError:
+        return {}
+    return {str(key): str(value) for key, value in answers.items()} if isinstance(answers, dict) else {}
+
+
+def explain_batch(batch):
+    """Send one batch to the LLM and return {id: explanation}."""
+    message = BATCH_PROMPT + json.dumps(batch, indent=1)
+    try:
+        response = llm_client.chat(message, task="explain_crash")
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return parse_batch_response(response.get("response", ""))
+    except Exception as e:
+        print(f"Error explaining crash batch: {e}")
+        return {}
+
+
+def explain_crashes(summaries, token_budget=BATCH_TOKEN_BUDGET, concurrency=BATCH_CONCURRENCY):
+    """Explain many crashes with a few concurrent batched requests.
+
+    Each summary is a dict with a unique "id" plus any replay details. Returns
+    {id: explanation}; crashes the model skipped are left out.
+    """
+    batches = pack_batches(summaries, token_budget)
+    explanations = {}
+    if not batches:
+        return explanations
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for answers in pool.map(explain_batch, batches):
+            explanations.update(answers)
+    return explanations
@@ -0,0 +1,53 @@
+import os
+import sys
+
+# The LLM router, sessions and config live in the repository root
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    # Appended so www/ modules keep precedence over same-named root modules
+    sys.path.append(ROOT_DIR)
+
+import config
+import chat_service
+import llm_providers
+import llm_scheduler
+
+# Per-request timeout for the remote chat server, in seconds
+REMOTE_TIMEOUT = 600
+
+
+def chat(message, task=None, session_id=None, priority=None, context=None):
+    """Send a message to the LLM and return the chat reply as a dict.
+
+    Runs in this process by default. With config.LLM_MODE = "remote" the
+    message goes to chat_server.py instead. Either way the reply holds
+    "response" and "model", or "error" when the request failed. context is
+    sent alongside the message but never stored in the session history.
+    """
+    if getattr(config, 'LLM_MODE', 'inprocess') != 'remote':
+        return chat_service.handle_chat(message, task=task, session_id=session_id, priority=priority,
+                                        context=context)
+
+    import requests
+    payload = {"message": message, "task": task, "session_id": session_id, "priority": priority,
+               "context": context}
+    try:
+        response = requests.post(config.CHAT_SERVER_URL, json=payload, timeout=REMOTE_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.RequestException as e:
+        return {"error": f"Failed to connect to chat server: {str(e)}"}
+
+
+def stats():
+    """Return provider call/latency stats and scheduler queue stats."""
+    if getattr(config, 'LLM_MODE', 'inprocess') != 'remote':
+        return {"providers": llm_providers.get_all_stats(),
+                "schedulers": llm_scheduler.get_all_stats()}
+
+    import requests
+    stats_url = config.CHAT_SERVER_URL.rsplit('/chat', 1)[0] + '/stats'
+    try:
+        return requests.get(stats_url, timeout=30).json()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        return {"error": f"Failed to connect to chat server: {str(e)}"}
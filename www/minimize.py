@@ -0,0 +1,117 @@
+import os
+import queue
+import subprocess
+import tempfile
+import threading
+
+import targets
+
+# Minimized reproducers are stored next to the original crash with this suffix
+MINIMIZED_SUFFIX = '.min'
+
+# Seconds afl-tmin may spend on a single input before it is abandoned
+MINIMIZE_TIME_BUDGET = 120
+
+# Per-execution timeout handed to afl-tmin (ms)
+MINIMIZE_EXEC_TIMEOUT = 1000
+
+MINIMIZE_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+
+_queue = queue.Queue()
+_pending = set()
+_pending_lock = threading.Lock()
+_workers = []
+
+
+def minimized_path(crash_path):
+    """Return where the minimized reproducer for a crash file is stored."""
+    return crash_path + MINIMIZED_SUFFIX
+
+
+def is_minimized_file(path):
+    """Check whether a file is a minimized reproducer rather than an original crash."""
+    return path.endswith(MINIMIZED_SUFFIX)
+
+
+def get_reproducer(crash_path):
+    """Return the minimized reproducer if one exists, otherwise the original crash."""
+    min_path = minimized_path(crash_path)
+    if os.path.isfile(min_path):
+        return min_path
+    return crash_path
+
+
+def minimize_crash(crash_path, campaign):
+    """Run afl-tmin in crash mode on one input within the time budget.
+
+    The target gets the campaign's arguments and input mode (@@ or stdin).
+    """
+    output_path = minimized_path(crash_path)
+    # afl-tmin writes next to the instance, not into crashes/, so collections never see partial files;
+    # same filesystem, so the final rename stays atomic
+    instance_dir = os.path.dirname(os.path.dirname(os.path.abspath(crash_path)))
+    fd, tmp_path = tempfile.mkstemp(prefix='.flare-tmin-', dir=instance_dir)
+    os.close(fd)
+    command = [
+        'afl-tmin', '-C',
+        '-i', crash_path,
+        '-o', tmp_path,
+        '-t', str(MINIMIZE_EXEC_TIMEOUT),
+        '-m', 'none',
+        '--',
+    ] + targets.afl_tool_command(campaign)
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, cwd=targets.replay_cwd(campaign),
+                                timeout=MINIMIZE_TIME_BUDGET, check=False)
+        if result.returncode == 0 and os.path.isfile(tmp_path):
+            # Rename into place so readers never see a half-written reproducer
+            os.replace(tmp_path, output_path)
+            return output_path
+        print(f"afl-tmin failed on {crash_path}: {result.stderr.strip()[-500:]}")
+    except subprocess.TimeoutExpired:
+        print(f"afl-tmin exceeded the {MINIMIZE_TIME_BUDGET}s budget on {crash_path}")
+    except Exception as e:
+        print(f"Error minimizing {crash_path}: {e}")
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return None
+
+
+def _worker():
+    """Take crashes off the queue and minimize them until the process exits."""
+    while True:
+        crash_path, campaign = _queue.get()
+        try:
+            minimize_crash(crash_path, campaign)
+        finally:
+            with _pending_lock:
+                _pending.discard(crash_path)
+            _queue.task_done()
+
+
+def start_workers(count=MINIMIZE_WORKERS):
+    """Start the background minimization worker pool once."""
+    while len(_workers) < count:
+        thread = threading.Thread(target=_worker, daemon=True)
+        thread.start()
+        _workers.append(thread)
+
+
+def enqueue(crash_path, campaign):
+    """Queue a crash of a campaign for minimization unless it is already minimized or queued."""
+    if not campaign["binary_path"] or os.path.isfile(minimized_path(crash_path)):
+        return False
+    with _pending_lock:
+        if crash_path in _pending:
+            return False
+        _pending.add(crash_path)
+    start_workers()
+    _queue.put((crash_path, campaign))
+    return True
+
+
+def get_queue_status():
+    """Return how many crashes are waiting for or undergoing minimization."""
+    with _pending_lock:
+        return {"pending": len(_pending), "workers": len(_workers)}
@@ -0,0 +1,321 @@
+import hashlib
+import os
+import re
+import subprocess
+import time
+import uuid
+
+import action_plan
+import build_repair
+import llm_client
+import plan_cache
+import repo_context
+import sandbox
+import targets
+import workspace
+
+WWW_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Ensure the workspace (/tmp/flare_ws unless FLARE_WORKSPACE is set) exists
+FLARE_WORKSPACE = workspace.FLARE_WORKSPACE
+os.makedirs(FLARE_WORKSPACE, exist_ok=True)
+
+# SQLite database with attempts/time metrics of executed build blocks
+BUILD_METRICS_DB_PATH = os.path.join(FLARE_WORKSPACE, 'build_metrics.db')
+
+# SQLite registry of launched fuzzing campaigns
+TARGETS_DB_PATH = os.path.join(FLARE_WORKSPACE, 'targets.db')
+
+# SQLite cache of action plans that executed successfully, per repo commit
+PLAN_CACHE_DB_PATH = os.path.join(FLARE_WORKSPACE, 'plans.db')
+
+# Repository URLs in chat messages
+GIT_URL_PATTERN = r'(https?://[^\s"]+\.git)'
+
+# Path to the default playbook
+DEFAULT_PLAYBOOK_PATH = os.path.join(WWW_DIR, 'FLARE_playbook', 'default.yaml')
+
+# Request used for batch targets that do not bring their own prompt
+DEFAULT_TARGET_PROMPT = "Fuzz {url} [flare-execute]"
+
+
+def get_yaml():
+    """Import PyYAML on first use rather than at server startup."""
+    import yaml
+    return yaml
+
+
+def get_default_playbook():
+    """Read and return the content of the default playbook as a string."""
+    try:
+        with open(DEFAULT_PLAYBOOK_PATH, 'r') as file:
+            return get_yaml().safe_load(file)
+    except FileNotFoundError:
+        print(f"Default playbook not found at {DEFAULT_PLAYBOOK_PATH}.")
+        return None
+    except Exception as e:
+        print(f"Error reading default playbook: {e}")
+        return None
+
+
+def extract_git_url(text):
+    """Return the first Git repository URL in a message, or None."""
+    match = re.search(GIT_URL_PATTERN, text)
+    return match.group(1) if match else None
+
+
+def build_context(user_input, repo_details=""):
+    """Return the playbook guidelines, the repo details and the reply format for a request.
+
+    This is sent as a separate system message next to the user's own words,
+    so sessions only keep what the user typed.
+    """
+    # Read the default playbook content
+    default_playbook = get_default_playbook()
+    playbook_content = ""
+    if default_playbook:
+        # Convert YAML to a readable string format
+        playbook_content = get_yaml().dump(default_playbook)
+
+    context = ""
+    # If "playbook:" is not already included in the user input, add the playbook content
+    if "playbook:" not in user_input.lower() and playbook_content:
+        context = f"Answer the user's request based on these guidelines:\n{playbook_content}"
+
+    # If Git repo details are found, add them too
+    if repo_details:
+        context = f"{context}\nThis is the git repo:\n{repo_details}"
+
+    # Ask for a typed JSON action plan instead of free-form markdown blocks
+    return context + action_plan.PLAN_INSTRUCTIONS
+
+
+def request_plan(user_input, context=None, strict=True, session_id=None, priority=None):
+    """Ask the LLM for an action plan, with one correction round if it is invalid.
+
+    context (see build_context) goes with both requests but is not stored in
+    the session. Returns (reply, plan, errors): the chat reply dict, the
+    validated plan (None when invalid) and the validation errors. Non-strict
+    requests accept plain-text replies as a message without steps and are not
+    corrected.
+    """
+    reply = llm_client.chat(user_input, task="generate", session_id=session_id, priority=priority,
+                            context=context)
+    if "error" in reply:
+        return reply, None, [reply["error"]]
+    plan, errors = action_plan.parse_plan(reply.get("response", ""), strict)
+    if errors and strict:
+        fixed = llm_client.chat(action_plan.fix_prompt(reply.get("response", ""), errors),
+                                task="generate", session_id=session_id, priority=priority, context=context)
+        if "error" not in fixed:
+            reply = fixed
+            plan, errors = action_plan.parse_plan(reply.get("response", ""), strict)
+    return reply, plan, errors
+
+
+def record_launch(command, repo_url=None, build_commands=()):
+    """Register the campaigns a successful block started; returns their names."""
+    # The build is what ran before the fuzzer: earlier blocks plus this block's other lines
+    build_command = "\n".join(list(build_commands) + [
+        line for line in command.splitlines() if 'afl-fuzz' not in line])
+    repo_dir = repo_context.repo_dir_for(repo_url) if repo_url else None
+    try:
+        return targets.record_launch(TARGETS_DB_PATH, command, FLARE_WORKSPACE, FLARE_WORKSPACE,
+                                     repo_url=repo_url, build_command=build_command, repo_dir=repo_dir)
+    except Exception as e:
+        print(f"Failed to register fuzzing campaign: {e}")
+        return []
+
+
+def execute_blocks(steps, target, session_id=None, priority=None, deadline=None, repo_url=None,
+                   max_attempts=build_repair.MAX_REPAIR_ATTEMPTS):
+    """Run the bash commands of plan steps in the sandbox, letting the LLM repair failing ones.
+
+    Each step's outcome (see build_repair.run_with_repair) is recorded in the
+    build metrics, and steps that start afl-fuzz register their campaigns
+    (listed under the outcome's "campaigns"). With a deadline (time.time()
+    value), steps get at most the remaining time and steps not started
+    before it are skipped. max_attempts=1 runs steps without LLM repair.
+    Steps carrying a "skip" reason are not run and count as succeeded. A
+    step that starts afl-fuzz fails when none of its fuzzers keep running.
+    """
+    def ask_for_fix(prompt):
+        fix_response = llm_client.chat(prompt, task="generate", session_id=session_id, priority=priority)
+        return fix_response.get("response", "")
+
+    outcomes = []
+    for step in steps:
+        if step.get("skip"):
+            outcomes.append({"command": step["command"], "success": True, "attempts": 0, "elapsed": 0.0,
+                             "history": [], "campaigns": [], "skipped": True,
+                             "result": subprocess.CompletedProcess(step["command"], 0, f"Skipped: {step['skip']}", "")})
+            continue
+        limits = None
+        if deadline is not None:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            limits = {"timeout": min(sandbox.SANDBOX_LIMITS["timeout"], remaining)}
+
+        def run_block(command):
+            # Generated code runs with CPU, memory, pids and wall-clock limits
+            return sandbox.run_sandboxed(command, FLARE_WORKSPACE, limits)
+
+        outcome = build_repair.run_with_repair(step["command"], run_block, ask_for_fix, max_attempts, step["type"])
+        outcome["campaigns"] = []
+        if outcome["success"] and 'afl-fuzz' in outcome["command"]:
+            previous = [o["command"] for o in outcomes if o["success"]]
+            outcome["campaigns"] = record_launch(outcome["command"], repo_url, previous)
+            # afl-fuzz runs in the background, so the block succeeds even when the fuzzer
+            # exits at once (for example because its -o directory holds another session)
+            if not _fuzzers_running(outcome["campaigns"]):
+                outcome["success"] = False
+                outcome["result"].stderr += "\n[FLARE] afl-fuzz is not running after the block finished."
+        build_repair.record_run(BUILD_METRICS_DB_PATH, target, outcome)
+        outcomes.append(outcome)
+    return outcomes
+
+
+def _fuzzers_running(names):
+    """Check that every campaign registered for a block has a live afl-fuzz process."""
+    campaigns = [targets.get_campaign(TARGETS_DB_PATH, name) for name in names]
+    return bool(campaigns) and all(campaign and campaign["running"] for campaign in campaigns)
+
+
+def playbook_version():
+    """Hash of the playbook and plan format; cached plans from other versions are not reused."""
+    digest = hashlib.sha1(action_plan.PLAN_INSTRUCTIONS.encode())
+    try:
+        with open(DEFAULT_PLAYBOOK_PATH, 'rb') as file:
+            digest.update(file.read())
+    except OSError:
+        pass
+    return digest.hexdigest()[:12]
+
+
+def plan_key(git_url, user_input):
+    """Cache key for a request about a repo, or None when the commit is unknown."""
+    commit = targets.git_commit(repo_context.repo_dir_for(git_url))
+    if not commit:
+        return None
+    return {
+        "repo_url": git_url,
+        "commit_sha": commit,
+        "playbook_version": playbook_version(),
+        "request_key": plan_cache.request_key(user_input, git_url),
+    }
+
+
+def _all_succeeded(steps, outcomes):
+    return len(outcomes) == len(steps) and all(outcome["success"] for outcome in outcomes)
+
+
+def _replay_steps(steps, commit_sha):
+    """Return the cached steps to run again, marking clone steps whose checkouts are already there as skipped.
+
+    Replaying git clone into an existing directory fails, which would throw
+    away a plan that still works. A clone is skipped only when every
+    checkout it creates exists at the cached commit.
+    """
+    replay = []
+    for step in steps:
+        if step["type"] == "clone":
+            clones = targets.find_clones(step["command"], FLARE_WORKSPACE)
+            if clones and all(targets.git_commit(path) == commit_sha for path in clones):
+                step = dict(step, skip=f"{', '.join(clones)} is already at {commit_sha[:12]}")
+        replay.append(step)
+    return replay
+
+
+def plan_and_execute(user_input, context, target, git_url=None, session_id=None, priority=None, deadline=None):
+    """Get an action plan for an execution request and run it.
+
+    A plan that previously ran cleanly for the same repo commit, playbook
+    version and request is replayed without asking the LLM (and without LLM
+    repair), skipping clone steps whose checkout already exists at that
+    commit. If the replay fails, it is dropped and the LLM plans afresh.
+    Plans whose steps all succeed are cached, with any repaired commands.
+    context is passed to request_plan. Returns a dict with reply, plan,
+    errors, outcomes and cached (True when the replayed plan was used).
+    """
+    key = plan_key(git_url, user_input) if git_url else None
+    cached = plan_cache.get_plan(PLAN_CACHE_DB_PATH, key) if key else None
+    if cached:
+        steps = _replay_steps(cached["steps"], key["commit_sha"])
+        outcomes = execute_blocks(steps, target, deadline=deadline, repo_url=git_url, max_attempts=1)
+        if _all_succeeded(steps, outcomes):
+            plan_cache.record_replay(PLAN_CACHE_DB_PATH, key)
+            reply = {"response": cached["message"], "model": "plan-cache"}
+            return {"reply": reply, "plan": cached, "errors": [], "outcomes": outcomes, "cached": True}
+        print(f"Cached plan for {git_url} failed to replay; asking the LLM for a new one")
+        plan_cache.invalidate(PLAN_CACHE_DB_PATH, key)
+
+    reply, plan, errors = request_plan(user_input, context, session_id=session_id, priority=priority)
+    outcomes = []
+    if plan and plan["steps"]:
+        outcomes = execute_blocks(plan["steps"], target, session_id=session_id,
+                                  priority=priority, deadline=deadline, repo_url=git_url)
+        if key and _all_succeeded(plan["steps"], outcomes):
+            # Cache the commands as they finally ran, including LLM repairs
+            executed = dict(plan, steps=[dict(step, command=outcome["command"])
+                                         for step, outcome in zip(plan["steps"], outcomes)])
+            plan_cache.store_plan(PLAN_CACHE_DB_PATH, key, executed)
+    return {"reply": reply, "plan": plan, "errors": errors, "outcomes": outcomes, "cached": False}
+
+
+def run_target(git_url, prompt=None, timeout=None):
+    """Run the whole pipeline for one repo: clone, context, generate, build and launch.
+
+    Returns a JSON-ready summary whose status is "fuzzing" (a block started
+    afl-fuzz), "built" (every block succeeded), "failed", "no_commands",
+    "invalid_plan", "timeout" or "error". The timeout is checked between
+    steps, and running blocks are cut off when it expires.
+    """
+    start = time.time()
+    deadline = start + timeout if timeout else None
+    summary = {"url": git_url, "status": "error", "model": None, "blocks": [], "campaigns": [], "error": None}
+
+    def finish(status, error=None):
+        summary.update(status=status, error=error, elapsed=round(time.time() - start, 1))
+        return summary
+
+    repo_details = repo_context.get_repo_details(git_url)
+    if repo_details.startswith("Error"):
+        return finish("error", repo_details)
+    if deadline is not None and time.time() > deadline:
+        return finish("timeout", "Timed out while cloning the repository")
+
+    user_input = prompt or DEFAULT_TARGET_PROMPT.format(url=git_url)
+    # One session per target so repair requests see the plan they are fixing
+    session_id = f"batch-{uuid.uuid4().hex[:12]}"
+    run = plan_and_execute(user_input, build_context(user_input, repo_details), git_url, git_url=git_url,
+                           session_id=session_id, priority="batch", deadline=deadline)
+    reply, plan, outcomes = run["reply"], run["plan"], run["outcomes"]
+    if "error" in reply:
+        return finish("error", reply["error"])
+    summary["model"] = reply.get("model")
+    summary["cached_plan"] = run["cached"]
+    if plan is None:
+        return finish("invalid_plan", "; ".join(run["errors"]))
+
+    blocks = [step["command"] for step in plan["steps"]]
+    summary["plan"] = plan["steps"]
+    if not blocks:
+        return finish("no_commands", "The plan contained no steps")
+
+    summary["blocks"] = [{
+        "type": step["type"],
+        "command": outcome["command"],
+        "returncode": outcome["result"].returncode,
+        "attempts": outcome["attempts"],
+        "elapsed": round(outcome["elapsed"], 1),
+    } for step, outcome in zip(plan["steps"], outcomes)]
+    summary["campaigns"] = [name for outcome in outcomes for name in outcome["campaigns"]]
+
+    if any(outcome["success"] and 'afl-fuzz' in outcome["command"] for outcome in outcomes):
+        return finish("fuzzing")
+    if len(outcomes) < len(blocks) or (deadline is not None and time.time() > deadline):
+        return finish("timeout", f"Ran {len(outcomes)} of {len(blocks)} blocks before the timeout")
+    if all(outcome["success"] for outcome in outcomes):
+        return finish("built")
+    return finish("failed")
@@ -0,0 +1,77 @@
+import json
+import re
+import sqlite3
+import time
+
+
+def init_plan_db(db_path):
+    """Create the plan cache table if it does not exist."""
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS plans (
+                repo_url TEXT NOT NULL,
+                commit_sha TEXT NOT NULL,
+                playbook_version TEXT NOT NULL,
+                request_key TEXT NOT NULL,
+                plan TEXT NOT NULL,
+                created_at REAL,
+                last_used_at REAL,
+                replays INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (repo_url, commit_sha, playbook_version, request_key)
+            )
+        """)
+
+
+def request_key(user_input, git_url):
+    """Normalize a request so rewordings of the same ask share a cached plan.
+
+    The repo URL and the [flare-execute] tag are dropped, and case,
+    punctuation and whitespace are ignored.
+    """
+    text = user_input.replace(git_url, ' ') if git_url else user_input
+    text = re.sub(r'\[?flare-execute\]?', ' ', text, flags=re.IGNORECASE)
+    return ' '.join(re.findall(r'[a-z0-9]+', text.lower()))
+
+
+def _key_values(key):
+    return (key["repo_url"], key["commit_sha"], key["playbook_version"], key["request_key"])
+
+
+def get_plan(db_path, key):
+    """Return the cached plan for a key, or None."""
+    init_plan_db(db_path)
+    with sqlite3.connect(db_path) as conn:
+        row = conn.execute(
+            "SELECT plan FROM plans WHERE repo_url = ? AND commit_sha = ? AND playbook_version = ? "
+            "AND request_key = ?", _key_values(key)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def store_plan(db_path, key, plan):
+    """Cache a plan that executed successfully, replacing any older one for the key."""
+    init_plan_db(db_path)
+    now = time.time()
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO plans (repo_url, commit_sha, playbook_version, request_key, plan, "
+            "created_at, last_used_at, replays) VALUES (?, ?, ?, ?, ?, ?, ?, 0)",
+            _key_values(key) + (json.dumps(plan), now, now))
+
+
+def record_replay(db_path, key):
+    """Count a successful replay of a cached plan."""
+    init_plan_db(db_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "UPDATE plans SET replays = replays + 1, last_used_at = ? WHERE repo_url = ? "
+            "AND commit_sha = ? AND playbook_version = ? AND request_key = ?",
+            (time.time(),) + _key_values(key))
+
+
+def invalidate(db_path, key):
+    """Drop a cached plan that failed to replay."""
+    init_plan_db(db_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "DELETE FROM plans WHERE repo_url = ? AND commit_sha = ? AND playbook_version = ? "
+            "AND request_key = ?", _key_values(key))
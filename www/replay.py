@@ -0,0 +1,417 @@
+import os
+import re
+import select
+import shutil
+import signal
+import sqlite3
+import struct
+import subprocess
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import targets
+import workspace
+from triage import file_sha1
+
+# AFL++ forkserver file descriptors: the target reads commands from 198 and writes status to 199
+FORKSRV_FD = 198
+
+# New forkserver protocol (AFL++ 4.20+): hello is FS_NEW_VERSION_BASE + version
+FS_NEW_VERSION_BASE = 0x41464c00
+FS_NEW_VERSION_MIN = 1
+FS_NEW_VERSION_MAX = 1
+FS_NEW_OPT_MAPSIZE = 0x00000001
+FS_NEW_OPT_SHDMEM_FUZZ = 0x00000002
+FS_NEW_OPT_AUTODICT = 0x00000800
+
+# Old protocol option bits in the hello word
+FS_OPT_ENABLED = 0x80000001
+FS_OPT_SHDMEM_FUZZ = 0x01000000
+FS_OPT_AUTODICT = 0x10000000
+
+# Seconds allowed for the target's static init and the handshake
+HANDSHAKE_TIMEOUT = 10
+
+# Per-input limit in seconds; the child is SIGKILLed when it runs longer
+REPLAY_TIMEOUT = 5
+
+REPLAY_WORKERS = os.cpu_count() or 1
+
+# Captured stdout/stderr are cut to their last this many bytes per input
+MAX_OUTPUT_BYTES = 64 * 1024
+
+# Crash like AFL sees it (abort instead of exit code 1) but keep readable traces
+SANITIZER_ENV = {
+    "ASAN_OPTIONS": "abort_on_error=1:symbolize=1:detect_leaks=0:allocator_may_return_null=1",
+    "UBSAN_OPTIONS": "halt_on_error=1:abort_on_error=1:print_stacktrace=1",
+    "MSAN_OPTIONS": "exit_code=86:abort_on_error=1:symbolize=1",
+}
+
+REPLAY_DIR = os.path.join(workspace.FLARE_WORKSPACE, 'replay')
+
+# Start of an ASan/MSan/TSan/LSan report, or a UBSan runtime error line
+SANITIZER_START_PATTERN = re.compile(r'^(?:==\d+==\s*(?:ERROR|WARNING): \w*Sanitizer|\S+:\d+:\d+: runtime error:)',
+                                     re.MULTILINE)
+SANITIZER_SUMMARY_PATTERN = re.compile(r'^SUMMARY: .*$', re.MULTILINE)
+
+
+def _read_exact(fd, size, timeout):
+    """Read exactly size bytes from a pipe, or return None on timeout or EOF."""
+    data = b''
+    deadline = time.monotonic() + timeout
+    while len(data) < size:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+            return None
+        chunk = os.read(fd, size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def _read_u32(fd, timeout):
+    data = _read_exact(fd, 4, timeout)
+    return struct.unpack('=I', data)[0] if data else None
+
+
+def _read_tail(fd):
+    """Return what the target wrote to a capture file, keeping the end if it is long."""
+    size = os.fstat(fd).st_size
+    start = max(0, size - MAX_OUTPUT_BYTES)
+    return os.pread(fd, size - start, start).decode(errors='replace')
+
+
+def _reset(fd):
+    os.ftruncate(fd, 0)
+    os.lseek(fd, 0, os.SEEK_SET)
+
+
+def _replay_env():
+    env = dict(os.environ)
+    for name, value in SANITIZER_ENV.items():
+        env.setdefault(name, value)
+    # Replays do not need a coverage map; the target falls back to its built-in one
+    env.pop('__AFL_SHM_ID', None)
+    return env
+
+
+def _result(status, returncode, stdout, stderr, elapsed):
+    """Normalize a replay outcome; returncode is negative for signals like subprocess's."""
+    signal_name = None
+    if returncode is not None and returncode < 0:
+        try:
+            signal_name = signal.Signals(-returncode).name
+        except ValueError:
+            signal_name = f"signal {-returncode}"
+    return {"status": status, "returncode": returncode, "signal": signal_name,
+            "stdout": stdout, "stderr": stderr, "elapsed": elapsed}
+
+
+class ForkserverReplayer:
+    """Replays inputs through an AFL++-instrumented target's forkserver.
+
+    The target is exec'd once; every input runs in a fork of that warm
+    process, so static initialization and dynamic linking are paid once.
+    Inputs reach the child the way the campaign delivered them (@@ file or
+    stdin), and its stdout/stderr go to capture files reset before each run.
+    """
+
+    def __init__(self, campaign, timeout=REPLAY_TIMEOUT):
+        self.timeout = timeout
+        self.work_dir = os.path.join(REPLAY_DIR, uuid.uuid4().hex[:12])
+        os.makedirs(self.work_dir)
+        self.input_path = os.path.join(self.work_dir, 'cur_input')
+        self.argv, stdin_path = targets.replay_command(campaign, self.input_path)
+        # Same directory as exec_replay, so relative paths in the arguments agree
+        self.cwd = targets.replay_cwd(campaign)
+        self.stdin_mode = stdin_path is not None
+        self.process = None
+        self.child_killed = False
+        self.version = None
+
+    def _open_capture(self, name):
+        return os.open(os.path.join(self.work_dir, name), os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+
+    def start(self):
+        """Launch the target and complete the forkserver handshake; False if it has none."""
+        self.input_fd = self._open_capture('cur_input')
+        self.stdout_fd = self._open_capture('stdout')
+        self.stderr_fd = self._open_capture('stderr')
+        ctl_read, self.ctl_fd = os.pipe()
+        self.status_fd, status_write = os.pipe()
+
+        # bash moves the pipes to the forkserver descriptors and execs the target; a
+        # preexec_fn doing the dup2 is not safe in the threaded web server
+        trampoline = (f'exec "$@" {FORKSRV_FD}<&{ctl_read} {FORKSRV_FD + 1}>&{status_write} '
+                      f'{ctl_read}<&- {status_write}>&-')
+        try:
+            self.process = subprocess.Popen(
+                ['/bin/bash', '-c', trampoline, 'flare-forkserver'] + self.argv,
+                stdin=self.input_fd if self.stdin_mode else subprocess.DEVNULL,
+                stdout=self.stdout_fd, stderr=self.stderr_fd, env=_replay_env(),
+                cwd=self.cwd, pass_fds=(ctl_read, status_write), start_new_session=True)
+        except OSError as e:
+            print(f"Forkserver replay could not start {self.argv[0]}: {e}")
+            return False
+        finally:
+            os.close(ctl_read)
+            os.close(status_write)
+
+        try:
+            if self._handshake():
+                return True
+        except OSError as e:
+            print(f"Forkserver handshake with {self.argv[0]} failed: {e}")
+        self.close()
+        return False
+
+    def _handshake(self):
+        hello = _read_u32(self.status_fd, HANDSHAKE_TIMEOUT)
+        if hello is None:
+            return False  # not instrumented, or it exited/hung before starting the forkserver
+
+        if (hello & 0xffffff00) == FS_NEW_VERSION_BASE:
+            version = hello - FS_NEW_VERSION_BASE
+            if not FS_NEW_VERSION_MIN <= version <= FS_NEW_VERSION_MAX:
+                print(f"Unsupported forkserver version {version}")
+                return False
+            os.write(self.ctl_fd, struct.pack('=I', hello ^ 0xffffffff))
+            options = _read_u32(self.status_fd, HANDSHAKE_TIMEOUT)
+            if options is None:
+                return False
+            if options & FS_NEW_OPT_SHDMEM_FUZZ:
+                print("Target requires shared-memory test cases; replaying with exec instead")
+                return False
+            if options & FS_NEW_OPT_MAPSIZE and _read_u32(self.status_fd, HANDSHAKE_TIMEOUT) is None:
+                return False
+            if options & FS_NEW_OPT_AUTODICT:
+                dict_size = _read_u32(self.status_fd, HANDSHAKE_TIMEOUT)
+                if dict_size is None or (dict_size and _read_exact(
+                        self.status_fd, dict_size, HANDSHAKE_TIMEOUT) is None):
+                    return False
+            # The forkserver ends the handshake by echoing its version
+            if _read_u32(self.status_fd, HANDSHAKE_TIMEOUT) != hello:
+                return False
+            self.version = version
+            return True
+
+        # Old protocol: only an autodict offer needs an answer
+        if (hello & FS_OPT_ENABLED) == FS_OPT_ENABLED and hello & FS_OPT_SHDMEM_FUZZ:
+            print("Target requires shared-memory test cases; replaying with exec instead")
+            return False
+        if (hello & FS_OPT_ENABLED) == FS_OPT_ENABLED and hello & FS_OPT_AUTODICT:
+            os.write(self.ctl_fd, struct.pack('=I', FS_OPT_ENABLED | FS_OPT_AUTODICT))
+            dict_size = _read_u32(self.status_fd, HANDSHAKE_TIMEOUT)
+            if dict_size is None or (dict_size and _read_exact(
+                    self.status_fd, dict_size, HANDSHAKE_TIMEOUT) is None):
+                return False
+        self.version = 0
+        return True
+
+    def _write_input(self, data):
+        if self.stdin_mode:
+            _reset(self.input_fd)
+            os.pwrite(self.input_fd, data, 0)
+            # The child shares this file offset, so rewind it for the next read
+            os.lseek(self.input_fd, 0, os.SEEK_SET)
+        else:
+            with open(self.input_path, 'wb') as f:
+                f.write(data)
+
+    def run(self, data):
+        """Run one input in a fresh fork. Returns the replay result, or None if the forkserver died."""
+        self._write_input(data)
+        _reset(self.stdout_fd)
+        _reset(self.stderr_fd)
+        start = time.monotonic()
+        try:
+            # Tell the forkserver whether we killed the previous child (matters for persistent mode)
+            os.write(self.ctl_fd, struct.pack('=I', int(self.child_killed)))
+        except OSError:
+            return None
+        child_pid = _read_u32(self.status_fd, HANDSHAKE_TIMEOUT)
+        if not child_pid:
+            return None
+
+        self.child_killed = False
+        status = _read_u32(self.status_fd, self.timeout)
+        if status is None:
+            try:
+                os.kill(child_pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            self.child_killed = True
+            status = _read_u32(self.status_fd, HANDSHAKE_TIMEOUT)
+            if status is None:
+                return None
+        elapsed = time.monotonic() - start
+
+        stdout, stderr = _read_tail(self.stdout_fd), _read_tail(self.stderr_fd)
+        if self.child_killed:
+            return _result("timeout", -signal.SIGKILL, stdout, stderr, elapsed)
+        if os.WIFSTOPPED(status):
+            # A persistent-mode iteration finished; the child waits for the next input
+            return _result("ok", 0, stdout, stderr, elapsed)
+        if os.WIFSIGNALED(status):
+            return _result("crash", -os.WTERMSIG(status), stdout, stderr, elapsed)
+        return _result("ok", os.WEXITSTATUS(status), stdout, stderr, elapsed)
+
+    def close(self):
+        if self.process and self.process.poll() is None:
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            self.process.wait()
+        for name in ('ctl_fd', 'status_fd', 'input_fd', 'stdout_fd', 'stderr_fd'):
+            fd = getattr(self, name, None)
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+                setattr(self, name, None)
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+def exec_replay(campaign, input_path, timeout=REPLAY_TIMEOUT):
+    """Replay one input by starting the target from scratch."""
+    argv, stdin_path = targets.replay_command(campaign, input_path)
+    start = time.monotonic()
+    stdin_file = open(stdin_path, 'rb') if stdin_path else subprocess.DEVNULL
+    try:
+        process = subprocess.Popen(argv, stdin=stdin_file, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   env=_replay_env(), cwd=targets.replay_cwd(campaign),
+                                   start_new_session=True)
+        try:
+            stdout, stderr = process.communicate(timeout=timeout)
+            status = "crash" if process.returncode < 0 else "ok"
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            stdout, stderr = process.communicate()
+            status = "timeout"
+    except OSError as e:
+        return dict(_result("error", None, "", str(e), 0.0), error=str(e))
+    finally:
+        if stdin_path:
+            stdin_file.close()
+    return _result(status, process.returncode if status != "timeout" else -signal.SIGKILL,
+                   stdout[-MAX_OUTPUT_BYTES:].decode(errors='replace'),
+                   stderr[-MAX_OUTPUT_BYTES:].decode(errors='replace'), time.monotonic() - start)
+
+
+def _replay_shard(campaign, paths, timeout):
+    """Replay a shard of inputs through one forkserver, restarting it if it dies."""
+    results = {}
+    replayer = None
+    forkserver = True
+    for path in paths:
+        result = None
+        if forkserver:
+            if replayer is None:
+                replayer = ForkserverReplayer(campaign, timeout)
+                if not replayer.start():
+                    replayer = None
+                    forkserver = False  # no forkserver in this binary; exec the rest
+            if replayer is not None:
+                with open(path, 'rb') as f:
+                    result = replayer.run(f.read())
+                if result is None:
+                    replayer.close()
+                    replayer = None  # the forkserver died; start a new one for the next input
+        if result is None:
+            result = exec_replay(campaign, path, timeout)
+            result["mode"] = "exec"
+        else:
+            result["mode"] = "forkserver"
+        results[path] = result
+    if replayer is not None:
+        replayer.close()
+    return results
+
+
+def replay_inputs(campaign, paths, timeout=REPLAY_TIMEOUT, workers=REPLAY_WORKERS):
+    """Replay many inputs against a campaign's target, one warm forkserver per worker.
+
+    Returns {path: result} where each result has status ('ok', 'crash',
+    'timeout' or 'error'), returncode (negative for signals), signal name,
+    stdout, stderr, elapsed seconds and mode ('forkserver' or 'exec').
+    """
+    if not paths or not campaign.get("binary_path"):
+        return {}
+    workers = max(1, min(workers, len(paths)))
+    shards = [paths[i::workers] for i in range(workers)]
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for shard_results in pool.map(lambda shard: _replay_shard(campaign, shard, timeout), shards):
+            results.update(shard_results)
+    return results
+
+
+def sanitizer_trace(stderr):
+    """Cut the sanitizer report (error line to SUMMARY) out of a replay's stderr, or return None."""
+    start = SANITIZER_START_PATTERN.search(stderr or "")
+    if not start:
+        return None
+    end = SANITIZER_SUMMARY_PATTERN.search(stderr, start.start())
+    return stderr[start.start():end.end() if end else len(stderr)]
+
+
+def init_replay_db(db_path):
+    """Create the replay cache table if it does not exist."""
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS replays (
+                target TEXT NOT NULL,
+                input_path TEXT NOT NULL,
+                sha1 TEXT,
+                status TEXT,
+                returncode INTEGER,
+                signal TEXT,
+                stdout TEXT,
+                stderr TEXT,
+                elapsed REAL,
+                mode TEXT,
+                replayed_at REAL,
+                PRIMARY KEY (target, input_path)
+            )
+        """)
+
+
+def store_replays(db_path, target_name, results):
+    """Cache replay results ({path: result}) so detail views do not rerun the target."""
+    init_replay_db(db_path)
+    rows = []
+    for path, result in results.items():
+        if result["status"] == "error":
+            continue  # the target could not start; try again next time
+        try:
+            sha1 = file_sha1(path)
+        except OSError:
+            continue
+        rows.append((target_name, path, sha1, result["status"], result["returncode"], result["signal"],
+                     result["stdout"], result["stderr"], result["elapsed"], result.get("mode"), time.time()))
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany("INSERT OR REPLACE INTO replays VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+
+def replay_cached(db_path, campaign, input_path):
+    """Return the cached replay of an input, replaying it now if it is missing or the file changed."""
+    init_replay_db(db_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.row_factory = sqlite3.Row
+        row = conn.execute("SELECT * FROM replays WHERE target = ? AND input_path = ?",
+                           (campaign["name"], input_path)).fetchone()
+    try:
+        sha1 = file_sha1(input_path)
+    except OSError:
+        sha1 = None
+    if row is not None and row["sha1"] == sha1:
+        return dict(row)
+    results = replay_inputs(campaign, [input_path], workers=1)
+    if input_path not in results:
+        return None
+    store_replays(db_path, campaign["name"], results)
+    return dict(results[input_path], input_path=input_path, sha1=sha1)
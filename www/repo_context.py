@@ -0,0 +1,243 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import harness_index
+import workspace
+
+# Cloned repositories are kept here, one directory per URL
+REPO_CACHE_DIR = os.path.join(workspace.FLARE_WORKSPACE, 'repo_cache')
+
+# Seconds a prefetched context stays fresh before the repo is cloned again
+REPO_CACHE_TTL = 15 * 60
+
+PREFETCH_WORKERS = 2
+
+# Size limits for build files copied into the prompt
+MAX_BUILD_FILE_CHARS = 8000
+MAX_BUILD_CONTEXT_CHARS = 40000
+
+# Files that identify a build system, by file name
+BUILD_SYSTEM_FILES = {
+    "cmake": ("CMakeLists.txt",),
+    "meson": ("meson.build", "meson_options.txt"),
+    "autotools": ("configure.ac", "configure.in", "Makefile.am", "autogen.sh", "bootstrap"),
+    "cargo": ("Cargo.toml",),
+    "bazel": ("WORKSPACE", "WORKSPACE.bazel", "MODULE.bazel", "BUILD", "BUILD.bazel"),
+    "make": ("Makefile", "GNUmakefile", "makefile"),
+}
+
+# At most this many files of one build system are extracted (shallowest first)
+MAX_FILES_PER_SYSTEM = 3
+
+SOURCE_EXTENSIONS = ('.c', '.cc', '.cpp', '.cxx', '.rs')
+
+_executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS)
+_cache = {}
+_cache_lock = threading.Lock()
+
+# repo_dir -> list of relative file and directory paths, built by one walk per clone
+_index_cache = {}
+_index_lock = threading.Lock()
+
+# Serializes swapping fresh clones into the cache
+_checkout_lock = threading.Lock()
+
+
+def get_repo_index(repo_dir):
+    """Walk the repository once and cache the relative paths of its files."""
+    with _index_lock:
+        if repo_dir in _index_cache:
+            return _index_cache[repo_dir]
+    index = []
+    for root, dirs, files in os.walk(repo_dir):
+        # The .git internals are noise for the prompt
+        dirs[:] = [d for d in dirs if d != '.git']
+        for name in dirs + files:
+            index.append(os.path.relpath(os.path.join(root, name), repo_dir))
+    with _index_lock:
+        _index_cache[repo_dir] = index
+    return index
+
+
+def get_repo_tree(repo_dir):
+    """Generate a directory tree of the Git repository."""
+    return "\n".join(get_repo_index(repo_dir))
+
+
+def detect_build_files(repo_dir):
+    """Return ({build_system: [paths]}, [fuzzing-related paths]) from the cached index."""
+    build_files = {}
+    fuzz_files = []
+    for path in get_repo_index(repo_dir):
+        name = os.path.basename(path)
+        for system, names in BUILD_SYSTEM_FILES.items():
+            if name in names:
+                build_files.setdefault(system, []).append(path)
+        lowered = path.lower()
+        # oss-fuzz build scripts and existing harness sources
+        if ('oss-fuzz' in lowered or 'ossfuzz' in lowered) and name == 'build.sh':
+            fuzz_files.append(path)
+        elif 'fuzz' in lowered and name.endswith(SOURCE_EXTENSIONS):
+            fuzz_files.append(path)
+
+    depth = lambda p: (p.count(os.sep), p)
+    for system in build_files:
+        build_files[system] = sorted(build_files[system], key=depth)[:MAX_FILES_PER_SYSTEM]
+    return build_files, sorted(fuzz_files, key=depth)
+
+
+def get_fuzz_targets(repo_dir):
+    """Return the ranked fuzz target candidates for a cloned repo."""
+    return harness_index.find_fuzz_targets(repo_dir, get_repo_index(repo_dir))
+
+
+def read_limited(path, limit=MAX_BUILD_FILE_CHARS):
+    """Read at most limit characters of a text file, marking truncation."""
+    with open(path, 'r', errors='replace') as f:
+        content = f.read(limit + 1)
+    if len(content) > limit:
+        content = content[:limit] + "\n... [truncated]"
+    return content
+
+
+def get_build_context(repo_dir):
+    """Collect the highest-signal build files for the prompt within the size budget."""
+    build_files, fuzz_files = detect_build_files(repo_dir)
+    context = ""
+    if build_files:
+        context += f"{{Build Systems}}: {', '.join(sorted(build_files))}\n"
+
+    # Top-level build files first, then anything fuzzing-specific
+    candidates = sorted((p for paths in build_files.values() for p in paths),
+                        key=lambda p: (p.count(os.sep), p)) + fuzz_files
+    used = len(context)
+    for path in candidates:
+        if used >= MAX_BUILD_CONTEXT_CHARS:
+            context += "{Omitted}: further build files exceed the context budget\n"
+            break
+        full_path = os.path.join(repo_dir, path)
+        if not os.path.isfile(full_path):
+            continue
+        content = read_limited(full_path, min(MAX_BUILD_FILE_CHARS, MAX_BUILD_CONTEXT_CHARS - used))
+        section = f"{{{path}}}:\n{content}\n"
+        context += section
+        used += len(section)
+    return context
+
+
+def get_git():
+    """Import GitPython (git, gitdb, smmap) on first use rather than at server startup."""
+    import git  # GitPython for handling Git repositories
+    return git
+
+
+def repo_dir_for(git_url):
+    """Return the cache directory used for a repository URL."""
+    return os.path.join(REPO_CACHE_DIR, hashlib.sha1(git_url.encode()).hexdigest()[:16])
+
+
+def clone_into_cache(git, git_url, repo_dir):
+    """Clone a repo next to its cache directory and swap it into place.
+
+    Readers of the previous checkout keep a complete tree until the swap,
+    and a failed clone leaves the previous checkout untouched.
+    """
+    os.makedirs(REPO_CACHE_DIR, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='.clone-', dir=REPO_CACHE_DIR)
+    try:
+        # Only the working tree is needed for context, so skip the history
+        git.Repo.clone_from(git_url, staging, depth=1)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    with _checkout_lock:
+        retired = None
+        if os.path.exists(repo_dir):
+            # A directory cannot be replaced while it has contents, so move the old one aside first
+            retired = staging + '.old'
+            os.rename(repo_dir, retired)
+        os.rename(staging, repo_dir)
+    if retired:
+        shutil.rmtree(retired, ignore_errors=True)
+
+
+def build_repo_details(git_url):
+    """Clone the repo and collect the details (README, build files, Tree) for the prompt."""
+    # Resolved up front: the except clause below must not import GitPython itself
+    try:
+        git = get_git()
+    except ImportError as e:
+        return f"Error processing Git repository: GitPython is not available ({e})"
+    try:
+        repo_dir = repo_dir_for(git_url)
+        print(f"Cloning repository from {git_url}")
+        clone_into_cache(git, git_url, repo_dir)
+        with _index_lock:
+            _index_cache.pop(repo_dir, None)
+
+        # Check for README files
+        readme_files = ['README.md', 'readme.md', 'README.rst', 'readme.rst', 'readme.txt', 'README.txt']
+        readme_content = ''
+        for readme in readme_files:
+            readme_path = os.path.join(repo_dir, readme)
+            if os.path.isfile(readme_path):
+                with open(readme_path, 'r', errors='replace') as readme_file:
+                    readme_content = readme_file.read()
+                break  # Stop after the first README file is found
+
+        # Build system files (Makefile, CMakeLists.txt, configure.ac, ...) and fuzzing files
+        build_context = get_build_context(repo_dir)
+
+        # Rank existing harnesses and file-reading mains as fuzz targets
+        candidates_section = harness_index.format_candidates(get_fuzz_targets(repo_dir))
+
+        # Get the file structure (tree) of the repository
+        tree_output = get_repo_tree(repo_dir)
+
+        # Prepare the content to be added to the user prompt
+        repo_details = ""
+        if readme_content:
+            repo_details += f"{{README}}:\n{readme_content}\n"
+        repo_details += build_context
+        repo_details += candidates_section
+        repo_details += f"{{Tree}}:\n{tree_output}\n"
+
+        return repo_details
+
+    except git.exc.GitCommandError as e:
+        return f"Error cloning repository: {str(e)}"
+    except Exception as e:
+        return f"Error processing Git repository: {str(e)}"
+
+
+def prefetch(git_url):
+    """Start cloning and summarizing a repo in the background unless a fresh copy is cached."""
+    with _cache_lock:
+        entry = _cache.get(git_url)
+        if entry and time.time() - entry["started"] < REPO_CACHE_TTL:
+            future = entry["future"]
+            # Failed clones are retried rather than cached
+            if not (future.done() and future.result().startswith("Error")):
+                return entry
+        entry = {"started": time.time(), "future": _executor.submit(build_repo_details, git_url)}
+        _cache[git_url] = entry
+        return entry
+
+
+def prefetch_status(git_url):
+    """Return 'warming', 'ready' or 'missing' for a repository URL."""
+    with _cache_lock:
+        entry = _cache.get(git_url)
+    if entry is None:
+        return "missing"
+    return "ready" if entry["future"].done() else "warming"
+
+
+def get_repo_details(git_url):
+    """Return the repo details, reusing (or waiting for) a prefetch when there is one."""
+    return prefetch(git_url)["future"].result()
@@ -1,6 +1,35 @@
 document.addEventListener('DOMContentLoaded', () => {
     console.log('scripts.js loaded');
-    console.log('Marked.js:', typeof marked); // Debugging: Should output 'function'
+
+    // One server-side conversation per browser tab
+    let sessionId = sessionStorage.getItem('flare-session-id');
+    if (!sessionId) {
+        sessionId = (window.crypto && crypto.randomUUID) ? crypto.randomUUID() : `${Date.now()}-${Math.random()}`;
+        sessionStorage.setItem('flare-session-id', sessionId);
+    }
+
+    // Start cloning a repository as soon as its URL appears in the input box,
+    // so the context is already cached when the message is sent
+    const gitUrlPattern = /(https?:\/\/[^\s"']+\.git)/;
+    let lastPrefetchedUrl = null;
+    let prefetchTimer = null;
+    const chatInput = document.getElementById('chat-input');
+    if (chatInput) {
+        chatInput.addEventListener('input', () => {
+            clearTimeout(prefetchTimer);
+            prefetchTimer = setTimeout(() => {
+                const match = chatInput.value.match(gitUrlPattern);
+                if (match && match[1] !== lastPrefetchedUrl) {
+                    lastPrefetchedUrl = match[1];
+                    fetch('/prefetch', {
+                        method: 'POST',
+                        headers: { 'Content-Type': 'application/json' },
+                        body: JSON.stringify({ url: match[1] }),
+                    }).catch((error) => console.error('Prefetch error:', error));
+                }
+            }, 500);
+        });
+    }
 
     function sendMessage() {
         const message = document.getElementById('chat-input').value;
@@ -24,56 +53,55 @@ document.addEventListener('DOMContentLoaded', () => {
         fetch('/chat', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ message }),
+            body: JSON.stringify({ message, session_id: sessionId }),
         })
             .then((response) => response.json())
             .then((data) => {
                 const botMessage = document.createElement('div');
                 botMessage.className = 'message bot-message';
 
-                if (data.response) {
-                    // Extract Markdown enclosed in triple backticks (```), removing programming language
-                    const markdownBlocks = [];
-                    const regex = /```(\w+)?\n([\s\S]*?)```/g; // Captures optional language and content
-                    let match;
-
-                    while ((match = regex.exec(data.response)) !== null) {
-                        markdownBlocks.push(match[2]); // Extract only the content, ignoring the language
+                if (data.response !== undefined) {
+                    // The server sends the explanation and the validated plan steps separately
+                    if (data.response.trim()) {
+                        const messageDiv = document.createElement('div');
+                        messageDiv.textContent = data.response.trim();
+                        botMessage.appendChild(messageDiv);
                     }
 
-                    // Render entire response without Markdown blocks as normal text
-                    const cleanResponse = data.response.replace(regex, '').trim();
-                    if (cleanResponse) {
-                        const cleanTextDiv = document.createElement('div');
-                        cleanTextDiv.textContent = cleanResponse;
-                        botMessage.appendChild(cleanTextDiv);
-                    }
+                    const steps = data.plan ? data.plan.steps : [];
+                    steps.forEach((step) => {
+                        const stepTitle = document.createElement('div');
+                        stepTitle.className = 'plan-step-title';
+                        stepTitle.textContent = step.description ? `${step.type}: ${step.description}` : step.type;
 
-                    // Render each Markdown block with a copy button
-                    markdownBlocks.forEach((block) => {
-                        const botMessageContent = document.createElement('div');
-                        botMessageContent.className = 'markdown-content';
-                        if (typeof marked === 'function') {
-                            botMessageContent.innerHTML = marked(block);
-                        } else {
-                            console.error('Marked.js not loaded properly.');
-                            botMessageContent.textContent = block;
-                        }
+                        const stepCommand = document.createElement('pre');
+                        stepCommand.className = 'markdown-content';
+                        const code = document.createElement('code');
+                        code.textContent = step.command;
+                        stepCommand.appendChild(code);
 
                         const copyButton = document.createElement('button');
                         copyButton.className = 'copy-button';
                         copyButton.textContent = 'Copy';
                         copyButton.onclick = () => {
-                            navigator.clipboard.writeText(block).then(() => {
-                                alert('Markdown copied to clipboard!');
+                            navigator.clipboard.writeText(step.command).then(() => {
+                                alert('Command copied to clipboard!');
                             });
                         };
 
-                        botMessage.appendChild(botMessageContent);
+                        botMessage.appendChild(stepTitle);
+                        botMessage.appendChild(stepCommand);
                         botMessage.appendChild(copyButton);
                     });
+
+                    if (data.plan_errors) {
+                        const errorsDiv = document.createElement('div');
+                        errorsDiv.className = 'plan-errors';
+                        errorsDiv.textContent = `Invalid plan: ${data.plan_errors.join('; ')}`;
+                        botMessage.appendChild(errorsDiv);
+                    }
                 } else {
-                    botMessage.textContent = 'Sorry, I encountered an error.';
+                    botMessage.textContent = data.error ? `Error: ${data.error}` : 'Sorry, I encountered an error.';
                 }
 
                 // Add flare-execute output and interpretation if present
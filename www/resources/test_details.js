@@ -0,0 +1,302 @@
+document.addEventListener('DOMContentLoaded', () => {
+    const details = document.getElementById('details');
+    if (!details) {
+        return;
+    }
+
+    // Campaign names may be nested paths (the routes take <path:test_id>)
+    const testId = details.dataset.testId.split('/').map(encodeURIComponent).join('/');
+    const baseUrl = `/tests/${testId}`;
+
+    // plot_data columns charted, with their titles
+    const CHART_SERIES = [
+        ['corpus_count', 'Corpus size'],
+        ['saved_crashes', 'Saved crashes'],
+        ['edges_found', 'Edges found'],
+        ['execs_per_sec', 'Execs per second'],
+    ];
+    const CHART_COLORS = ['#1f77b4', '#d62728', '#2ca02c', '#ff7f0e', '#9467bd', '#8c564b'];
+    const CHART_WIDTH = 420;
+    const CHART_HEIGHT = 200;
+    const SVG_NS = 'http://www.w3.org/2000/svg';
+
+    function getJson(url) {
+        return fetch(url).then((response) => response.json().then((data) => {
+            if (!response.ok) {
+                throw new Error(data.error || response.statusText);
+            }
+            return data;
+        }));
+    }
+
+    function cell(row, text) {
+        const td = document.createElement('td');
+        td.textContent = text;
+        row.appendChild(td);
+        return td;
+    }
+
+    // Renders Previous/Next controls for a paginated JSON listing
+    function renderPager(container, data, loadPage) {
+        container.innerHTML = '';
+        const pages = Math.max(1, Math.ceil(data.total / data.per_page));
+        if (pages === 1) {
+            return;
+        }
+        const previous = document.createElement('button');
+        previous.textContent = 'Previous';
+        previous.disabled = data.page <= 1;
+        previous.addEventListener('click', () => loadPage(data.page - 1));
+        const label = document.createElement('span');
+        label.textContent = `Page ${data.page} of ${pages}`;
+        const next = document.createElement('button');
+        next.textContent = 'Next';
+        next.disabled = data.page >= pages;
+        next.addEventListener('click', () => loadPage(data.page + 1));
+        container.append(previous, label, next);
+    }
+
+    function drawChart(title, column, instances) {
+        const chart = document.createElement('div');
+        chart.className = 'chart';
+        const heading = document.createElement('h4');
+        heading.textContent = title;
+        chart.appendChild(heading);
+
+        const lines = [];
+        let maxX = 0;
+        let maxY = 0;
+        Object.entries(instances).forEach(([name, series]) => {
+            const index = series.columns.indexOf(column);
+            if (index === -1 || !series.points.length) {
+                return;
+            }
+            const points = series.points.map((point) => [point[0], point[index]]);
+            points.forEach(([x, y]) => {
+                maxX = Math.max(maxX, x);
+                maxY = Math.max(maxY, y);
+            });
+            lines.push([name, points]);
+        });
+        if (!lines.length) {
+            return null;
+        }
+
+        const svg = document.createElementNS(SVG_NS, 'svg');
+        svg.setAttribute('width', CHART_WIDTH);
+        svg.setAttribute('height', CHART_HEIGHT);
+        lines.forEach(([name, points], lineIndex) => {
+            const polyline = document.createElementNS(SVG_NS, 'polyline');
+            const coordinates = points.map(([x, y]) => {
+                const px = maxX ? (x / maxX) * (CHART_WIDTH - 10) + 5 : 5;
+                const py = CHART_HEIGHT - 5 - (maxY ? (y / maxY) * (CHART_HEIGHT - 10) : 0);
+                return `${px.toFixed(1)},${py.toFixed(1)}`;
+            });
+            polyline.setAttribute('points', coordinates.join(' '));
+            polyline.setAttribute('fill', 'none');
+            polyline.setAttribute('stroke', CHART_COLORS[lineIndex % CHART_COLORS.length]);
+            const tooltip = document.createElementNS(SVG_NS, 'title');
+            tooltip.textContent = name;
+            polyline.appendChild(tooltip);
+            svg.appendChild(polyline);
+        });
+        chart.appendChild(svg);
+
+        const legend = document.createElement('p');
+        const hours = (maxX / 3600).toFixed(1);
+        legend.textContent = `Max ${maxY} over ${hours}h. ` +
+            lines.map(([name], i) => `${name} (${CHART_COLORS[i % CHART_COLORS.length]})`).join(', ');
+        chart.appendChild(legend);
+        return chart;
+    }
+
+    function loadCharts() {
+        const chartsDiv = document.getElementById('charts');
+        getJson(`${baseUrl}/plot`)
+            .then((data) => {
+                chartsDiv.innerHTML = '';
+                CHART_SERIES.forEach(([column, title]) => {
+                    const chart = drawChart(title, column, data.instances);
+                    if (chart) {
+                        chartsDiv.appendChild(chart);
+                    }
+                });
+                if (!chartsDiv.children.length) {
+                    chartsDiv.textContent = 'No plot_data found for this target.';
+                }
+            })
+            .catch((error) => {
+                chartsDiv.textContent = `Could not load plot data: ${error.message}`;
+            });
+    }
+
+    function loadReplay(crashPath, output) {
+        output.textContent = 'Replaying...';
+        getJson(`${baseUrl}/replay?path=${encodeURIComponent(crashPath)}`)
+            .then((result) => {
+                let text = `Exit code: ${result.returncode}`;
+                if (result.signal) {
+                    text += ` (${result.signal})`;
+                }
+                text += `, ${result.status}, replayed via ${result.mode || 'cache'}\n`;
+                if (result.reproducer !== crashPath) {
+                    text += `Minimized reproducer: ${result.reproducer}\n`;
+                }
+                if (result.sanitizer_trace) {
+                    text += `\nSanitizer trace:\n${result.sanitizer_trace}\n`;
+                }
+                text += `\nstdout:\n${result.stdout}\n\nstderr:\n${result.stderr}`;
+                output.textContent = text;
+            })
+            .catch((error) => {
+                output.textContent = `Replay failed: ${error.message}`;
+            });
+    }
+
+    function loadBucketCrashes(majorHash, container, page) {
+        getJson(`${baseUrl}/buckets/${encodeURIComponent(majorHash)}/crashes?page=${page}`)
+            .then((data) => {
+                container.innerHTML = '';
+                const list = document.createElement('ul');
+                data.items.forEach((crash) => {
+                    const item = document.createElement('li');
+                    // Replay output is only fetched when a crash is opened
+                    const crashDetails = document.createElement('details');
+                    const summary = document.createElement('summary');
+                    summary.textContent = `${crash.name} ${crash.minor_hash ? `(minor ${crash.minor_hash})` : ''}`;
+                    const output = document.createElement('pre');
+                    crashDetails.append(summary, output);
+                    crashDetails.addEventListener('toggle', () => {
+                        if (crashDetails.open && !output.textContent) {
+                            loadReplay(crash.crash_path, output);
+                        }
+                    });
+                    item.appendChild(crashDetails);
+                    list.appendChild(item);
+                });
+                const pager = document.createElement('div');
+                pager.className = 'pager';
+                container.append(list, pager);
+                renderPager(pager, data, (next) => loadBucketCrashes(majorHash, container, next));
+            })
+            .catch((error) => {
+                container.textContent = `Could not load crashes: ${error.message}`;
+            });
+    }
+
+    function loadBuckets(page) {
+        const summary = document.getElementById('bucket-summary');
+        const tbody = document.querySelector('#bucket-table tbody');
+        getJson(`${baseUrl}/buckets?page=${page}`)
+            .then((data) => {
+                summary.textContent = data.crashes
+                    ? `${data.crashes} triaged crashes in ${data.total} buckets. Click a bucket to list its crashes.`
+                    : 'No triaged crashes yet. Generate a report on the tests page to triage them.';
+                tbody.innerHTML = '';
+                data.items.forEach((bucket) => {
+                    const row = document.createElement('tr');
+                    row.className = 'bucket-row';
+                    cell(row, bucket.major_hash);
+                    cell(row, bucket.crashes);
+                    cell(row, bucket.classification || 'UNKNOWN');
+                    cell(row, bucket.short_description || '');
+                    const crashRow = document.createElement('tr');
+                    crashRow.hidden = true;
+                    const crashCell = document.createElement('td');
+                    crashCell.colSpan = 4;
+                    crashRow.appendChild(crashCell);
+                    row.addEventListener('click', () => {
+                        crashRow.hidden = !crashRow.hidden;
+                        if (!crashRow.hidden && !crashCell.children.length) {
+                            loadBucketCrashes(bucket.major_hash, crashCell, 1);
+                        }
+                    });
+                    tbody.append(row, crashRow);
+                });
+                renderPager(document.getElementById('bucket-pager'), data, loadBuckets);
+            })
+            .catch((error) => {
+                summary.textContent = `Could not load crash buckets: ${error.message}`;
+            });
+    }
+
+    function loadFunctions(page) {
+        const tbody = document.querySelector('#function-table tbody');
+        if (!tbody) {
+            return;
+        }
+        const uncovered = document.getElementById('uncovered-only').checked ? '&uncovered=1' : '';
+        getJson(`${baseUrl}/coverage/functions?page=${page}${uncovered}`)
+            .then((data) => {
+                tbody.innerHTML = '';
+                data.items.forEach((fn) => {
+                    const row = document.createElement('tr');
+                    cell(row, fn.name);
+                    cell(row, `${fn.file}:${fn.start_line}`);
+                    cell(row, fn.execution_count);
+                    cell(row, `${fn.blocks_executed}/${fn.blocks}`);
+                    tbody.appendChild(row);
+                });
+                renderPager(document.getElementById('function-pager'), data, loadFunctions);
+            })
+            .catch((error) => {
+                tbody.innerHTML = '';
+                const row = document.createElement('tr');
+                cell(row, `Could not load functions: ${error.message}`).colSpan = 4;
+                tbody.appendChild(row);
+            });
+    }
+
+    function setUpCoverageRefresh() {
+        const refreshButton = document.getElementById('refresh-coverage');
+        if (!refreshButton) {
+            return;
+        }
+        const statusText = document.getElementById('coverage-status');
+
+        function pollJob(jobId) {
+            getJson(`/jobs/${jobId}`)
+                .then((job) => {
+                    statusText.textContent = `${job.status}: ${job.message || ''}`;
+                    if (job.status === 'done') {
+                        // The page renders the stored report
+                        window.location.reload();
+                    } else if (job.status === 'failed') {
+                        statusText.style.color = 'red';
+                        statusText.textContent = job.error;
+                        refreshButton.disabled = false;
+                    } else {
+                        setTimeout(() => pollJob(jobId), 2000);
+                    }
+                })
+                .catch((error) => {
+                    console.error('Error:', error);
+                    setTimeout(() => pollJob(jobId), 5000);
+                });
+        }
+
+        refreshButton.addEventListener('click', () => {
+            refreshButton.disabled = true;
+            statusText.style.color = '';
+            statusText.textContent = 'Queued...';
+            fetch(`${baseUrl}/coverage`, { method: 'POST' })
+                .then((response) => response.json())
+                .then((data) => pollJob(data.job_id))
+                .catch((error) => {
+                    console.error('Error:', error);
+                    statusText.textContent = 'Could not start the coverage job.';
+                    refreshButton.disabled = false;
+                });
+        });
+    }
+
+    const uncoveredOnly = document.getElementById('uncovered-only');
+    if (uncoveredOnly) {
+        uncoveredOnly.addEventListener('change', () => loadFunctions(1));
+    }
+
+    loadCharts();
+    loadBuckets(1);
+    loadFunctions(1);
+    setUpCoverageRefresh();
+});
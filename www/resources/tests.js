@@ -0,0 +1,52 @@
+document.addEventListener('DOMContentLoaded', () => {
+    const reportSection = document.getElementById('report-section');
+    if (!reportSection || !reportSection.dataset.jobId) {
+        return;
+    }
+
+    const jobId = reportSection.dataset.jobId;
+    const statusText = document.getElementById('job-status');
+    const progressBar = document.getElementById('job-progress');
+    const sectionsDiv = document.getElementById('job-sections');
+    let renderedSections = 0;
+
+    function pollJob() {
+        fetch(`/jobs/${jobId}`)
+            .then((response) => response.json())
+            .then((job) => {
+                if (job.error && !job.status) {
+                    statusText.textContent = job.error;
+                    return;
+                }
+
+                progressBar.value = job.progress;
+                statusText.textContent = `${job.status}: ${job.message || ''}`;
+
+                // Only append sections that arrived since the last poll
+                job.sections.slice(renderedSections).forEach((section) => {
+                    const title = document.createElement('h3');
+                    title.textContent = section.title;
+                    const content = document.createElement('pre');
+                    content.textContent = section.content;
+                    sectionsDiv.appendChild(title);
+                    sectionsDiv.appendChild(content);
+                });
+                renderedSections = job.sections.length;
+
+                if (job.status === 'failed') {
+                    const errorText = document.createElement('p');
+                    errorText.style.color = 'red';
+                    errorText.textContent = job.error;
+                    sectionsDiv.appendChild(errorText);
+                } else if (job.status !== 'done') {
+                    setTimeout(pollJob, 2000);
+                }
+            })
+            .catch((error) => {
+                console.error('Error:', error);
+                setTimeout(pollJob, 5000);
+            });
+    }
+
+    pollJob();
+});
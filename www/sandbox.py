@@ -0,0 +1,182 @@
+import os
+import resource
+import shlex
+import shutil
+import signal
+import subprocess
+import uuid
+
+# Default limits for one generated block. cpu_weight is the cgroup v2 weight
+# (the system default is 100), so builds lose CPU contention to running fuzzers.
+SANDBOX_LIMITS = {
+    "cpu_weight": 50,
+    "memory_max": 4 * 1024 ** 3,
+    "pids_max": 512,
+    "timeout": 60 * 60,
+}
+
+# Delegated cgroup v2 subtree FLARE may create job cgroups in
+SANDBOX_CGROUP_ROOT = os.environ.get('FLARE_CGROUP_ROOT', '/sys/fs/cgroup/flare')
+
+# Niceness for blocks when no cgroup backend is available
+FALLBACK_NICENESS = 10
+
+# Set once the missing memory cap of the rlimit fallback has been reported
+_memory_cap_warned = False
+
+# Bubblewrap/PID namespaces are not used: a block usually ends by starting
+# afl-fuzz in the background, and tearing down the namespace with the shell
+# would kill that fuzzer.
+
+
+def _write(path, value):
+    with open(path, 'w') as f:
+        f.write(str(value))
+
+
+def _cgroup_v2_ready():
+    """Check that a writable cgroup v2 subtree exists (creating it if allowed)."""
+    if not os.path.isfile('/sys/fs/cgroup/cgroup.controllers'):
+        return False
+    try:
+        os.makedirs(SANDBOX_CGROUP_ROOT, exist_ok=True)
+        # Let job cgroups below the FLARE root use the cpu, memory and pids controllers
+        _write(os.path.join(SANDBOX_CGROUP_ROOT, 'cgroup.subtree_control'), '+cpu +memory +pids')
+        return True
+    except OSError:
+        return False
+
+
+def _systemd_run_ready():
+    return shutil.which('systemd-run') is not None and bool(os.environ.get('XDG_RUNTIME_DIR'))
+
+
+def select_backend():
+    """Return 'cgroup', 'systemd' or 'rlimit', the strongest isolation available here."""
+    if _cgroup_v2_ready():
+        return 'cgroup'
+    if _systemd_run_ready():
+        return 'systemd'
+    return 'rlimit'
+
+
+def _create_cgroup(limits):
+    """Create a job cgroup with the CPU weight, memory cap and pids limit applied."""
+    path = os.path.join(SANDBOX_CGROUP_ROOT, f"job-{uuid.uuid4().hex[:12]}")
+    os.makedirs(path)
+    for name, value in (('cpu.weight', limits["cpu_weight"]),
+                        ('memory.max', limits["memory_max"]),
+                        ('memory.swap.max', 0),
+                        ('pids.max', limits["pids_max"])):
+        try:
+            _write(os.path.join(path, name), value)
+        except OSError as e:
+            print(f"Sandbox could not set {name}: {e}")
+    return path
+
+
+def _count_user_processes():
+    uid = os.getuid()
+    count = 0
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                if os.stat(f'/proc/{entry}').st_uid == uid:
+                    count += 1
+            except OSError:
+                continue
+    return count
+
+
+def _nproc_limit(limits):
+    """RLIMIT_NPROC value for a job in the rlimit fallback."""
+    # RLIMIT_NPROC counts every process of the user, including running fuzzers,
+    # so allow the current count plus the job's own budget.
+    nproc = _count_user_processes() + limits["pids_max"]
+    hard = resource.getrlimit(resource.RLIMIT_NPROC)[1]
+    if hard != resource.RLIM_INFINITY:
+        nproc = min(nproc, hard)
+    return nproc
+
+
+def _shell_wrapper(setup):
+    """argv that runs setup in the child shell, then execs bash on the block (passed as $1).
+
+    Limits are applied by the child itself rather than a preexec_fn, which is
+    not safe to use from the server's threads.
+    """
+    script = (f'{setup} || {{ echo "[FLARE sandbox] could not apply the job limits" >&2; exit 126; }}\n'
+              'exec /bin/bash -c "$1"')
+    return ['/bin/bash', '-c', script, 'flare-sandbox']
+
+
+def _warn_no_memory_cap():
+    global _memory_cap_warned
+    if not _memory_cap_warned:
+        _memory_cap_warned = True
+        # RLIMIT_AS/RLIMIT_DATA would break ASan (it maps terabytes of shadow memory),
+        # and they would also bind the fuzzers a block leaves running
+        print("Sandbox warning: no cgroup v2 delegation or systemd user session, so generated "
+              "blocks run without a memory cap (only niceness and a process limit apply)")
+
+
+def run_sandboxed(command, cwd, limits=None):
+    """Run a bash block with CPU, memory, pids and wall-clock limits.
+
+    Returns a CompletedProcess like subprocess.run(..., capture_output=True, text=True).
+    """
+    limits = dict(SANDBOX_LIMITS, **(limits or {}))
+    backend = select_backend()
+    args = ['/bin/bash', '-c', command]
+    cgroup_path = None
+
+    if backend == 'cgroup':
+        try:
+            cgroup_path = _create_cgroup(limits)
+            # The shell moves itself into the job cgroup before running the block
+            procs_path = shlex.quote(os.path.join(cgroup_path, 'cgroup.procs'))
+            args = _shell_wrapper(f'echo $$ > {procs_path}') + [command]
+        except OSError as e:
+            print(f"Sandbox could not create a cgroup, using rlimits: {e}")
+            backend = 'rlimit'
+    if backend == 'systemd':
+        args = ['systemd-run', '--user', '--scope', '--quiet', '--collect',
+                '-p', f'CPUWeight={limits["cpu_weight"]}',
+                '-p', f'MemoryMax={limits["memory_max"]}',
+                '-p', 'MemorySwapMax=0',
+                '-p', f'TasksMax={limits["pids_max"]}',
+                '--'] + args
+    if backend == 'rlimit':
+        _warn_no_memory_cap()
+        args = _shell_wrapper(f'ulimit -u {_nproc_limit(limits)}') + [command]
+        if shutil.which('nice'):
+            args = ['nice', '-n', str(FALLBACK_NICENESS)] + args
+
+    process = subprocess.Popen(args, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               text=True, start_new_session=True)
+    try:
+        stdout, stderr = process.communicate(timeout=limits["timeout"])
+        returncode = process.returncode
+    except subprocess.TimeoutExpired:
+        # Kill the whole job: its process group, and with cgroups anything that escaped it
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        if cgroup_path:
+            try:
+                _write(os.path.join(cgroup_path, 'cgroup.kill'), 1)
+            except OSError:
+                pass
+        stdout, stderr = process.communicate()
+        returncode = -signal.SIGKILL
+        stderr += f"\n[FLARE sandbox] Killed after the {limits['timeout']}s wall-clock limit."
+    finally:
+        if cgroup_path:
+            try:
+                # Fails while a background fuzzer started by the block is still running
+                os.rmdir(cgroup_path)
+            except OSError:
+                pass
+
+    return subprocess.CompletedProcess(args, returncode, stdout, stderr)
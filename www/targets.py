@@ -0,0 +1,431 @@
+import json
+import os
+import re
+import shlex
+import sqlite3
+import subprocess
+import time
+
+# afl-fuzz options that take a value (the rest, e.g. -A and -Z, are flags)
+AFL_VALUE_OPTIONS = set('abBcefEFgGiIlLmMopPsStTVwx')
+
+# Seconds record_launch waits for backgrounded afl-fuzz processes to appear in /proc
+LAUNCH_WAIT_SECONDS = 5
+
+# git clone options that take a value in the next argument
+GIT_CLONE_VALUE_OPTIONS = {
+    '-b', '--branch', '-o', '--origin', '-c', '--config', '--depth', '-j', '--jobs', '-u',
+    '--upload-pack', '--reference', '--reference-if-able', '--separate-git-dir', '--template',
+    '--filter', '--shallow-since', '--shallow-exclude', '--server-option', '--bundle-uri',
+}
+
+# Shell tokens that end one command in a generated block
+COMMAND_SEPARATORS = {';', '&', '&&', '|', '||', '(', ')', ';;'}
+
+# Redirections such as "> /dev/null" and "2>&1", removed before splitting commands
+REDIRECTION_PATTERN = re.compile(r'(?<!\S)\d*(?:&>|>>|>&|<&|>\||>|<)\s*[^\s;&|()]+')
+
+
+def init_targets_db(db_path):
+    """Create the campaign registry table if it does not exist."""
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS campaigns (
+                output_dir TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                repo_url TEXT,
+                commit_sha TEXT,
+                build_command TEXT,
+                binary_path TEXT,
+                target_args TEXT,
+                input_mode TEXT,
+                input_dir TEXT,
+                pids TEXT,
+                started_at REAL,
+                cwd TEXT
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS campaigns_name ON campaigns (name, started_at)")
+        # Registries created before the launch directory was recorded
+        if 'cwd' not in {row[1] for row in conn.execute("PRAGMA table_info(campaigns)")}:
+            conn.execute("ALTER TABLE campaigns ADD COLUMN cwd TEXT")
+
+
+def parse_afl_command(argv, cwd):
+    """Extract the campaign layout from an afl-fuzz argv, resolving paths against cwd.
+
+    Returns a dict with binary_path, target_args, input_mode ('file' for @@ or
+    -f, otherwise 'stdin'), input_dir, output_dir and cwd, or None without -o
+    or a target.
+    """
+    options = {}
+    target = []
+    index = 1
+    while index < len(argv):
+        arg = argv[index]
+        if arg == '--':
+            target = argv[index + 1:]
+            break
+        if not arg.startswith('-') or len(arg) < 2:
+            target = argv[index:]
+            break
+        option = arg[1]
+        if option in AFL_VALUE_OPTIONS:
+            if len(arg) > 2:
+                options[option] = arg[2:]
+            elif index + 1 < len(argv):
+                index += 1
+                options[option] = argv[index]
+        index += 1
+
+    if 'o' not in options or not target:
+        return None
+
+    def resolve(path):
+        # "-i -" resumes a previous run and has no input directory
+        return path if path == '-' else os.path.normpath(os.path.join(cwd, os.path.expanduser(path)))
+
+    binary = target[0]
+    if os.sep in binary:
+        binary = resolve(binary)
+    return {
+        "binary_path": binary,
+        "target_args": target[1:],
+        "input_mode": 'file' if '@@' in target[1:] or 'f' in options else 'stdin',
+        "input_dir": resolve(options['i']) if 'i' in options else None,
+        "output_dir": resolve(options['o']),
+        "cwd": cwd,
+    }
+
+
+def _split_commands(text):
+    """Split a bash block into simple commands (argv lists), with redirections dropped."""
+    text = REDIRECTION_PATTERN.sub(' ', text.replace('\\\n', ' '))
+    for line in text.splitlines():
+        lexer = shlex.shlex(line, posix=True, punctuation_chars=True)
+        lexer.whitespace_split = True
+        lexer.commenters = '#'
+        try:
+            tokens = list(lexer)
+        except ValueError:
+            continue  # unbalanced quotes; not a command we can follow
+        argv = []
+        for token in tokens:
+            if token in COMMAND_SEPARATORS:
+                if argv:
+                    yield argv
+                argv = []
+            else:
+                argv.append(token)
+        if argv:
+            yield argv
+
+
+def _command_spans(line):
+    """Yield the (start, end) offsets of the simple commands in one line of shell.
+
+    Splits at the COMMAND_SEPARATORS outside quotes, like _split_commands,
+    but keeps positions so the line itself can be rewritten. The & and | of
+    redirections (2>&1, &>, >|) are not separators.
+    """
+    start = 0
+    quote = None
+    index = 0
+    while index < len(line):
+        char = line[index]
+        if quote:
+            if char == '\\' and quote == '"':
+                index += 1
+            elif char == quote:
+                quote = None
+        elif char == '\\':
+            index += 1
+        elif char in '\'"':
+            quote = char
+        elif char == '#' and (index == 0 or line[index - 1].isspace()):
+            break
+        elif char in ';&|()':
+            redirection = (char in '&|' and index and line[index - 1] in '<>') or \
+                (char == '&' and line[index + 1:index + 2] == '>')
+            if not redirection:
+                yield start, index
+                if line[index:index + 2] in ('&&', '||', ';;', '|&'):
+                    index += 1
+                start = index + 1
+        index += 1
+    yield start, index
+
+
+def commands_with_separators(command):
+    """Yield (argv, separator) for every simple command in a bash block.
+
+    Backslash continuations are joined first. separator is the token ending
+    the command ('&', '&&', ';', '|', ...) or None at the end of a line.
+    """
+    for line in command.replace('\\\n', ' ').splitlines():
+        for start, end in _command_spans(line):
+            argvs = list(_split_commands(line[start:end]))
+            if argvs:
+                yield argvs[0], re.match(r'(?:&&|\|\||;;|\|&|[;&|()])?', line[end:]).group() or None
+
+
+def _is_git_clone(argv):
+    # Skip leading VAR=value environment assignments
+    while argv and '=' in argv[0] and not argv[0].startswith(('-', '/')):
+        argv = argv[1:]
+    return bool(argv) and os.path.basename(argv[0]) == 'git' and 'clone' in argv[1:]
+
+
+def remove_clones(command):
+    """Replace the git clone commands in a bash block with `true`, keeping the rest of each line.
+
+    `cd /ws && git clone URL && cd repo && make` becomes
+    `cd /ws && true && cd repo && make`.
+    """
+    lines = []
+    for line in command.replace('\\\n', ' ').splitlines():
+        clones = [(start, end) for start, end in _command_spans(line)
+                  if any(_is_git_clone(argv) for argv in _split_commands(line[start:end]))]
+        for start, end in reversed(clones):
+            segment = line[start:end]
+            leading = segment[:len(segment) - len(segment.lstrip())]
+            trailing = segment[len(segment.rstrip()):]
+            line = f"{line[:start]}{leading}true{trailing}{line[end:]}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def find_launches(command, cwd):
+    """Parse every afl-fuzz invocation in a bash block.
+
+    Only plain `cd DIR` commands are followed to resolve relative paths, and
+    invocations using shell variables are skipped; those are left to the
+    /proc scan in record_launch.
+    """
+    launches = []
+    current = cwd
+    for argv in _split_commands(command):
+        if argv[0] == 'cd' and len(argv) > 1:
+            current = os.path.normpath(os.path.join(current, os.path.expanduser(argv[1])))
+            continue
+        # Skip leading VAR=value environment assignments
+        while argv and '=' in argv[0] and not argv[0].startswith(('-', '/')):
+            argv = argv[1:]
+        if argv and os.path.basename(argv[0]) == 'afl-fuzz':
+            if any('$' in arg or '`' in arg for arg in argv):
+                continue  # shell expansions; only the running process knows the real paths
+            launch = parse_afl_command(argv, current)
+            if launch:
+                launches.append(launch)
+    return launches
+
+
+def find_clones(command, cwd):
+    """Return the destination directories of the git clone commands in a bash block.
+
+    Plain `cd DIR` commands are followed like in find_launches. Returns None
+    when a clone's destination cannot be known (shell expansions, git -C).
+    """
+    clones = []
+    current = cwd
+    for argv in _split_commands(command):
+        if argv[0] == 'cd' and len(argv) > 1:
+            current = os.path.normpath(os.path.join(current, os.path.expanduser(argv[1])))
+            continue
+        if not _is_git_clone(argv):
+            continue
+        if argv[1] != 'clone' or any('$' in arg or '`' in arg for arg in argv):
+            return None
+        positional = []
+        index = 2
+        while index < len(argv):
+            arg = argv[index]
+            if arg in GIT_CLONE_VALUE_OPTIONS:
+                index += 1
+            elif not arg.startswith('-'):
+                positional.append(arg)
+            index += 1
+        if not positional:
+            return None
+        # Without a directory, git clones into the repository name
+        destination = positional[1] if len(positional) > 1 else \
+            re.sub(r'\.git$', '', positional[0].rstrip('/').rsplit('/', 1)[-1].rsplit(':', 1)[-1])
+        clones.append(os.path.normpath(os.path.join(current, os.path.expanduser(destination))))
+    return clones
+
+
+def running_fuzzers():
+    """Return {output_dir: {"pids": [...], **launch}} for afl-fuzz processes running now."""
+    campaigns = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/cmdline', 'rb') as cmdline_file:
+                argv = cmdline_file.read().decode(errors='replace').split('\0')[:-1]
+            if not argv or os.path.basename(argv[0]) != 'afl-fuzz':
+                continue
+            cwd = os.readlink(f'/proc/{entry}/cwd')
+        except OSError:
+            continue
+        launch = parse_afl_command(argv, cwd)
+        if launch:
+            campaign = campaigns.setdefault(launch["output_dir"], dict(launch, pids=[]))
+            campaign["pids"].append(int(entry))
+    return campaigns
+
+
+def wait_for_fuzzers(output_dirs, timeout=LAUNCH_WAIT_SECONDS):
+    """Poll running_fuzzers() until afl-fuzz runs for every output directory, or the timeout passes.
+
+    A block returns as soon as it has backgrounded afl-fuzz, which may not
+    have exec'd yet. With no known output directories, any running fuzzer ends the wait.
+    """
+    deadline = time.time() + timeout
+    while True:
+        running = running_fuzzers()
+        started = set(output_dirs) <= set(running) if output_dirs else bool(running)
+        if started or time.time() >= deadline:
+            return running
+        time.sleep(0.2)
+
+
+def git_commit(path):
+    """Return the HEAD commit of the git checkout containing path, or None."""
+    if not path or not os.path.isdir(path):
+        return None
+    result = subprocess.run(['git', '-C', path, 'rev-parse', 'HEAD'],
+                            capture_output=True, text=True, check=False)
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def campaign_name(output_dir, workspace):
+    """Name a campaign like the /tests form expects: the target directory holding out/."""
+    target_dir = os.path.dirname(output_dir.rstrip(os.sep))
+    relative = os.path.relpath(target_dir, workspace)
+    return os.path.basename(target_dir) if relative.startswith('..') else relative
+
+
+def record_launch(db_path, command, cwd, workspace, repo_url=None, build_command=None, repo_dir=None):
+    """Register the campaigns a successfully executed bash block started.
+
+    Launches are taken from the afl-fuzz processes now running (their real
+    argv and working directory; see wait_for_fuzzers), falling back to
+    parsing the block itself.
+    repo_dir is a checkout of repo_url used for the commit when the binary
+    does not live in one. Returns the names of the registered campaigns.
+    """
+    launches = {launch["output_dir"]: launch for launch in find_launches(command, cwd)}
+    running = wait_for_fuzzers(launches)
+    names = []
+    init_targets_db(db_path)
+    with sqlite3.connect(db_path) as conn:
+        if not launches:
+            # The block started afl-fuzz in a way the parser cannot follow (variables,
+            # scripts); claim the running campaigns nobody has registered yet
+            known = {row[0] for row in conn.execute("SELECT output_dir FROM campaigns")}
+            launches = {output_dir: launch for output_dir, launch in running.items()
+                        if output_dir not in known}
+        for output_dir, launch in launches.items():
+            # The process view wins: it reflects variables and cds the parser cannot follow
+            launch = running.get(output_dir, dict(launch, pids=[]))
+            binary_dir = os.path.dirname(launch["binary_path"])
+            commit = git_commit(binary_dir) or git_commit(repo_dir)
+            name = campaign_name(output_dir, workspace)
+            conn.execute(
+                "INSERT OR REPLACE INTO campaigns (output_dir, name, repo_url, commit_sha, build_command, "
+                "binary_path, target_args, input_mode, input_dir, pids, started_at, cwd) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (output_dir, name, repo_url, commit, build_command, launch["binary_path"],
+                 json.dumps(launch["target_args"]), launch["input_mode"], launch["input_dir"],
+                 json.dumps(launch["pids"]), time.time(), launch["cwd"]))
+            names.append(name)
+    return names
+
+
+def _row_to_campaign(row):
+    campaign = dict(row)
+    campaign["target_args"] = json.loads(campaign["target_args"] or '[]')
+    campaign["pids"] = json.loads(campaign["pids"] or '[]')
+    return campaign
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+def get_campaign(db_path, name):
+    """Return the most recent campaign registered under a name, or None."""
+    init_targets_db(db_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.row_factory = sqlite3.Row
+        row = conn.execute(
+            "SELECT * FROM campaigns WHERE name = ? ORDER BY started_at DESC LIMIT 1", (name,)).fetchone()
+    if row is None:
+        return None
+    campaign = _row_to_campaign(row)
+    campaign["running"] = any(_alive(pid) for pid in campaign["pids"])
+    return campaign
+
+
+def list_campaigns(db_path):
+    """Return every registered campaign, newest first."""
+    init_targets_db(db_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute("SELECT * FROM campaigns ORDER BY started_at DESC").fetchall()
+    campaigns = [_row_to_campaign(row) for row in rows]
+    for campaign in campaigns:
+        campaign["running"] = any(_alive(pid) for pid in campaign["pids"])
+    return campaigns
+
+
+def replay_command(campaign, input_path):
+    """Return (argv, stdin_path) that feed one input to the campaign's target like AFL did."""
+    args = campaign["target_args"]
+    if '@@' in args:
+        return [campaign["binary_path"]] + [input_path if arg == '@@' else arg for arg in args], None
+    if campaign["input_mode"] == 'file':
+        # -f targets read a fixed file name; passing the input as the argument is the closest match
+        return [campaign["binary_path"]] + args + [input_path], None
+    return [campaign["binary_path"]] + args, input_path
+
+
+def replay_cwd(campaign):
+    """Directory to replay a campaign's inputs from, so relative target arguments resolve like under AFL.
+
+    That is where afl-fuzz was started, or for campaigns registered without
+    it, the target directory holding the output directory.
+    """
+    cwd = campaign.get("cwd") or os.path.dirname(campaign["output_dir"].rstrip(os.sep))
+    return cwd if os.path.isdir(cwd) else None
+
+
+def gdb_run(campaign, input_path, redirect=""):
+    """Return (program, run_line) that make gdb start the campaign's target on one input.
+
+    gdb passes the arguments of 'run' through a shell, so they are quoted
+    here, and stdin inputs and any extra redirect (e.g. '> /dev/null') go on
+    the same line. Plain 'run' with --args would drop them.
+    """
+    argv, stdin_path = replay_command(campaign, input_path)
+    run_line = ['run'] + [shlex.quote(arg) for arg in argv[1:]]
+    if stdin_path:
+        run_line.append(f'< {shlex.quote(stdin_path)}')
+    if redirect:
+        run_line.append(redirect)
+    return argv[0], ' '.join(run_line)
+
+
+def afl_tool_command(campaign):
+    """Return the target argv for AFL-style tools (afl-tmin, cwtriage) that substitute @@.
+
+    Both feed the input on stdin when @@ is absent, as AFL did for stdin campaigns.
+    """
+    return replay_command(campaign, '@@')[0]
@@ -0,0 +1,278 @@
+import os
+import re
+import sqlite3
+import hashlib
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import targets
+
+# crashwalk's cwtriage is built into ~/crashwalk/bin by setup.sh
+CRASHWALK_BIN = os.environ.get('FLARE_CWTRIAGE', os.path.expanduser('~/crashwalk/bin/cwtriage'))
+
+# GDB 'exploitable' plugin (cloned into ~/exploitable by setup.sh), used when crashwalk is not available
+EXPLOITABLE_SCRIPT = os.environ.get(
+    'FLARE_EXPLOITABLE', os.path.expanduser('~/exploitable/exploitable/exploitable.py'))
+
+# Seconds a single crash may run under the debugger
+TRIAGE_TIMEOUT = 30
+
+TRIAGE_WORKERS = os.cpu_count() or 1
+
+
+def init_triage_db(db_path):
+    """Create the triage database tables if they do not exist."""
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS crashes (
+                target TEXT NOT NULL,
+                crash_path TEXT NOT NULL,
+                sha1 TEXT,
+                major_hash TEXT,
+                minor_hash TEXT,
+                classification TEXT,
+                short_description TEXT,
+                engine TEXT,
+                triaged_at REAL,
+                PRIMARY KEY (target, crash_path)
+            )
+        """)
+        # Bucket listings group and page by major hash
+        conn.execute("CREATE INDEX IF NOT EXISTS crashes_bucket ON crashes (target, major_hash)")
+
+
+def file_sha1(path):
+    """Return the SHA1 of a file's content."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_exploitable_output(output):
+    """Extract stack hashes and exploitability class from crashwalk/exploitable output."""
+    record = {"major_hash": None, "minor_hash": None,
+              "classification": None, "short_description": None}
+
+    match = re.search(r'^\s*Hash:\s*([0-9a-fA-F]+)\.([0-9a-fA-F]+)', output, re.MULTILINE)
+    if match:
+        record["major_hash"], record["minor_hash"] = match.group(1), match.group(2)
+
+    # crashwalk prints "Classification:", exploitable prints "Exploitability Classification:"
+    match = re.search(r'^\s*(?:Exploitability )?Classification:\s*(\S+)', output, re.MULTILINE)
+    if match:
+        record["classification"] = match.group(1)
+
+    match = re.search(r'^\s*Short description:\s*(.+)$', output, re.MULTILINE)
+    if match:
+        record["short_description"] = match.group(1).strip()
+
+    return record
+
+
+def run_gdb_exploitable(campaign, crash_path):
+    """Replay one crash under gdb in batch mode and classify it with 'exploitable'."""
+    # Arguments and stdin as the campaign's fuzzer ran the target
+    program, run_line = targets.gdb_run(campaign, crash_path)
+    command = [
+        'gdb', '-q', '-nx', '-batch',
+        '-ex', f'source {EXPLOITABLE_SCRIPT}',
+        '-ex', run_line,
+        '-ex', 'exploitable',
+        program,
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, cwd=targets.replay_cwd(campaign),
+                                timeout=TRIAGE_TIMEOUT, check=False)
+        return result.stdout + result.stderr
+    except subprocess.TimeoutExpired:
+        return ""
+    except Exception as e:
+        print(f"Error running gdb on {crash_path}: {e}")
+        return ""
+
+
+def run_crashwalk(campaign, crashes_dir, workers):
+    """Run cwtriage over a crash directory and return {crash_path: summary_text}."""
+    command = [
+        CRASHWALK_BIN,
+        '-root', crashes_dir,
+        '-match', 'id',
+        '-workers', str(workers),
+        '-t', str(TRIAGE_TIMEOUT),
+        '-output', 'text',
+        '-seen',
+        '--',
+    ] + targets.afl_tool_command(campaign)
+    try:
+        # cwtriage only finds exploitable.py through CW_EXPLOITABLE
+        result = subprocess.run(command, capture_output=True, text=True, cwd=targets.replay_cwd(campaign),
+                                env=dict(os.environ, CW_EXPLOITABLE=EXPLOITABLE_SCRIPT), check=False)
+    except Exception as e:
+        print(f"Error running crashwalk: {e}")
+        return {}
+    return parse_crashwalk_output(result.stdout)
+
+
+def parse_crashwalk_output(output):
+    """Split cwtriage text output into {crash_path: summary_text}."""
+    summaries = {}
+    for block in re.findall(r'---CRASH SUMMARY---([\s\S]*?)---END SUMMARY---', output):
+        match = re.search(r'^\s*Filename:\s*(.+)$', block, re.MULTILINE)
+        if match:
+            summaries[os.path.abspath(match.group(1).strip())] = block
+    return summaries
+
+
+def triage_crashes(db_path, target_name, crash_paths, campaign, engine=None, workers=TRIAGE_WORKERS):
+    """Triage any crash files not already in the database and store the results.
+
+    The crashes are replayed with the campaign's target arguments and input mode.
+    """
+    init_triage_db(db_path)
+
+    with sqlite3.connect(db_path) as conn:
+        known = {row[0] for row in conn.execute(
+            "SELECT crash_path FROM crashes WHERE target = ?", (target_name,))}
+    pending = [os.path.abspath(p) for p in crash_paths if os.path.abspath(p) not in known]
+    if not pending or not campaign["binary_path"]:
+        return
+
+    if engine is None:
+        engine = 'crashwalk' if os.path.isfile(CRASHWALK_BIN) else 'gdb'
+
+    outputs = {}
+    if engine == 'crashwalk':
+        # cwtriage walks a whole directory, so group the pending files by parent
+        for crashes_dir in sorted({os.path.dirname(p) for p in pending}):
+            outputs.update(run_crashwalk(campaign, crashes_dir, workers))
+        if not outputs:
+            print("crashwalk produced no crash summaries; triaging with gdb instead")
+            engine = 'gdb'
+    if engine == 'gdb':
+        # The debugger runs are subprocess-bound, so threads scale with cores
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(lambda p: run_gdb_exploitable(campaign, p), pending)
+            outputs = dict(zip(pending, results))
+
+    rows = []
+    failed = 0
+    for crash_path in pending:
+        record = parse_exploitable_output(outputs.get(crash_path, ""))
+        if not record["major_hash"] and not record["classification"]:
+            # Timed out, or the engine is missing; leave it pending so the next report retries it
+            failed += 1
+            continue
+        try:
+            sha1 = file_sha1(crash_path)
+        except OSError:
+            sha1 = None
+        rows.append((target_name, crash_path, sha1, record["major_hash"], record["minor_hash"],
+                     record["classification"], record["short_description"], engine, time.time()))
+
+    if failed:
+        print(f"Could not triage {failed} of {len(pending)} crashes with {engine}; they will be retried")
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO crashes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+
+def get_triage_results(db_path, target_name):
+    """Return the stored triage rows for a target as dictionaries."""
+    init_triage_db(db_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(
+            "SELECT * FROM crashes WHERE target = ? ORDER BY major_hash, minor_hash, crash_path",
+            (target_name,)).fetchall()
+    return [dict(row) for row in rows]
+
+
+# Bucket name used for crashes the triage engine could not hash
+UNKNOWN_BUCKET = 'unknown'
+
+
+def get_buckets(db_path, target_name, offset=0, limit=50):
+    """Return (bucket_count, crash_count, buckets) for one page of a target's buckets, largest first.
+
+    Each bucket has its major_hash, classification, short_description and crash count.
+    """
+    init_triage_db(db_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.row_factory = sqlite3.Row
+        bucket_count, crash_count = conn.execute(
+            "SELECT COUNT(DISTINCT COALESCE(major_hash, ?)), COUNT(*) FROM crashes WHERE target = ?",
+            (UNKNOWN_BUCKET, target_name)).fetchone()
+        rows = conn.execute(
+            "SELECT COALESCE(major_hash, ?) AS major_hash, MAX(classification) AS classification, "
+            "MAX(short_description) AS short_description, COUNT(*) AS crashes, "
+            "COUNT(DISTINCT minor_hash) AS minor_hashes FROM crashes WHERE target = ? "
+            "GROUP BY COALESCE(major_hash, ?) ORDER BY crashes DESC, major_hash LIMIT ? OFFSET ?",
+            (UNKNOWN_BUCKET, target_name, UNKNOWN_BUCKET, limit, offset)).fetchall()
+    return bucket_count, crash_count, [dict(row) for row in rows]
+
+
+def get_bucket_crashes(db_path, target_name, major_hash, offset=0, limit=50):
+    """Return (total, crashes) for one page of the crashes in a bucket."""
+    init_triage_db(db_path)
+    condition = "major_hash IS NULL" if major_hash == UNKNOWN_BUCKET else "major_hash = ?"
+    params = (target_name,) if major_hash == UNKNOWN_BUCKET else (target_name, major_hash)
+    with sqlite3.connect(db_path) as conn:
+        conn.row_factory = sqlite3.Row
+        total = conn.execute(
+            f"SELECT COUNT(*) FROM crashes WHERE target = ? AND {condition}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT * FROM crashes WHERE target = ? AND {condition} ORDER BY minor_hash, crash_path "
+            "LIMIT ? OFFSET ?", params + (limit, offset)).fetchall()
+    return total, [dict(row) for row in rows]
+
+
+def is_known_crash(db_path, target_name, crash_path):
+    """Check that a path is a triaged crash of the target (and not an arbitrary file)."""
+    init_triage_db(db_path)
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT 1 FROM crashes WHERE target = ? AND crash_path = ?",
+                            (target_name, crash_path)).fetchone() is not None
+
+
+def format_triage_report(db_path, target_name):
+    """Render the triage results for a target, grouped by major stack hash."""
+    rows = get_triage_results(db_path, target_name)
+    if not rows:
+        return "No triage results available.\n"
+
+    buckets = {}
+    for row in rows:
+        buckets.setdefault(row["major_hash"] or UNKNOWN_BUCKET, []).append(row)
+
+    report = f"{len(rows)} crashes in {len(buckets)} unique buckets (major stack hash)\n\n"
+    for major_hash, crashes in buckets.items():
+        first = crashes[0]
+        report += f"#### Bucket {major_hash}\n"
+        report += f"Classification: {first['classification'] or 'UNKNOWN'}\n"
+        if first["short_description"]:
+            report += f"Description: {first['short_description']}\n"
+        minor_hashes = sorted({c["minor_hash"] for c in crashes if c["minor_hash"]})
+        if minor_hashes:
+            report += f"Minor hashes: {', '.join(minor_hashes)}\n"
+        report += f"Crashes ({len(crashes)}):\n"
+        for crash in crashes:
+            report += f"  {crash['crash_path']}\n"
+        report += "\n"
+    return report
+
+
+def get_bucket_representatives(db_path, target_name):
+    """Return the smallest crash file of each major-hash bucket for a target."""
+    representatives = {}
+    for row in get_triage_results(db_path, target_name):
+        bucket = row["major_hash"] or row["sha1"] or row["crash_path"]
+        try:
+            size = os.path.getsize(row["crash_path"])
+        except OSError:
+            continue
+        if bucket not in representatives or size < representatives[bucket][0]:
+            representatives[bucket] = (size, row["crash_path"])
+    return [path for _, path in representatives.values()]
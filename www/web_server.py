@@ -1,95 +1,56 @@
 from flask import Flask, render_template, request, jsonify, send_from_directory
-import requests
 import subprocess
 import os
 import re
-import yaml
-import git  # GitPython for handling Git repositories
+import triage
+import minimize
+import hangs
+import collector
+import jobs
+import llm_batch
+import repo_context
+import harness_index
+import build_repair
+import sandbox
+import llm_client
+import pipeline
+import targets
+import replay
+import corpus_coverage
 
 app = Flask(__name__, static_folder='resources', template_folder='.')
 
-# Ensure /tmp/flare_ws exists
-FLARE_WORKSPACE = '/tmp/flare_ws'
-os.makedirs(FLARE_WORKSPACE, exist_ok=True)
+# Workspace, build metrics and URL parsing are shared with the batch CLI (pipeline.py)
+FLARE_WORKSPACE = pipeline.FLARE_WORKSPACE
+BUILD_METRICS_DB_PATH = pipeline.BUILD_METRICS_DB_PATH
+TARGETS_DB_PATH = pipeline.TARGETS_DB_PATH
+extract_git_url = pipeline.extract_git_url
 
-# Path to the default playbook
-DEFAULT_PLAYBOOK_PATH = './FLARE_playbook/default.yaml'
+# SQLite database holding crash triage results
+TRIAGE_DB_PATH = os.path.join(FLARE_WORKSPACE, 'triage.db')
 
+# SQLite database holding the background job queue
+JOBS_DB_PATH = os.path.join(FLARE_WORKSPACE, 'jobs.db')
 
-def get_default_playbook():
-    """Read and return the content of the default playbook as a string."""
-    try:
-        with open(DEFAULT_PLAYBOOK_PATH, 'r') as file:
-            return yaml.safe_load(file)
-    except FileNotFoundError:
-        print(f"Default playbook not found at {DEFAULT_PLAYBOOK_PATH}.")
-        return None
-    except Exception as e:
-        print(f"Error reading default playbook: {e}")
-        return None
-
+# SQLite database holding coverage reports and the queue entries they already counted
+COVERAGE_DB_PATH = os.path.join(FLARE_WORKSPACE, 'coverage.db')
 
-def get_repo_tree(repo_dir):
-    """Generate a directory tree of the Git repository."""
-    tree_output = []
-    for root, dirs, files in os.walk(repo_dir):
-        for name in dirs + files:
-            tree_output.append(os.path.relpath(os.path.join(root, name), repo_dir))
-    return "\n".join(tree_output)
+# Page size of the detail view's JSON listings, and the largest a client may ask for
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
 
 
 def get_git_repo_details(git_url):
-    """Get the details (README, Makefile, Tree) of the Git repo."""
-    try:
-        repo_dir = os.path.join(FLARE_WORKSPACE, 'repo')
-        if os.path.exists(repo_dir):
-            subprocess.run(['rm', '-rf', repo_dir], check=True)  # Clean up previous clone
-        print(f"Cloning repository from {git_url}")
-        repo = git.Repo.clone_from(git_url, repo_dir)
-
-        # Check for README files
-        readme_files = ['README.md', 'readme.md', 'README.rst', 'readme.rst', 'readme.txt', 'README.txt']
-        readme_content = ''
-        for readme in readme_files:
-            readme_path = os.path.join(repo_dir, readme)
-            if os.path.isfile(readme_path):
-                with open(readme_path, 'r') as readme_file:
-                    readme_content = readme_file.read()
-                break  # Stop after the first README file is found
-
-        # Check for Makefile
-        makefile_content = ''
-        makefile_path = os.path.join(repo_dir, 'Makefile')
-        if os.path.isfile(makefile_path):
-            with open(makefile_path, 'r') as makefile_file:
-                makefile_content = makefile_file.read()
-
-        # Get the file structure (tree) of the repository
-        tree_output = get_repo_tree(repo_dir)
-
-        # Prepare the content to be added to the user prompt
-        repo_details = ""
-        if readme_content:
-            repo_details += f"{{README}}:\n{readme_content}\n"
-        if makefile_content:
-            repo_details += f"{{Makefile}}:\n{makefile_content}\n"
-        repo_details += f"{{Tree}}:\n{tree_output}\n"
-
-        return repo_details
-
-    except git.exc.GitCommandError as e:
-        return f"Error cloning repository: {str(e)}"
-    except Exception as e:
-        return f"Error processing Git repository: {str(e)}"
-
+    """Get the details (README, build files, Tree) of the Git repo, warm from the prefetch cache if possible."""
+    return repo_context.get_repo_details(git_url)
 
 
-def get_fuzzing_status(target_path):
-    """Check the status of the fuzzing process for the given target."""
+def get_fuzzing_status(out_dir):
+    """Check the status of the fuzzing process writing to the given output directory."""
     try:
         # Running afl-whatsup to get the status of the fuzzing process
         output = subprocess.check_output(
-            ['afl-whatsup', '-s', os.path.join(FLARE_WORKSPACE, target_path, 'out')],
+            ['afl-whatsup', '-s', out_dir],
             text=True
         )
         return output
@@ -109,72 +70,105 @@ def find_target_program(target_path):
     return None
 
 
-
-def generate_crash_report(target_path):
-    """Generate a report of any crashes encountered during fuzzing."""
+def resolve_target(target_name):
+    """Return the registered campaign for a target name.
+
+    Targets started before the registry existed (or outside FLARE) fall back
+    to the old workspace layout guess: <target>/out and <target>/<target> @@.
+    """
+    campaign = targets.get_campaign(TARGETS_DB_PATH, target_name)
+    if campaign:
+        return campaign
+    target_path = os.path.join(FLARE_WORKSPACE, target_name)
+    return {
+        "name": target_name,
+        "output_dir": os.path.join(target_path, 'out'),
+        "binary_path": find_target_program(target_path),
+        "target_args": ['@@'],
+        "input_mode": 'file',
+        "pids": [],
+        "running": None,
+    }
+
+
+def generate_crash_report(target):
+    """Generate a report of any crashes encountered during fuzzing of a resolved target.
+
+    Returns the report and a {crash_id: explanation} mapping; all crashes are
+    explained through a few batched chat requests rather than one per crash.
+    """
     crash_report = ""
-    crashes_dir = os.path.join(FLARE_WORKSPACE, target_path, 'out', 'default', 'crashes')
+    explanations = {}
+    out_dir = target["output_dir"]
 
     try:
-        # Check if the crashes directory exists
-        if os.path.isdir(crashes_dir):
-            for crash_file in os.listdir(crashes_dir):
-                crash_path = os.path.join(crashes_dir, crash_file)
-                if os.path.isfile(crash_path):
-                    crash_report += f"### Crash Input: {crash_file}\n"
-                    crash_report += f"Path: {crash_path}\n"
-
-                    # Dynamically find the target program
-                    target_program = find_target_program(target_path)
-                    if target_program:
-                        # Replaying the crash using the found target program
-                        replay_output = ""
-                        try:
-                            result = subprocess.run(
-                                [target_program, crash_path],
-                                text=True,
-                                stdout=subprocess.PIPE,
-                                stderr=subprocess.PIPE,
-                                check=False  # Don't raise an exception on non-zero exit
-                            )
-                            replay_output = (
-                                f"Replay Output (stdout):\n{result.stdout}\n"
-                                f"Replay Error (stderr):\n{result.stderr}\n"
-                                f"Exit Code: {result.returncode}\n"
-                            )
-                        except Exception as e:
-                            replay_output = f"Error running target program: {str(e)}\n"
-
-                        crash_report += replay_output
-                    else:
-                        crash_report += "Error: No target program found for replay.\n"
-
-                    # Generate crash explanation using the chatbot
-                    try:
-                        message_to_send = {
-                            "prompt": "A crash from a fuzzer was replayed with the original executable. Explain the crash, what it could possibly be, in one to three sentences. Output below:",
-                            "crash_input": crash_file,
-                            "stdout": result.stdout,
-                            "stderr": result.stderr,
-                            "exit_code": result.returncode
-                        }
-
-                        response = requests.post('http://localhost:5001/chat', json={"message": message_to_send})
-                        response.raise_for_status()  # Ensure HTTP errors are caught
-                        chatbot_response = response.json().get("response", "Not enough context, review manually.")
-
-                        crash_report += f"### Crash Explanation:\n{chatbot_response}\n\n"
-                    except Exception as e:
-                        crash_report += f"### Crash Explanation:\nNot enough context, review manually. (Error: {str(e)})\n\n"
+        # Check if any fuzzer instance (default, or -M/-S names) exists
+        if collector.discover_instances(out_dir):
+            crashes = collector.collect_inputs(out_dir, 'crashes')
+            # Prefer the afl-tmin reproducer when the minimizer has produced one
+            reproducers = {crash["path"]: minimize.get_reproducer(crash["path"]) for crash in crashes}
+
+            # Replay every crash through one warm forkserver per worker instead of one exec each
+            replays = {}
+            if target["binary_path"]:
+                replays = replay.replay_inputs(target, list(dict.fromkeys(reproducers.values())))
+                # The detail view shows these without replaying again
+                replay.store_replays(TRIAGE_DB_PATH, target["name"], replays)
+
+            crash_entries = []
+            for crash in crashes:
+                crash_path = crash["path"]
+                crash_file = crash["name"]
+                entry_report = f"### Crash Input: {crash_file}\n"
+                entry_report += f"Path: {crash_path}\n"
+                entry_report += f"Instance: {crash['instance']}\n"
+                if crash["duplicates"]:
+                    entry_report += f"Identical copies: {', '.join(crash['duplicates'])}\n"
+
+                reproducer_path = reproducers[crash_path]
+                if reproducer_path != crash_path:
+                    entry_report += (f"Minimized Reproducer: {reproducer_path} "
+                                     f"({os.path.getsize(reproducer_path)} bytes, "
+                                     f"originally {os.path.getsize(crash_path)} bytes)\n")
+
+                summary = {"id": f"{crash['instance']}/{crash_file}", "crash_input": crash_file}
+
+                # The target program recorded when the campaign was launched, replayed like AFL fed it
+                result = replays.get(reproducer_path)
+                if result is None:
+                    entry_report += "Error: No target program found for replay.\n"
+                elif result["status"] == "error":
+                    entry_report += f"Error running target program: {result['error']}\n"
+                    summary["error"] = result["error"]
+                else:
+                    entry_report += (
+                        f"Replay Output (stdout):\n{result['stdout']}\n"
+                        f"Replay Error (stderr):\n{result['stderr']}\n"
+                        f"Exit Code: {result['returncode']}\n"
+                    )
+                    if result["signal"]:
+                        entry_report += f"Signal: {result['signal']}\n"
+                    if result["status"] == "timeout":
+                        entry_report += f"Replay timed out after {replay.REPLAY_TIMEOUT}s\n"
+                    summary.update(stdout=result["stdout"], stderr=result["stderr"],
+                                   exit_code=result["returncode"], signal=result["signal"])
+
+                crash_entries.append((summary, entry_report))
+
+            # Generate crash explanations using batched chatbot requests
+            explanations = llm_batch.explain_crashes([summary for summary, _ in crash_entries])
+            for summary, entry_report in crash_entries:
+                explanation = explanations.get(summary["id"], "Not enough context, review manually.")
+                crash_report += entry_report + f"### Crash Explanation:\n{explanation}\n\n"
         else:
-            # If the crashes directory does not exist
-            crash_report = f"Error: Crashes directory not found at {crashes_dir}"
+            # If no fuzzer instance directory exists
+            crash_report = f"Error: No fuzzer instances found in {out_dir}"
 
     except Exception as e:
         # Catch any exception that occurs and return the error message
         crash_report = f"Error accessing or processing the crashes directory: {str(e)}"
 
-    return crash_report
+    return crash_report, explanations
 
 
 
@@ -183,127 +177,354 @@ def home():
     return render_template('index.html')
 
 
+def build_fuzzing_report(params, update):
+    """Job handler that builds the full fuzzing report for a target, section by section."""
+    target_name = params["target_name"]
+
+    # Output directory, binary and input mode recorded when the campaign was launched
+    target = resolve_target(target_name)
+    out_dir = target["output_dir"]
+
+    # Generate fuzzing status report
+    update(0.05, "Fetching fuzzing status")
+    fuzzing_status = get_fuzzing_status(out_dir)
+    if target.get("running") is False:
+        fuzzing_status += "\nNote: none of the fuzzer processes recorded for this campaign are running.\n"
+    update(0.1, "Replaying and explaining crashes", f"Fuzzing Status for {target_name}", fuzzing_status)
+
+    crash_report, explanations = generate_crash_report(target)
+    update(0.35, "Triaging crashes", "Crash Report", crash_report)
+
+    # Merge crashes from every fuzzer instance, one entry per unique input
+    unique_crashes = collector.collect_inputs(out_dir, 'crashes')
+    crash_paths = [crash["path"] for crash in unique_crashes]
+
+    # Bucket and classify the crashes with crashwalk / gdb exploitable
+    # Crashes, hangs and minimization replay the target with the campaign's arguments and input mode
+    triage.triage_crashes(TRIAGE_DB_PATH, target_name, crash_paths, target)
+    triage_report = triage.format_triage_report(TRIAGE_DB_PATH, target_name)
+
+    # Queue afl-tmin on one representative per bucket; later reports replay the result
+    for representative in triage.get_bucket_representatives(TRIAGE_DB_PATH, target_name):
+        minimize.enqueue(representative, target)
+    minimize_status = minimize.get_queue_status()
+    triage_report += f"Minimization queue: {minimize_status['pending']} pending\n"
+    update(0.5, "Triaging hangs", "Crash Triage", triage_report)
+
+    # Replay the hangs under gdb sampling to separate infinite loops from slow paths
+    hang_paths = [hang["path"] for hang in collector.collect_inputs(out_dir, 'hangs')]
+    hangs.triage_hangs(TRIAGE_DB_PATH, target_name, hang_paths, target)
+    hang_report = hangs.format_hang_report(TRIAGE_DB_PATH, target_name)
+    update(0.6, "Explaining fuzzing status", "Hang Triage", hang_report)
+
+    # Send fuzzing status to chatbot for explanation
+    explanation_request = f"explain the fuzzing status for the target {target_name}:\n{fuzzing_status}. Also explain fuzzing results in terms of what kind of bug it probably is. help triage it."
+    explanation_request += f" Do not explain menial things like file system, etc."
+    explanation_response = llm_client.chat(explanation_request, task="status")
+    fuzzing_explanation = explanation_response.get("response", "No explanation available.")
+    update(0.7, "Collecting crash explanations", "Fuzzing Explanation", fuzzing_explanation)
+
+    # The crash explanations were produced in batches alongside the crash report
+    crash_explanations = ""
+    for crash in unique_crashes:
+        crash_file = crash["name"]
+        crash_explanation = explanations.get(f"{crash['instance']}/{crash_file}", "No explanation available.")
+        crash_explanations += f"### Crash Explanation for {crash_file}:\n{crash_explanation}\n\n"
+    update(0.95, "Assembling report", "Crash Explanations", crash_explanations)
+
+    # Combine the results
+    full_report = f"### Fuzzing Status for {target_name}:\n\n{fuzzing_status}\n\n### Fuzzing Explanation:\n{fuzzing_explanation}\n\n### Crash Report:\n\n{crash_report}\n\n### Crash Triage:\n\n{triage_report}\n### Hang Triage:\n\n{hang_report}\n### Crash Explanations:\n{crash_explanations}"
+    return full_report
+
+
+jobs.register_handler('fuzzing_report', build_fuzzing_report)
+
+
 @app.route('/tests', methods=['GET', 'POST'])
 def tests():
     if request.method == 'POST':
         target_name = request.form.get('target-name', '').strip()
 
         if target_name:
-            # Generate the full path to the target in the workspace directory
-            target_path = os.path.join(FLARE_WORKSPACE, target_name)
-
-            # Generate fuzzing status report
-            fuzzing_status = get_fuzzing_status(target_path)
-            crash_report = generate_crash_report(target_path)
-
-            # Send fuzzing status to chatbot for explanation
-            explanation_request = f"explain the fuzzing status for the target {target_name}:\n{fuzzing_status}. Also explain fuzzing results in terms of what kind of bug it probably is. help triage it."
-            explanation_request += f" Do not explain menial things like file system, etc."
-            explanation_response = requests.post('http://localhost:5001/chat', json={"message": explanation_request}).json()
-            fuzzing_explanation = explanation_response.get("response", "No explanation available.")
-
-            # Send crash report to chatbot for each crash explanation
-            crash_explanations = ""
-            crashes_dir = os.path.join(FLARE_WORKSPACE, target_path, 'out', 'default', 'crashes')
-            for crash_file in os.listdir(crashes_dir):
-                crash_path = os.path.join(crashes_dir, crash_file)
-                if os.path.isfile(crash_path):
-                    crash_explanation_request = f"Please explain the following crash for the target {target_name} with input file {crash_file}:\n{crash_path}"
-                    crash_explanation_response = requests.post('http://localhost:5001/chat', json={"message": crash_explanation_request}).json()
-                    crash_explanations += f"### Crash Explanation for {crash_file}:\n{crash_explanation_response.get('response', 'No explanation available.')}\n\n"
-
-            # Combine the results
-            full_report = f"### Fuzzing Status for {target_name}:\n\n{fuzzing_status}\n\n### Fuzzing Explanation:\n{fuzzing_explanation}\n\n### Crash Report:\n\n{crash_report}\n\n### Crash Explanations:\n{crash_explanations}"
-
-            return render_template('tests.html', target_name=target_name, fuzzing_report=full_report)
+            # Report generation runs on the job workers; the page polls /jobs/<job_id>
+            job_id = jobs.submit_job(JOBS_DB_PATH, 'fuzzing_report', {"target_name": target_name})
+            jobs.start_workers(JOBS_DB_PATH)
+            return render_template('tests.html', target_name=target_name, job_id=job_id)
         else:
             return render_template('tests.html', error="Please provide a valid target name.")
 
-    return render_template('tests.html')
+    return render_template('tests.html', registered=targets.list_campaigns(TARGETS_DB_PATH))
+
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = jobs.get_job(JOBS_DB_PATH, job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job {job_id}"}), 404
+    return jsonify(job)
+
+
+def build_coverage_report(params, update):
+    """Job handler that refreshes a target's corpus coverage, replaying only new queue entries."""
+    target = targets.get_campaign(TARGETS_DB_PATH, params["target_name"])
+    if target is None:
+        raise RuntimeError(f"{params['target_name']} is not a registered campaign")
+    report = corpus_coverage.refresh_coverage(COVERAGE_DB_PATH, target, FLARE_WORKSPACE, update)
+    return corpus_coverage.format_coverage_report(report)
+
+
+jobs.register_handler('coverage_report', build_coverage_report)
+
+
+def page_args():
+    """Read ?page= (1-based) and ?per_page= from the request; returns (page, per_page, offset)."""
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = min(MAX_PAGE_SIZE, max(1, request.args.get('per_page', DEFAULT_PAGE_SIZE, type=int)))
+    return page, per_page, (page - 1) * per_page
 
 
-@app.route('/tests/<test_id>')
+def coverage_summary(report):
+    """A coverage report without its per-function list, which is served page by page."""
+    return {key: value for key, value in report.items() if key != "functions"} if report else None
+
+
+@app.route('/tests/<path:test_id>')
 def test_details(test_id):
-    return render_template('test_details.html', test_id=test_id)
+    # Only summaries are rendered; crash buckets, replays and charts load from the JSON routes below
+    return render_template('test_details.html', test_id=test_id,
+                           campaign=targets.get_campaign(TARGETS_DB_PATH, test_id),
+                           coverage=coverage_summary(
+                               corpus_coverage.get_coverage_report(COVERAGE_DB_PATH, test_id)))
+
+
+@app.route('/tests/<path:test_id>/buckets')
+def test_buckets(test_id):
+    page, per_page, offset = page_args()
+    bucket_count, crash_count, buckets = triage.get_buckets(TRIAGE_DB_PATH, test_id, offset, per_page)
+    return jsonify({"total": bucket_count, "crashes": crash_count, "page": page, "per_page": per_page,
+                    "items": buckets})
+
+
+@app.route('/tests/<path:test_id>/buckets/<major_hash>/crashes')
+def test_bucket_crashes(test_id, major_hash):
+    page, per_page, offset = page_args()
+    total, crashes = triage.get_bucket_crashes(TRIAGE_DB_PATH, test_id, major_hash, offset, per_page)
+    for crash in crashes:
+        crash["name"] = os.path.basename(crash["crash_path"])
+    return jsonify({"total": total, "page": page, "per_page": per_page, "items": crashes})
+
+
+@app.route('/tests/<path:test_id>/replay')
+def test_replay(test_id):
+    """Replay output and sanitizer trace of one crash, from the cache or replayed on demand."""
+    crash_path = request.args.get('path', '')
+    # Only triaged crashes of this target may be run
+    if not triage.is_known_crash(TRIAGE_DB_PATH, test_id, crash_path):
+        return jsonify({"error": f"{crash_path} is not a crash of {test_id}"}), 404
+    target = resolve_target(test_id)
+    if not target["binary_path"]:
+        return jsonify({"error": "No target program found for replay."}), 404
+    reproducer_path = minimize.get_reproducer(crash_path)
+    result = replay.replay_cached(TRIAGE_DB_PATH, target, reproducer_path)
+    if result is None:
+        return jsonify({"error": f"Could not replay {reproducer_path}"}), 500
+    return jsonify(dict(result, crash_path=crash_path, reproducer=reproducer_path,
+                        sanitizer_trace=replay.sanitizer_trace(result["stderr"])))
+
+
+@app.route('/tests/<path:test_id>/plot')
+def test_plot(test_id):
+    """Time series from each instance's plot_data, downsampled for charts."""
+    target = resolve_target(test_id)
+    return jsonify({"instances": collector.collect_plot_data(target["output_dir"])})
+
+
+@app.route('/tests/<path:test_id>/coverage', methods=['GET', 'POST'])
+def test_coverage(test_id):
+    if request.method == 'POST':
+        # Building and replaying can take minutes; the page polls /jobs/<job_id>
+        job_id = jobs.submit_job(JOBS_DB_PATH, 'coverage_report', {"target_name": test_id})
+        jobs.start_workers(JOBS_DB_PATH)
+        return jsonify({"job_id": job_id})
+
+    report = corpus_coverage.get_coverage_report(COVERAGE_DB_PATH, test_id)
+    if report is None:
+        return jsonify({"error": f"No coverage report for {test_id} yet"}), 404
+    return jsonify(coverage_summary(report))
+
+
+@app.route('/tests/<path:test_id>/coverage/functions')
+def test_coverage_functions(test_id):
+    """Per-function coverage, a page at a time; ?uncovered=1 lists only functions never reached."""
+    report = corpus_coverage.get_coverage_report(COVERAGE_DB_PATH, test_id)
+    if report is None:
+        return jsonify({"error": f"No coverage report for {test_id} yet"}), 404
+    functions = report["functions"]
+    if request.args.get('uncovered'):
+        functions = [function for function in functions if function["execution_count"] == 0]
+    page, per_page, offset = page_args()
+    return jsonify({"total": len(functions), "page": page, "per_page": per_page,
+                    "items": functions[offset:offset + per_page]})
 
 
 @app.route('/chat', methods=['POST'])
 def chat():
     user_input = request.json.get('message', '')
+    # Browser-held ID of the server-side conversation
+    session_id = request.json.get('session_id')
     git_repo_url = None
     if 'git' in user_input.lower():  # Check if the user provided a Git repo URL
         # Extract the Git repository URL from the user input
-        match = re.search(r'(https?://[^\s]+\.git)', user_input)
-        if match:
-            git_repo_url = match.group(1)
+        git_repo_url = extract_git_url(user_input)
 
     # If a Git repo URL is provided, fetch details (README, Makefile, Tree)
     repo_details = ""
     if git_repo_url:
         repo_details = get_git_repo_details(git_repo_url)
 
-    # Read the default playbook content
-    default_playbook = get_default_playbook()
-    playbook_content = ""
-    if default_playbook:
-        # Convert YAML to a readable string format
-        playbook_content = yaml.dump(default_playbook)
-
-    # Prepare the message to send to the chatbot
-    message_to_send = user_input
-
-    # If "playbook:" is not already included in the user input, prepend the playbook content
-    if "playbook:" not in user_input.lower() and playbook_content:
-        message_to_send = f"Answer {user_input} based on these guidelines {playbook_content}"
-
-    # If Git repo details are found, append them to the message
-    if repo_details:
-        message_to_send = f"{message_to_send} This is the git repo {repo_details}"
-
-    try:
-        # Call the chatbot backend
-        response = requests.post('http://localhost:5001/chat', json={"message": message_to_send})
-        response.raise_for_status()  # Ensure HTTP errors are caught
-        chatbot_response = response.json()
-
-        # Check for "flare-execute" command
-        if "flare-execute" in user_input:
-            try:
-                # Extract Markdown blocks with commands
-                markdown_blocks = re.findall(r'```(?:\w+)?\n([\s\S]*?)```', chatbot_response.get("response", ""))
-                execution_outputs = []
-
-                # Execute each block
-                for block in markdown_blocks:
-                    command = block.strip()
-                    if command:  # Ensure the block isn't empty
-                        result = subprocess.run(
-                            command,
-                            shell=True,
-                            executable='/bin/bash',  # Use bash for execution
-                            capture_output=True,
-                            text=True,
-                            cwd=FLARE_WORKSPACE
-                        )
-                        # Capture stdout or stderr based on the result
-                        execution_output = result.stdout if result.returncode == 0 else result.stderr
-                        execution_outputs.append(f"Command: {command}\nOutput:\n{execution_output.strip()}")
-
-                # Add execution output to the chatbot response
-                if execution_outputs:
-                    chatbot_response["flare_execute_output"] = "\n\n".join(execution_outputs)
-
-                # Request interpretation of the execution output from the chatbot, along with the original user input
-                interpretation_request = f"Given the following user prompt:\n{user_input}\n\nAnd the following execution output:\n{execution_outputs[-1]}\n\nPlease interpret the results and explain what happened."
-                interpretation_response = requests.post('http://localhost:5001/chat', json={"message": interpretation_request}).json()
-                chatbot_response["flare_execute_interpretation"] = interpretation_response.get("response", "No interpretation available.")
-
-            except Exception as e:
-                chatbot_response["flare_execute_output"] = f"Error during execution: {str(e)}"
-
+    # Playbook guidelines, repo details and plan format go alongside the request; the
+    # session only records what the user typed
+    context = pipeline.build_context(user_input, repo_details)
+
+    # Executing needs a valid plan; ordinary chat turns may be answered in plain text
+    execute = "flare-execute" in user_input
+
+    # Call the LLM (in-process, or the chat server when config.LLM_MODE is "remote").
+    # Execution requests replay a cached plan for the same repo commit when one exists.
+    outcomes = []
+    if execute:
+        try:
+            run = pipeline.plan_and_execute(user_input, context, git_repo_url or user_input[:200],
+                                            git_url=git_repo_url, session_id=session_id)
+        except Exception as e:
+            return jsonify({"error": f"Error during execution: {str(e)}"})
+        chatbot_response, plan, plan_errors, outcomes = run["reply"], run["plan"], run["errors"], run["outcomes"]
+        chatbot_response["cached_plan"] = run["cached"]
+    else:
+        chatbot_response, plan, plan_errors = pipeline.request_plan(user_input, context, strict=False,
+                                                                      session_id=session_id)
+    if "error" in chatbot_response:
         return jsonify(chatbot_response)
-    except requests.exceptions.RequestException as e:
-        return jsonify({"error": f"Failed to connect to chat server: {str(e)}"})
+    if plan is None:
+        # Show the raw reply, but never execute anything from an invalid plan
+        chatbot_response["plan_errors"] = plan_errors
+    else:
+        chatbot_response["response"] = plan["message"]
+        chatbot_response["plan"] = plan
+
+    # Check for "flare-execute" command
+    if execute and plan is None:
+        chatbot_response["flare_execute_output"] = "Nothing was executed: the plan was invalid.\n" + "\n".join(plan_errors)
+    elif outcomes:
+        try:
+            execution_outputs = []
+            for step, outcome in zip(plan["steps"], outcomes):
+                result = outcome["result"]
+                # Capture stdout or stderr based on the result
+                execution_output = result.stdout if result.returncode == 0 else result.stderr
+                attempts_note = ""
+                if outcome["attempts"] > 1:
+                    attempts_note = f" (after {outcome['attempts']} attempts)"
+                execution_outputs.append(
+                    f"[{step['type']}] Command{attempts_note}: {outcome['command']}\nOutput:\n{execution_output.strip()}")
+
+            # Add execution output to the chatbot response
+            if execution_outputs:
+                chatbot_response["flare_execute_output"] = "\n\n".join(execution_outputs)
+
+            # Request interpretation of the execution output from the chatbot, along with the original user input
+            interpretation_request = f"Given the following user prompt:\n{user_input}\n\nAnd the following execution output:\n{execution_outputs[-1]}\n\nPlease interpret the results and explain what happened."
+            interpretation_response = llm_client.chat(interpretation_request, task="interpret")
+            chatbot_response["flare_execute_interpretation"] = interpretation_response.get("response", "No interpretation available.")
+
+        except Exception as e:
+            chatbot_response["flare_execute_output"] = f"Error during execution: {str(e)}"
+
+    return jsonify(chatbot_response)
+
+
+@app.route('/metrics/builds')
+def build_metrics():
+    return jsonify(build_repair.get_metrics_summary(BUILD_METRICS_DB_PATH))
+
+
+@app.route('/stats')
+def llm_stats():
+    return jsonify(llm_client.stats())
+
+
+@app.route('/prefetch', methods=['POST'])
+def prefetch():
+    """Warm the repo context cache for a URL the user is still typing a message about."""
+    git_repo_url = request.json.get('url') or extract_git_url(request.json.get('message', ''))
+    if not git_repo_url:
+        return jsonify({"status": "no repository URL found"})
+    repo_context.prefetch(git_repo_url)
+    return jsonify({"url": git_repo_url, "status": repo_context.prefetch_status(git_repo_url)})
+
+
+def harness_target_dir(git_repo_url):
+    """Workspace directory used for targets launched straight from the harness index.
+
+    Returns None when the URL does not end in a usable repository name.
+    """
+    repo_name = re.sub(r'\.git$', '', os.path.basename(git_repo_url.rstrip('/')))
+    if repo_name in ('', '.', '..'):
+        return None
+    return os.path.join(FLARE_WORKSPACE, repo_name)
+
+
+@app.route('/harnesses', methods=['POST'])
+def harnesses():
+    """List ranked fuzz target candidates for a repo, with ready-to-run launch commands."""
+    git_repo_url = request.json.get('url') or extract_git_url(request.json.get('message', ''))
+    if not git_repo_url:
+        return jsonify({"error": "No repository URL found"})
+    target_dir = harness_target_dir(git_repo_url)
+    if target_dir is None:
+        return jsonify({"error": f"Cannot name a target directory after {git_repo_url}"})
+    details = repo_context.get_repo_details(git_repo_url)
+    if details.startswith("Error"):
+        return jsonify({"error": details})
+
+    repo_dir = repo_context.repo_dir_for(git_repo_url)
+    candidates = repo_context.get_fuzz_targets(repo_dir)
+    for candidate in candidates:
+        candidate["commands"] = harness_index.suggest_commands(repo_dir, candidate, target_dir)
+    return jsonify({"url": git_repo_url, "candidates": candidates})
+
+
+@app.route('/harnesses/launch', methods=['POST'])
+def launch_harness():
+    """Build and start fuzzing a discovered harness directly, without an LLM round trip."""
+    git_repo_url = request.json.get('url', '')
+    harness_path = request.json.get('path', '')
+    if not git_repo_url or not harness_path:
+        return jsonify({"error": "Both url and path are required"})
+    target_dir = harness_target_dir(git_repo_url)
+    if target_dir is None:
+        return jsonify({"error": f"Cannot name a target directory after {git_repo_url}"})
+    details = repo_context.get_repo_details(git_repo_url)
+    if details.startswith("Error"):
+        return jsonify({"error": details})
+
+    repo_dir = repo_context.repo_dir_for(git_repo_url)
+    candidates = {c["path"]: c for c in repo_context.get_fuzz_targets(repo_dir)}
+    if harness_path not in candidates:
+        return jsonify({"error": f"{harness_path} is not a discovered fuzz target"})
+
+    commands = harness_index.suggest_commands(repo_dir, candidates[harness_path], target_dir)
+    result = sandbox.run_sandboxed(commands, FLARE_WORKSPACE)
+    output = result.stdout if result.returncode == 0 else result.stderr
+    campaigns = pipeline.record_launch(commands, git_repo_url) if result.returncode == 0 else []
+    return jsonify({"commands": commands, "returncode": result.returncode, "output": output.strip(),
+                    "campaigns": campaigns})
+
+
+@app.route('/targets')
+def list_targets():
+    """Registered fuzzing campaigns, newest first."""
+    return jsonify(targets.list_campaigns(TARGETS_DB_PATH))
 
 
 @app.route('/resources/<path:filename>')
@@ -312,4 +533,8 @@ def serve_static(filename):
 
 
 if __name__ == '__main__':
+    # The reloader parent only watches files; workers run in the serving child, which
+    # also resumes report jobs left unfinished by a previous run
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        jobs.start_workers(JOBS_DB_PATH)
     app.run(debug=True)
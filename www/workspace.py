@@ -0,0 +1,4 @@
+import os
+
+# Generated builds, fuzzing campaigns and FLARE's databases and caches all live here
+FLARE_WORKSPACE = os.environ.get('FLARE_WORKSPACE', '/tmp/flare_ws')